@@ -1,6 +1,6 @@
 """Deze module bevat de 'input' van de gebruiker: alle gegevens die nodig zijn voor de berekening"""
 from enum import Enum
-from typing import NamedTuple
+from typing import NamedTuple, Optional, Tuple
 
 
 class HypotheekVorm(Enum):
@@ -10,6 +10,20 @@ class HypotheekVorm(Enum):
     Aflossingsvrij = "Aflossingsvrij"
 
 
+class Leningdeel(NamedTuple):
+    """Een deel van de hypotheek met een eigen hypotheekvorm, rente en rentevaste periode. Bij precies een van de
+    leningdelen mag het bedrag leeg (None) blijven: dat deel is dan de rest van de hypotheekschuld. Zonder rente nadien
+    blijft de rente na de rentevaste periode gelijk. De rente is standaard aftrekbaar, behalve voor een aflossingsvrij
+    deel (zoals bij hypotheken afgesloten na 2013). Met 'aftrekbaar' kan dat per deel anders gezet worden, bijvoorbeeld
+    voor een oud aflossingsvrij deel onder het overgangsrecht."""
+    hypotheek_vorm: HypotheekVorm
+    bedrag: Optional[float] = None
+    hypotheek_rente_percentage: float = 1.45
+    rente_vast_jaren: int = 10
+    rente_percentage_nadien: Optional[float] = None
+    aftrekbaar: Optional[bool] = None
+
+
 class Gegevens(NamedTuple):
     """In dit object zitten alle gegevens die als gebruikers-input gezien worden en dus aanbasbaar zijn. Het is in twee
     secties opgesplits: een eerste sectie met waarden die vrijwel zeker aangepast worden en een tweede sectie waarin
@@ -98,4 +112,10 @@ class Gegevens(NamedTuple):
     extra_spaarinleg_per_maand: float = 0.0
     rendement_jaarlijks_percentage: float = 5.0
 
+    # De meeste hypotheken bestaan uit meerdere leningdelen, elk met een eigen vorm, rente en rentevaste periode (zie
+    # Leningdeel hierboven), bijvoorbeeld: (Leningdeel(HypotheekVorm.Aflossingsvrij, 100_000, 1.65),
+    # Leningdeel(HypotheekVorm.Annuiteiten)). Als hier leningdelen opgegeven worden, dan worden de hypotheekvorm, de
+    # rentes en het aflossingsvrije deel hierboven niet gebruikt. De looptijd is voor alle delen gelijk.
+    leningdelen: Tuple[Leningdeel, ...] = ()
+
     # ------------------------------------------------------------------------------------------------------------------
@@ -0,0 +1,4 @@
+#!/usr/bin/env sh
+
+# Vergelijk met de basislijn (of bewaar een nieuwe basislijn met --bewaar), zie: python -m src.benchmark --help
+python -m src.benchmark "$@"
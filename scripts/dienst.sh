@@ -0,0 +1,4 @@
+#!/usr/bin/env sh
+
+# Start de lokale rekendienst (standaard op http://127.0.0.1:8080), zie: python -m src.dienst --help
+python -m src.dienst "$@"
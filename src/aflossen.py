@@ -0,0 +1,178 @@
+"""Extra aflossen of sparen: de extra spaarinleg per maand (zie gegevens.Gegevens) kan ook gebruikt worden om boetevrij
+extra af te lossen, meestal tot 10 a 20% van de oorspronkelijke schuld per jaar. Deze module zoekt het beste beleid:
+hoeveel er maandelijks extra afgelost wordt, vanaf welk jaar, en of het gespaarde geld in een bepaald jaar in een keer
+afgelost wordt. Een blok van kandidaten wordt in een keer doorgerekend met een maand-voor-maand loop waarin elke stap
+een NumPy operatie over alle kandidaten is, en de blokken worden verdeeld over meerdere processen."""
+import concurrent.futures
+import functools
+import itertools
+import os
+from typing import Iterable, List, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+import gegevens
+from src import belasting
+from src import hypotheek
+from src import vector
+
+
+class AflosBeleid(NamedTuple):
+    """Wat er met de extra spaarinleg gebeurt. Vanaf 'vanaf_jaar' wordt elke maand het 'aandeel_aflossen' van de inleg
+    extra afgelost en de rest gespaard. Als 'spaargeld_aflossen_jaar' gezet is wordt aan het begin van dat jaar al het
+    gespaarde geld afgelost. Alle extra aflossing blijft binnen het boetevrije bedrag per jaar, behalve aan het einde
+    van de rentevaste periode: dan mag het gespaarde geld zonder grens afgelost worden."""
+    aandeel_aflossen: float = 0.0
+    vanaf_jaar: int = 0
+    spaargeld_aflossen_jaar: Optional[int] = None
+
+
+class BeleidResultaat(NamedTuple):
+    """De uitkomsten aan het einde van de looptijd, elk een array met een waarde per kandidaat. Het netto vermogen is
+    het gespaarde geld min de restschuld en min alles wat naast de vaste extra inleg aan het huis betaald is (gewone
+    aflossing, netto rente en belastingnadeel). De waarde van het huis is voor elk beleid gelijk en telt niet mee."""
+    netto_vermogen: np.ndarray
+    restschuld: np.ndarray
+    gespaard_geld: np.ndarray
+    extra_aflossing: np.ndarray
+    betaalde_rente_netto: np.ndarray
+
+
+class Optimalisatie(NamedTuple):
+    """Het beleid met het hoogste netto vermogen, en de uitkomsten van alle kandidaten in de opgegeven volgorde."""
+    beste: AflosBeleid
+    kandidaten: List[AflosBeleid]
+    resultaat: BeleidResultaat
+
+
+def beleid_raster(gegeven: gegevens.Gegevens, aandelen: Optional[Iterable[float]] = None,
+                  vanaf_jaren: Optional[Iterable[int]] = None,
+                  spaargeld_aflossen_jaren: Optional[Iterable[Optional[int]]] = None) -> List[AflosBeleid]:
+    """Alle combinaties van de opgegeven waarden, zoals vector.scenario_raster. Standaard is dat elke 10% van de inleg,
+    elk jaar van de looptijd als begin, en nooit of in elk jaar het gespaarde geld aflossen: bij een looptijd van 30
+    jaar zijn dat 9900 kandidaten."""
+    if aandelen is None:
+        aandelen = np.linspace(0.0, 1.0, 11).tolist()
+    if vanaf_jaren is None:
+        vanaf_jaren = range(gegeven.looptijd_hypotheek_jaren)
+    if spaargeld_aflossen_jaren is None:
+        spaargeld_aflossen_jaren = [None, *range(1, gegeven.looptijd_hypotheek_jaren)]
+    return [AflosBeleid(*waarden) for waarden in itertools.product(aandelen, vanaf_jaren, spaargeld_aflossen_jaren)]
+
+
+def bereken_beleid(gegeven: gegevens.Gegevens, kandidaten: Sequence[AflosBeleid],
+                   boetevrij_percentage: float = 10.0) -> BeleidResultaat:
+    """Rekent alle kandidaten in een keer door. De hypotheek wordt berekend zoals in vector.rente_pad_kolommen: elke
+    maand wordt de maandbetaling van een annuiteitenhypotheek (of de aflossing van een lineaire hypotheek) opnieuw
+    berekend over de restschuld en de resterende looptijd, zodat extra aflossen de maandlasten verlaagt. Zonder extra
+    aflossing en renteverandering geeft dit dezelfde uitkomsten als vector.bereken_kolommen."""
+    # pylint: disable=too-many-locals, too-many-statements
+    if gegeven.leningdelen or gegeven.aflossingsvrij_deel > 0.0:
+        raise NotImplementedError("Extra aflossen wordt niet ondersteund voor leningdelen of een aflossingsvrij deel")
+    if gegeven.hypotheek_vorm not in (gegevens.HypotheekVorm.Lineair, gegevens.HypotheekVorm.Annuiteiten,
+                                      gegevens.HypotheekVorm.Aflossingsvrij):
+        raise NotImplementedError(f"De hypotheek vorm '{gegeven.hypotheek_vorm}' wordt niet ondersteund")
+    if not kandidaten:
+        raise RuntimeError("Er moet minstens een kandidaat opgegeven worden")
+    if boetevrij_percentage < 0.0:
+        raise RuntimeError("Het boetevrije percentage mag niet negatief zijn")
+    aandeel = np.array([kandidaat.aandeel_aflossen for kandidaat in kandidaten], dtype=np.float64)
+    if np.any((aandeel < 0.0) | (aandeel > 1.0)):
+        raise RuntimeError("Het aandeel van de inleg dat afgelost wordt moet tussen 0 en 1 liggen")
+    vanaf_jaar = np.array([kandidaat.vanaf_jaar for kandidaat in kandidaten])
+    spaargeld_aflossen_jaar = np.array([-1 if kandidaat.spaargeld_aflossen_jaar is None
+                                        else kandidaat.spaargeld_aflossen_jaar for kandidaat in kandidaten])
+
+    # Alles wat niet van het beleid afhangt wordt vooraf per maand of per jaar berekend
+    originele_schuld = hypotheek.bereken_aankoop(gegeven).hypotheek_schuld
+    looptijd_hypotheek_maanden = gegeven.looptijd_hypotheek_jaren * 12
+    alle_jaren = np.arange(gegeven.looptijd_hypotheek_jaren)
+    maand_rente = np.power(1 + (vector.standaard_rente_pad(gegeven) / 100.0), 1/12.0) - 1
+    resterende_maanden = looptijd_hypotheek_maanden - np.arange(looptijd_hypotheek_maanden)
+    with np.errstate(divide="ignore", invalid="ignore"):  # een rente van 0% kan alleen niet voor annuiteiten
+        annuiteit_factor = maand_rente / (1 - np.power(1 + maand_rente, -resterende_maanden))
+    regime = belasting.regime_voor(gegeven)
+    woz_waarde = vector.exp_stijging(gegeven.woz_waarde, gegeven.woz_stijging_jaarlijks_percentage, alle_jaren)
+    eigenwoningforfait = np.asarray(regime.ewf(woz_waarde, alle_jaren))
+    spaar_factor = 1 + gegeven.rendement_jaarlijks_percentage / (12 * 100.0)
+    inleg = gegeven.extra_spaarinleg_per_maand
+    boetevrij_per_jaar = (boetevrij_percentage / 100.0) * originele_schuld
+
+    # De toestand van alle kandidaten, maand voor maand bijgewerkt
+    aantal = len(kandidaten)
+    schuld = np.full(aantal, float(originele_schuld))
+    gespaard_geld = np.zeros(aantal)
+    boetevrij_over = np.zeros(aantal)
+    extra_aflossing = np.zeros(aantal)
+    betaalde_rente_netto = np.zeros(aantal)
+    betaald = np.zeros(aantal)  # gewone aflossing, netto rente en belastingnadeel
+    for maand, jaar in enumerate(np.repeat(alle_jaren, 12).tolist()):
+
+        # Aan het begin van het jaar: nieuw boetevrij bedrag en eventueel het gespaarde geld aflossen
+        if maand % 12 == 0:
+            boetevrij_over[:] = boetevrij_per_jaar
+            in_een_keer = spaargeld_aflossen_jaar == jaar
+            if np.any(in_een_keer):
+                einde_rentevast = jaar == gegeven.rente_vast_jaren
+                grens = schuld if einde_rentevast else np.minimum(schuld, boetevrij_over)
+                bedrag = np.where(in_een_keer, np.minimum(gespaard_geld, grens), 0.0)
+                schuld = schuld - bedrag
+                gespaard_geld = gespaard_geld - bedrag
+                extra_aflossing += bedrag
+                if not einde_rentevast:
+                    boetevrij_over -= bedrag
+
+        # De gewone aflossing en rente
+        rente = schuld * maand_rente[maand]
+        if gegeven.hypotheek_vorm == gegevens.HypotheekVorm.Annuiteiten:
+            aflossing = schuld * annuiteit_factor[maand] - rente
+        elif gegeven.hypotheek_vorm == gegevens.HypotheekVorm.Lineair:
+            aflossing = schuld / resterende_maanden[maand]
+        else:
+            aflossing = np.zeros(aantal)
+        schuld = schuld - aflossing
+
+        # De extra aflossing uit de inleg van deze maand, de rest wordt gespaard
+        extra = np.where(jaar >= vanaf_jaar, aandeel * inleg, 0.0)
+        extra = np.minimum(extra, np.minimum(boetevrij_over, schuld))
+        schuld = schuld - extra
+        boetevrij_over -= extra
+        extra_aflossing += extra
+        gespaard_geld = gespaard_geld * spaar_factor + (inleg - extra)
+
+        # Belastingvoordeel (HRA) en nadeel (EWF), de rente van een aflossingsvrije hypotheek is niet aftrekbaar
+        aftrekbare_rente = 0.0 if gegeven.hypotheek_vorm == gegevens.HypotheekVorm.Aflossingsvrij else rente
+        belasting_voordeel, belasting_nadeel = regime.bereken(regime.hra(aftrekbare_rente, jaar),
+                                                              eigenwoningforfait[jaar], jaar)
+        rente_netto = rente - belasting_voordeel
+        betaalde_rente_netto += rente_netto
+        betaald += aflossing + rente_netto + belasting_nadeel
+
+    return BeleidResultaat(netto_vermogen=gespaard_geld - schuld - betaald, restschuld=schuld,
+                           gespaard_geld=gespaard_geld, extra_aflossing=extra_aflossing,
+                           betaalde_rente_netto=betaalde_rente_netto)
+
+
+def optimaliseer(gegeven: gegevens.Gegevens, kandidaten: Optional[Iterable[AflosBeleid]] = None,
+                 boetevrij_percentage: float = 10.0, kandidaten_per_blok: int = 1000,
+                 max_workers: Optional[int] = None) -> Optimalisatie:
+    """Zoekt het beleid met het hoogste netto vermogen aan het einde van de looptijd, standaard uit alle kandidaten van
+    beleid_raster. De blokken van kandidaten worden verdeeld over een pool van processen (standaard een per core), met
+    maar een blok of een enkel proces wordt er direct gerekend."""
+    alle_kandidaten = beleid_raster(gegeven) if kandidaten is None else list(kandidaten)
+    if not alle_kandidaten:
+        raise RuntimeError("Er moet minstens een kandidaat opgegeven worden")
+    blokken = [alle_kandidaten[begin:begin + kandidaten_per_blok]
+               for begin in range(0, len(alle_kandidaten), kandidaten_per_blok)]
+
+    bereken_blok = functools.partial(bereken_beleid, gegeven, boetevrij_percentage=boetevrij_percentage)
+    max_workers = max_workers or os.cpu_count() or 1
+    if len(blokken) == 1 or max_workers == 1:
+        resultaten = [bereken_blok(blok) for blok in blokken]
+    else:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=max_workers) as pool:
+            resultaten = list(pool.map(bereken_blok, blokken))
+
+    resultaat = BeleidResultaat(*(np.concatenate(waarden) for waarden in zip(*resultaten)))
+    beste = int(np.argmax(resultaat.netto_vermogen))
+    return Optimalisatie(beste=alle_kandidaten[beste], kandidaten=alle_kandidaten, resultaat=resultaat)
@@ -0,0 +1,76 @@
+"""Functies die een enkele vraag over de resultaten beantwoorden, zoals vanaf welke maand kopen voordeliger is dan
+huren. Voor een enkel scenario wordt de stroom van data per maand gebruikt (zie main.stroom), zodat er gestopt wordt
+zodra het antwoord bekend is. Voor een hele reeks aannames tegelijk wordt het antwoord gevectoriseerd berekend, met als
+resultaat een raster dat bijvoorbeeld direct als heatmap getekend kan worden."""
+from typing import Callable, Iterable, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+import gegevens
+from src import data
+from src import main
+from src import vector
+
+
+class Raster(NamedTuple):
+    """De uitkomsten voor alle combinaties van de waarden op twee assen, met een rij per waarde op de eerste as en een
+    kolom per waarde op de tweede as."""
+    rij_naam: str
+    rij_waarden: np.ndarray
+    kolom_naam: str
+    kolom_waarden: np.ndarray
+    waarden: np.ndarray
+
+
+def eerste_maand(alle_data: Iterable[data.MaandData],
+                 voorwaarde: Callable[[data.MaandData], bool]) -> Optional[data.MaandData]:
+    """De data van de eerste maand die aan de voorwaarde voldoet, of None als er geen zo'n maand is."""
+    return next((maand_data for maand_data in alle_data if voorwaarde(maand_data)), None)
+
+
+def omslagpunt_kopen(gegeven: gegevens.Gegevens) -> Optional[data.MaandData]:
+    """De eerste maand waarin nu kopen (inclusief de eenmalige kosten) voordeliger is dan altijd blijven huren."""
+    return eerste_maand(main.stroom(gegeven), lambda maand_data: maand_data.voordeel_nu_kopen_ipv_altijd_huren > 0)
+
+
+def lasten_hoger_dan_huur(gegeven: gegevens.Gegevens) -> Optional[data.MaandData]:
+    """De eerste maand waarin de maandlasten van het huis hoger zijn dan de (gestegen) oude huur."""
+    return eerste_maand(main.stroom(gegeven), lambda maand_data: maand_data.lasten > maand_data.oude_huur)
+
+
+def kritieke_waardedaling(gegeven: gegevens.Gegevens, woz_stijgingen: Sequence[float]) -> Raster:
+    """Per jaarlijkse stijging van de woningwaarde (in procenten) en per maand de daling van de woningwaarde (ook in
+    procenten) waarbij de restschuld hoger is dan de waarde van het huis: de hypotheek staat dan onder water. De waarde
+    van het huis is de koopprijs die jaarlijks met het gegeven percentage stijgt. Een negatieve daling betekent dat de
+    hypotheek ook zonder daling al onder water staat. De restschuld hangt niet af van de stijging, dus de hypotheek
+    wordt maar een keer doorgerekend."""
+    kolommen = vector.bereken_kolommen(gegeven)
+    stijgingen = np.asarray(woz_stijgingen, dtype=np.float64)
+    woning_waarde = vector.exp_stijging(gegeven.kosten_huis, stijgingen[:, np.newaxis], kolommen["jaar"])
+    daling = 100.0 * (1.0 - kolommen["restschuld"] / woning_waarde)
+    return Raster(rij_naam="woz_stijging_jaarlijks_percentage", rij_waarden=stijgingen,
+                  kolom_naam="maand", kolom_waarden=np.arange(daling.shape[-1]), waarden=daling)
+
+
+def omslagpunt_raster(gegeven: gegevens.Gegevens, woz_stijgingen: Sequence[float],
+                      huur_stijgingen: Sequence[float]) -> Raster:
+    """Per combinatie van de jaarlijkse stijging van de WOZ-waarde en van de huur (beide in procenten) de eerste maand
+    (geteld vanaf 0) waarin nu kopen voordeliger is dan altijd huren, zie omslagpunt_kopen. Als dat binnen de looptijd
+    niet gebeurt is de waarde NaN. De WOZ-stijging heeft alleen effect op de kosten van het huis (via het EWF) en de
+    huurstijging alleen op de huur. Daarom wordt er alleen een scenario per WOZ-stijging doorgerekend, waarna de
+    opgetelde huur voor alle huurstijgingen tegelijk erbij opgeteld wordt."""
+    kolommen = vector.bereken_scenarios(
+        vector.scenario_raster(gegeven, woz_stijging_jaarlijks_percentage=woz_stijgingen)
+    )
+    voordeel_zonder_huur = (kolommen["voordeel_nu_kopen_ipv_altijd_huren"] -
+                            np.cumsum(kolommen["oude_huur"], axis=-1))
+    huur_stijging = np.asarray(huur_stijgingen, dtype=np.float64)
+    oude_huur = vector.exp_stijging(gegeven.huur_per_maand, huur_stijging[:, np.newaxis], kolommen["jaar"][0])
+    voordeel = voordeel_zonder_huur[:, np.newaxis, :] + np.cumsum(oude_huur, axis=-1)[np.newaxis, :, :]
+
+    positief = voordeel > 0
+    eerste_maand_positief = np.argmax(positief, axis=-1).astype(np.float64)
+    eerste_maand_positief[~positief.any(axis=-1)] = np.nan
+    return Raster(rij_naam="woz_stijging_jaarlijks_percentage", rij_waarden=np.asarray(woz_stijgingen, np.float64),
+                  kolom_naam="huurstijging_jaarlijks_percentage", kolom_waarden=huur_stijging,
+                  waarden=eerste_maand_positief)
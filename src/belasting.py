@@ -1,32 +1,86 @@
-"""Functies met betrekking tot de belastingdienst: zowel belastingen als teruggaves."""
-from typing import Tuple
+"""Functies met betrekking tot de belastingdienst: zowel belastingen als teruggaves. De percentages per jaar staan in
+het bestand belastingtabellen.json, zodat nieuwe belastingjaren toegevoegd kunnen worden zonder de code aan te
+passen."""
+import functools
+import json
+from pathlib import Path
+from typing import Dict, NamedTuple, Tuple, Union
+
+import numpy as np
 
 import gegevens
 
+# Een enkel getal of een array van getallen, bijvoorbeeld voor meerdere maanden tegelijk
+Waarde = Union[float, np.ndarray]
+
+STANDAARD_TABELLEN_BESTAND = Path(__file__).parent / "belastingtabellen.json"
+
+
+class BelastingTabellen(NamedTuple):
+    """De belastingregels per kalenderjaar, met voor jaren na de laatste in de tabel een vaste waarde."""
+    maximum_aftrek: Dict[int, float]
+    maximum_aftrek_daarna: float
+    ewf_percentage: Dict[int, float]
+    ewf_percentage_daarna: float
+    hillen_beginjaar: int
+    hillen_jaren: int
+
+    def __hash__(self) -> int:
+        """De tabellen zijn hashbaar (ondanks de dictionaries), zodat ze deel zijn van de sleutel van regime."""
+        return hash((tuple(sorted(self.maximum_aftrek.items())), self.maximum_aftrek_daarna,
+                     tuple(sorted(self.ewf_percentage.items())), self.ewf_percentage_daarna, self.hillen_beginjaar,
+                     self.hillen_jaren))
+
+
+def laad_tabellen(bestand: Path) -> BelastingTabellen:
+    """Leest de belastingregels in uit een JSON bestand, zie belastingtabellen.json voor een voorbeeld."""
+    with bestand.open() as file:
+        inhoud = json.load(file)
+    return BelastingTabellen(
+        maximum_aftrek={int(jaar): percentage for jaar, percentage in inhoud["maximum_aftrek"].items()},
+        maximum_aftrek_daarna=inhoud["maximum_aftrek_daarna"],
+        ewf_percentage={int(jaar): percentage for jaar, percentage in inhoud["ewf_percentage"].items()},
+        ewf_percentage_daarna=inhoud["ewf_percentage_daarna"],
+        hillen_beginjaar=inhoud["hillen_beginjaar"],
+        hillen_jaren=inhoud["hillen_jaren"],
+    )
+
+
+TABELLEN = laad_tabellen(STANDAARD_TABELLEN_BESTAND)
+
+
+def hillen_factor(huidig_jaar: int, tabellen: BelastingTabellen = TABELLEN) -> float:
+    """Het deel van het verschil tussen EWF en HRA dat volgens de wet Hillen in een bepaald jaar betaald moet worden."""
+    if huidig_jaar <= tabellen.hillen_beginjaar:  # wet Hillen nog niet in werking
+        return 0.0
+    if huidig_jaar > tabellen.hillen_beginjaar + tabellen.hillen_jaren:  # EWF is vanaf nu gewoon te betalen
+        return 1.0
+    return (huidig_jaar - tabellen.hillen_beginjaar) * (1 / tabellen.hillen_jaren)
+
 
-def bereken_hra(gegeven: gegevens.Gegevens, maand_rente: float, jaar: int) -> float:
+def bereken_hra(gegeven: gegevens.Gegevens, maand_rente: float, jaar: int,
+                tabellen: BelastingTabellen = TABELLEN) -> float:
     """De hypotheekrenteaftrek (HRA): Aftrek op het inkomen bij betaling van rente. De gebruikte gegevens komen van:
     https://www.eigenhuis.nl/hypotheken/verhuizen-naar-een-volgende-woning/hypotheekrenteaftrek#/"""
-    maximum_aftrek = {2019: 0.49, 2020: 0.46, 2021: 0.43, 2022: 0.40, 2023: 0.371}  # verder blijft dit op 37.1%
     huidig_jaar = gegeven.aankoopjaar + jaar
-    aftrek_percentage = maximum_aftrek.get(huidig_jaar, 0.371)
+    aftrek_percentage = tabellen.maximum_aftrek.get(huidig_jaar, tabellen.maximum_aftrek_daarna)
     aftrek_percentage = min(aftrek_percentage, (gegeven.hoogste_belasting_percentage_inkomen / 100.0))
     aftrek = maand_rente * aftrek_percentage
     return aftrek
 
 
-def bereken_ewf(gegeven: gegevens.Gegevens, woz_waarde: float, jaar: int) -> float:
+def bereken_ewf(gegeven: gegevens.Gegevens, woz_waarde: float, jaar: int,
+                tabellen: BelastingTabellen = TABELLEN) -> float:
     """Het Eigenwoningforfait (EWF): Belasting te betalen als eigenaar van een woning. De gebruikte gegevens komen van:
     https://nl.wikipedia.org/wiki/Eigenwoningforfait"""
-    ewf_percentage = {2019: 0.0065, 2020: 0.0060, 2021: 0.0050, 2022: 0.0050, 2023: 0.0045}  # verder op 0.45%
     huidig_jaar = gegeven.aankoopjaar + jaar
-    ewf = (ewf_percentage.get(huidig_jaar, 0.0045) * woz_waarde) / 12.0
+    ewf = (tabellen.ewf_percentage.get(huidig_jaar, tabellen.ewf_percentage_daarna) * woz_waarde) / 12.0
     ewf_belasting = ewf * (gegeven.hoogste_belasting_percentage_inkomen / 100.0)
     return ewf_belasting
 
 
 def bereken(gegeven: gegevens.Gegevens, hypotheek_rente_aftrek: float, eigenwoningforfait: float,
-            jaar: int) -> Tuple[float, float]:
+            jaar: int, tabellen: BelastingTabellen = TABELLEN) -> Tuple[float, float]:
     """Bereken het totale belastingvoordeel (HRA) en nadeel (EWF). Het voordeel is de HRA minus de EWF als dit niet
     negatief is. Als de EWF hoger is dan de HRA, dan was er vroeger netto geen effect. Echter met de wet Hillen is er
     sinds 2019 in stapjes elk jaar steeds meer EWF te betalen. Zie voor meer informatie:
@@ -38,13 +92,78 @@ def bereken(gegeven: gegevens.Gegevens, hypotheek_rente_aftrek: float, eigenwoni
     if hypotheek_rente_aftrek >= eigenwoningforfait:
         return hypotheek_rente_aftrek - eigenwoningforfait, 0
 
-    # Meer EWF dan HRA en wet Hillen nog niet in werking: geen nadeel, geen voordeel
-    huidig_jaar = gegeven.aankoopjaar + jaar
-    if huidig_jaar <= 2019:
+    # Meer EWF dan HRA: belastingnadeel voor zover de wet Hillen in werking is
+    factor = hillen_factor(gegeven.aankoopjaar + jaar, tabellen)
+    if factor == 0.0:
         return 0, 0
+    return 0, (eigenwoningforfait - hypotheek_rente_aftrek) * factor
+
+
+class BelastingRegime(NamedTuple):
+    """De belastingregels voor een bepaald aankoopjaar en inkomen, vooraf uitgerekend voor elk jaar van de looptijd van
+    de hypotheek. Dit geeft dezelfde uitkomsten als bereken_hra, bereken_ewf en bereken, maar het jaar mag ook een array
+    zijn. De arrays mogen ook een rij per scenario hebben (zie regime_voor), het jaar is dan altijd de laatste as."""
+    hra_percentage: np.ndarray  # het percentage van de rente dat afgetrokken wordt
+    ewf_factor: np.ndarray  # de EWF belasting per maand per euro WOZ-waarde
+    hillen_factor: np.ndarray  # het deel van het verschil tussen EWF en HRA dat betaald moet worden
+
+    def hra(self, maand_rente: Waarde, jaar: Union[int, np.ndarray]) -> Waarde:
+        """De hypotheekrenteaftrek (HRA), zie bereken_hra."""
+        return maand_rente * self.hra_percentage[..., jaar]
+
+    def ewf(self, woz_waarde: Waarde, jaar: Union[int, np.ndarray]) -> Waarde:
+        """Het eigenwoningforfait (EWF), zie bereken_ewf."""
+        return self.ewf_factor[..., jaar] * woz_waarde
+
+    def bereken(self, hypotheek_rente_aftrek: Waarde, eigenwoningforfait: Waarde,
+                jaar: Union[int, np.ndarray]) -> Tuple[Waarde, Waarde]:
+        """Het totale belastingvoordeel en nadeel, zie bereken."""
+        meer_hra_dan_ewf = hypotheek_rente_aftrek >= eigenwoningforfait
+        verschil = hypotheek_rente_aftrek - eigenwoningforfait
+        belasting_voordeel = np.where(meer_hra_dan_ewf, verschil, 0.0)
+        belasting_nadeel = np.where(meer_hra_dan_ewf, 0.0, -verschil * self.hillen_factor[..., jaar])
+        return belasting_voordeel, belasting_nadeel
+
+
+def maak_regime(aankoopjaar: int, hoogste_belasting_percentage_inkomen: float, aantal_jaren: int,
+                tabellen: BelastingTabellen = TABELLEN) -> BelastingRegime:
+    """Rekent de belastingregels uit voor elk jaar van de looptijd vanaf het aankoopjaar. De arrays zijn alleen-lezen,
+    omdat hetzelfde regime door regime aan alle aanroepers gegeven wordt."""
+    belasting_percentage = hoogste_belasting_percentage_inkomen / 100.0
+    huidige_jaren = range(aankoopjaar, aankoopjaar + aantal_jaren)
+    nieuw_regime = BelastingRegime(
+        hra_percentage=np.array([min(tabellen.maximum_aftrek.get(jaar, tabellen.maximum_aftrek_daarna),
+                                     belasting_percentage) for jaar in huidige_jaren]),
+        ewf_factor=np.array([tabellen.ewf_percentage.get(jaar, tabellen.ewf_percentage_daarna) / 12.0 *
+                             belasting_percentage for jaar in huidige_jaren]),
+        hillen_factor=np.array([hillen_factor(jaar, tabellen) for jaar in huidige_jaren]),
+    )
+    for tabel in nieuw_regime:
+        tabel.setflags(write=False)
+    return nieuw_regime
+
+
+@functools.lru_cache(maxsize=1024)
+def regime(aankoopjaar: int, hoogste_belasting_percentage_inkomen: float, aantal_jaren: int,
+           tabellen: BelastingTabellen = TABELLEN) -> BelastingRegime:
+    """Het regime met de standaard (of de opgegeven) belastingtabellen. Deze worden bewaard, met de tabellen als deel
+    van de sleutel, zodat elk regime maar een keer uitgerekend hoeft te worden, ook bij het doorrekenen van veel
+    scenario's met meerdere sets tabellen."""
+    return maak_regime(aankoopjaar, hoogste_belasting_percentage_inkomen, aantal_jaren, tabellen)
+
+
+def regime_voor(gegeven: gegevens.Gegevens, tabellen: BelastingTabellen = TABELLEN) -> BelastingRegime:
+    """Het regime dat hoort bij de gegevens en de belastingtabellen. Voor gestapelde gegevens (zie
+    vector.stapel_gegevens) wordt het regime eenmalig per unieke combinatie van aankoopjaar en belastingpercentage
+    uitgerekend, en heeft het resultaat een rij per scenario."""
+    if np.ndim(gegeven.aankoopjaar) == 0 and np.ndim(gegeven.hoogste_belasting_percentage_inkomen) == 0:
+        return regime(int(gegeven.aankoopjaar), float(gegeven.hoogste_belasting_percentage_inkomen),
+                      gegeven.looptijd_hypotheek_jaren, tabellen)
 
-    # Meer EWF dan HRA en wet Hillen in werken: belastingnadeel
-    if huidig_jaar > 2049:  # EWF is vanaf nu gewoon te betalen
-        return 0, eigenwoningforfait - hypotheek_rente_aftrek
-    jaar_sinds_2019 = huidig_jaar - 2019
-    return 0, (eigenwoningforfait - hypotheek_rente_aftrek) * (jaar_sinds_2019 * (1 / 30))
+    aankoopjaren, percentages = np.broadcast_arrays(gegeven.aankoopjaar, gegeven.hoogste_belasting_percentage_inkomen)
+    uniek: Dict[Tuple[int, float], int] = {}
+    index = np.array([uniek.setdefault(sleutel, len(uniek))
+                      for sleutel in zip(aankoopjaren.ravel().tolist(), percentages.ravel().tolist())])
+    regimes = [regime(int(aankoopjaar), float(percentage), gegeven.looptijd_hypotheek_jaren, tabellen)
+               for aankoopjaar, percentage in uniek]
+    return BelastingRegime(*(np.stack(tabel)[index] for tabel in zip(*regimes)))
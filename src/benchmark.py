@@ -0,0 +1,176 @@
+"""Benchmarks om de snelheid en het geheugengebruik van de belangrijkste stappen te meten: de berekening van een enkel
+scenario en een batch van scenario's, het wegschrijven als CSV, het plotten, het importeren van het programma in een
+nieuw proces en het piekgeheugen. Alle benchmarks gebruiken vaste scenario's afgeleid van de standaard gegevens. De
+resultaten kunnen als basislijn in een JSON bestand bewaard worden, een volgende keer wordt dan een foutcode gegeven als
+een benchmark meer dan een bepaald percentage slechter is geworden. Gebruik: python -m src.benchmark --help"""
+import argparse
+import contextlib
+import io as tekst_io
+import json
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import timeit
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+import gegevens
+from src import io
+from src import main
+from src import vector
+
+# De map waarin het programma staat, om de import in een nieuw proces te meten
+PROGRAMMA_MAP = Path(__file__).parent.parent
+
+STANDAARD_BASISLIJN = Path("benchmark_basislijn.json")
+
+
+class Benchmark(NamedTuple):
+    """Een benchmark met een functie die de meting doet en de eenheid van het resultaat. Voor alle eenheden geldt: hoe
+    lager, hoe beter."""
+    naam: str
+    meet: Callable[[], float]
+    eenheid: str
+
+
+class Regressie(NamedTuple):
+    """Een benchmark die slechter is geworden ten opzichte van de basislijn."""
+    naam: str
+    basislijn: float
+    resultaat: float
+    verschil_percentage: float
+
+
+def batch_scenarios() -> List[gegevens.Gegevens]:
+    """De vaste batch van 60 scenario's rond de standaard gegevens."""
+    return vector.scenario_raster(gegevens.Gegevens(), kosten_huis=[300_000, 350_000, 400_000, 450_000, 500_000],
+                                  hypotheek_rente_percentage=[1.0, 2.0, 3.0, 4.0],
+                                  hypotheek_vorm=list(gegevens.HypotheekVorm))
+
+
+def meet_tijd(functie: Callable[[], object], herhalingen: int = 7) -> float:
+    """De snelste tijd in seconden van een aanroep, zoals timeit: de functie wordt zo vaak achter elkaar aangeroepen
+    dat een meting minstens 0.2 seconde duurt, en van een aantal herhalingen daarvan telt de snelste."""
+    timer = timeit.Timer(functie)
+    aantal, _ = timer.autorange()
+    return min(timer.repeat(repeat=herhalingen, number=aantal)) / aantal
+
+
+def meet_piekgeheugen(functie: Callable[[], object]) -> float:
+    """Het hoogste geheugengebruik in bytes tijdens een aanroep, gemeten met tracemalloc."""
+    tracemalloc.start()
+    try:
+        functie()
+        return float(tracemalloc.get_traced_memory()[1])
+    finally:
+        tracemalloc.stop()
+
+
+def _bereken_gegevens() -> None:
+    """De berekening van de standaard gegevens met het overzicht, dat hier niet op het scherm komt."""
+    with contextlib.redirect_stdout(tekst_io.StringIO()):
+        main.bereken_gegevens(gegevens.Gegevens())
+
+
+def _import_koud() -> float:
+    """De snelste tijd om het programma in een nieuw proces te importeren, inclusief het starten van Python."""
+    tijden = []
+    for _ in range(5):
+        begin = time.perf_counter()
+        subprocess.run([sys.executable, "-c", "import src.main"], cwd=PROGRAMMA_MAP, check=True)
+        tijden.append(time.perf_counter() - begin)
+    return min(tijden)
+
+
+def standaard_benchmarks(map_naam: Path) -> List[Benchmark]:
+    """Alle benchmarks, met bestanden in de gegeven (tijdelijke) map."""
+    from src import plot  # pylint: disable=import-outside-toplevel
+    _, alle_data = main.bereken(gegevens.Gegevens())
+    scenarios = batch_scenarios()
+    return [
+        Benchmark("bereken_gegevens", lambda: meet_tijd(_bereken_gegevens), "s"),
+        Benchmark("bereken_batch", lambda: meet_tijd(lambda: vector.bereken_scenarios(scenarios)), "s"),
+        Benchmark("schrijf_naar_csv", lambda: meet_tijd(lambda: io.schrijf_naar_csv(alle_data, map_naam / "hkp.csv")),
+                  "s"),
+        Benchmark("plot", lambda: meet_tijd(lambda: plot.plot(alle_data, map_naam / "hkp.png", plot_jaren=30),
+                                            herhalingen=3), "s"),
+        Benchmark("import_koud", _import_koud, "s"),
+        Benchmark("piekgeheugen_bereken_gegevens", lambda: meet_piekgeheugen(_bereken_gegevens), "bytes"),
+        Benchmark("piekgeheugen_bereken_batch",
+                  lambda: meet_piekgeheugen(lambda: vector.bereken_scenarios(scenarios)), "bytes"),
+    ]
+
+
+def draai(benchmarks: Sequence[Benchmark]) -> Dict[str, float]:
+    """Draait de benchmarks een voor een, het resultaat is per benchmark de gemeten waarde."""
+    return {benchmark.naam: benchmark.meet() for benchmark in benchmarks}
+
+
+def bewaar_basislijn(resultaten: Dict[str, float], file_name: Path) -> None:
+    """Bewaart de resultaten als basislijn, samen met de versies van Python en NumPy waarmee gemeten is."""
+    with file_name.open("w") as file:
+        json.dump({"python": platform.python_version(), "numpy": np.__version__, "resultaten": resultaten}, file,
+                  indent=2, sort_keys=True)
+
+
+def lees_basislijn(file_name: Path) -> Dict[str, float]:
+    """Leest de resultaten van een eerder bewaarde basislijn."""
+    with file_name.open() as file:
+        return json.load(file)["resultaten"]
+
+
+def regressies(resultaten: Dict[str, float], basislijn: Dict[str, float],
+               drempel_percentage: float) -> List[Regressie]:
+    """Alle benchmarks die meer dan het drempelpercentage hoger (dus slechter) uitkomen dan de basislijn. Benchmarks die
+    niet in de basislijn staan worden overgeslagen."""
+    gevonden = []
+    for naam, resultaat in resultaten.items():
+        if naam not in basislijn or basislijn[naam] <= 0.0:
+            continue
+        verschil_percentage = (resultaat / basislijn[naam] - 1.0) * 100.0
+        if verschil_percentage > drempel_percentage:
+            gevonden.append(Regressie(naam, basislijn[naam], resultaat, verschil_percentage))
+    return gevonden
+
+
+def main_benchmark(argumenten: Optional[Sequence[str]] = None) -> int:
+    """Draait de benchmarks, en bewaart de resultaten als basislijn of vergelijkt ze met de basislijn. Het resultaat is
+    de foutcode voor de commandoregel: 1 als er een regressie is, anders 0."""
+    parser = argparse.ArgumentParser(description="Benchmarks van HuisKoopPlot")
+    parser.add_argument("--basislijn", type=Path, default=STANDAARD_BASISLIJN, help="JSON bestand met de basislijn")
+    parser.add_argument("--bewaar", action="store_true", help="bewaar de resultaten als nieuwe basislijn")
+    parser.add_argument("--drempel", type=float, default=20.0,
+                        help="maximaal percentage dat een benchmark slechter mag zijn dan de basislijn")
+    parser.add_argument("--alleen", action="append", help="draai alleen deze benchmark (mag vaker opgegeven worden)")
+    opties = parser.parse_args(argumenten)
+
+    with tempfile.TemporaryDirectory() as map_naam:
+        benchmarks = [benchmark for benchmark in standaard_benchmarks(Path(map_naam))
+                      if opties.alleen is None or benchmark.naam in opties.alleen]
+        resultaten = draai(benchmarks)
+    eenheden = {benchmark.naam: benchmark.eenheid for benchmark in benchmarks}
+    for naam, resultaat in resultaten.items():
+        print(f"{naam:32s} {resultaat:14.6g} {eenheden[naam]}")
+
+    if opties.bewaar:  # met --alleen blijven de andere benchmarks van de oude basislijn staan
+        oud = lees_basislijn(opties.basislijn) if opties.alleen and opties.basislijn.exists() else {}
+        bewaar_basislijn({**oud, **resultaten}, opties.basislijn)
+        print(f"Basislijn bewaard in {opties.basislijn}")
+        return 0
+    if not opties.basislijn.exists():
+        print(f"Geen basislijn gevonden in {opties.basislijn}, bewaar er eerst een met --bewaar")
+        return 0
+    gevonden = regressies(resultaten, lees_basislijn(opties.basislijn), opties.drempel)
+    for regressie in gevonden:
+        print(f"REGRESSIE {regressie.naam}: {regressie.resultaat:.6g} in plaats van {regressie.basislijn:.6g} "
+              f"(+{regressie.verschil_percentage:.1f}%, drempel {opties.drempel:.1f}%)")
+    return 1 if gevonden else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main_benchmark())
@@ -0,0 +1,154 @@
+"""Een cache voor de resultaten van de berekening. Omdat gegevens.Gegevens onveranderlijk is geeft dezelfde invoer
+altijd hetzelfde resultaat, zolang de formules en de belastingtabellen niet veranderen. Er zijn twee lagen: een LRU
+cache in het geheugen en optioneel een map op de schijf, zodat ook een volgende keer dat het programma draait de
+resultaten niet opnieuw berekend hoeven te worden."""
+import collections
+import contextlib
+import hashlib
+import json
+import numbers
+import os
+import threading
+import zipfile
+from enum import Enum
+from pathlib import Path
+from typing import Any, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+import gegevens
+from src import belasting
+from src import data
+from src import main
+
+# Dit versienummer moet opgehoogd worden als de berekening verandert, zodat oude resultaten niet meer gebruikt worden
+MODEL_VERSIE = 2
+
+Resultaat = Tuple[data.Samenvatting, data.MaandKolommen]
+
+
+class CacheStatistiek(NamedTuple):
+    """Hoe vaak een resultaat uit het geheugen of van de schijf kwam, en hoe vaak het berekend moest worden."""
+    treffers_geheugen: int
+    treffers_schijf: int
+    missers: int
+
+
+def sleutel(gegeven: gegevens.Gegevens, tabellen: belasting.BelastingTabellen = belasting.TABELLEN) -> str:
+    """Een stabiele hash van alle gegevens, de modelversie en de belastingtabellen. Anders dan de ingebouwde hash is
+    deze bij elke keer dat het programma draait hetzelfde, zodat deze ook als bestandsnaam gebruikt kan worden. Gelijke
+    gegevens geven dezelfde sleutel, ook als een getal als int, float of NumPy getal opgegeven is."""
+    velden = {naam: _normaliseer(waarde) for naam, waarde in gegeven._asdict().items()}
+    inhoud = json.dumps({"model_versie": MODEL_VERSIE, "gegevens": velden, "tabellen": tabellen._asdict()},
+                        sort_keys=True)
+    return hashlib.sha256(inhoud.encode("utf-8")).hexdigest()
+
+
+def _normaliseer(waarde: Any) -> Any:
+    """Zet een waarde om naar een vaste vorm voor de sleutel: een Enum (bijvoorbeeld de hypotheekvorm, ook binnen een
+    leningdeel) naar de naam, elk getal behalve een bool naar een float, en een tuple (zoals de leningdelen) naar een
+    lijst met genormaliseerde waarden."""
+    if isinstance(waarde, np.generic):
+        waarde = waarde.item()
+    if isinstance(waarde, Enum):
+        return waarde.name
+    if waarde is None or isinstance(waarde, (bool, str)):
+        return waarde
+    if isinstance(waarde, numbers.Real):
+        return float(waarde)
+    if isinstance(waarde, (tuple, list)):
+        return [_normaliseer(deel) for deel in waarde]
+    raise TypeError(f"Waarde '{waarde}' kan niet in een sleutel gebruikt worden")
+
+
+class ResultaatCache:
+    """Berekent de resultaten zoals main.bereken, maar bewaart de laatste 'max_grootte' resultaten in het geheugen. Als
+    er een map opgegeven is worden alle resultaten daar ook als binair NumPy bestand (.npz) opgeslagen. De cache kan
+    door meerdere threads tegelijk gebruikt worden: het geheugen en de tellers zitten achter een slot, de berekening en
+    het lezen en schrijven van de schijf niet."""
+
+    def __init__(self, max_grootte: int = 128, map_naam: Optional[Path] = None) -> None:
+        if max_grootte < 1:
+            raise RuntimeError("De cache moet minstens een resultaat kunnen bevatten")
+        self.max_grootte = max_grootte
+        self.map_naam = map_naam
+        if map_naam is not None:
+            map_naam.mkdir(parents=True, exist_ok=True)
+        self._geheugen: "collections.OrderedDict[str, Resultaat]" = collections.OrderedDict()
+        self._treffers_geheugen = 0
+        self._treffers_schijf = 0
+        self._missers = 0
+        self._slot = threading.Lock()
+
+    def bereken(self, gegeven: gegevens.Gegevens) -> Resultaat:
+        """Het resultaat van main.bereken, uit de cache als dat kan. De data per maand kan niet aangepast worden, dus
+        hetzelfde resultaat kan veilig aan meerdere aanroepers gegeven worden."""
+        cache_sleutel = sleutel(gegeven)
+        with self._slot:
+            resultaat = self._geheugen.get(cache_sleutel)
+            if resultaat is not None:
+                self._treffers_geheugen += 1
+                self._geheugen.move_to_end(cache_sleutel)
+                return resultaat
+
+        resultaat = self._lees(cache_sleutel)
+        van_schijf = resultaat is not None
+        if resultaat is None:
+            resultaat = main.bereken(gegeven)
+            self._schrijf(cache_sleutel, resultaat)
+
+        with self._slot:
+            if van_schijf:
+                self._treffers_schijf += 1
+            else:
+                self._missers += 1
+            self._geheugen[cache_sleutel] = resultaat
+            self._geheugen.move_to_end(cache_sleutel)
+            if len(self._geheugen) > self.max_grootte:
+                self._geheugen.popitem(last=False)
+        return resultaat
+
+    def statistiek(self) -> CacheStatistiek:
+        """Het aantal treffers en missers tot nu toe."""
+        with self._slot:
+            return CacheStatistiek(treffers_geheugen=self._treffers_geheugen, treffers_schijf=self._treffers_schijf,
+                                   missers=self._missers)
+
+    def leeg(self) -> None:
+        """Maakt de cache in het geheugen leeg, de bestanden op de schijf blijven bestaan."""
+        with self._slot:
+            self._geheugen.clear()
+
+    def _bestand(self, cache_sleutel: str) -> Optional[Path]:
+        """Het bestand op de schijf voor een sleutel, als er een map is."""
+        if self.map_naam is None:
+            return None
+        return self.map_naam / f"{cache_sleutel}.npz"
+
+    def _lees(self, cache_sleutel: str) -> Optional[Resultaat]:
+        """Leest een resultaat van de schijf, als het daar staat. Een bestand dat niet gelezen kan worden (bijvoorbeeld
+        afgebroken of van een oude versie) telt als een misser en wordt verwijderd, zodat het opnieuw berekend wordt."""
+        bestand = self._bestand(cache_sleutel)
+        if bestand is None or not bestand.exists():
+            return None
+        try:
+            with np.load(bestand) as inhoud:
+                samenvatting: List[float] = np.ndarray.tolist(inhoud["samenvatting"])
+                alle_data = data.MaandKolommen({naam: inhoud[naam] for naam in data.MaandData._fields})
+            return data.Samenvatting._make(samenvatting), alle_data
+        except (OSError, ValueError, KeyError, TypeError, EOFError, zipfile.BadZipFile):
+            with contextlib.suppress(OSError):
+                bestand.unlink()
+            return None
+
+    def _schrijf(self, cache_sleutel: str, resultaat: Resultaat) -> None:
+        """Schrijft een resultaat naar de schijf. Dit gaat via een tijdelijk bestand per proces en thread, zodat een
+        ander proces of thread nooit een half geschreven bestand leest."""
+        bestand = self._bestand(cache_sleutel)
+        if bestand is None:
+            return
+        samenvatting, alle_data = resultaat
+        tijdelijk = bestand.with_name(f"{cache_sleutel}.{os.getpid()}.{threading.get_ident()}.tmp.npz")
+        np.savez(tijdelijk, samenvatting=np.array(samenvatting, dtype=np.float64),
+                 **alle_data.kolommen)  # type: ignore[arg-type]
+        os.replace(tijdelijk, bestand)
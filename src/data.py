@@ -1,5 +1,35 @@
 """In deze module worden de data-structuren gedefinieerd."""
-from typing import NamedTuple
+import itertools
+from typing import Dict, Iterable, Iterator, Mapping, NamedTuple, Sequence, Union, overload
+
+import numpy as np
+
+
+class AankoopKosten(NamedTuple):
+    """Hierin zitten de eenmalige kosten bij aankoop en de daaruit volgende hoogte van de hypotheek"""
+    kosten_belasting: float
+    kosten_niet_aftrekbaar: float
+    kosten_aftrekbaar: float
+    bel_voordeel_koop: float
+    kosten_bruto: float
+    kosten_netto: float
+    hypotheek_schuld: float
+
+
+class Samenvatting(NamedTuple):
+    """De belangrijkste getallen van een berekening: de kosten bij aankoop en de totalen na de looptijd"""
+    kosten_belasting: float
+    kosten_niet_aftrekbaar: float
+    kosten_aftrekbaar: float
+    bel_voordeel_koop: float
+    kosten_bruto: float
+    kosten_netto: float
+    hypotheek_schuld: float
+    restschuld: float  # na de looptijd van de hypotheek
+    betaalde_rente_bruto: float
+    totaal_belasting_voordeel: float
+    betaalde_rente_netto: float
+    betaalde_ewf_belasting: float
 
 
 class MaandData(NamedTuple):
@@ -24,6 +54,89 @@ class MaandData(NamedTuple):
     gespaard_geld: float
 
 
+class MaandKolommen:
+    """Alle berekende waarden per maand, opgeslagen als een NumPy array per veld van MaandData in plaats van een
+    MaandData per maand. Met een getal als index is het resultaat de MaandData van die maand, met de naam van een veld
+    de hele kolom, en met een slice een MaandKolommen met alleen die maanden. Net als een NamedTuple kunnen de waarden
+    niet aangepast worden: de kolommen zijn alleen-lezen."""
+
+    def __init__(self, kolommen: Mapping[str, np.ndarray]) -> None:
+        self.kolommen: Dict[str, np.ndarray] = {}
+        for naam in MaandData._fields:
+            kolom = np.asarray(kolommen[naam]).view()
+            kolom.setflags(write=False)
+            self.kolommen[naam] = kolom
+        if len({kolom.shape for kolom in self.kolommen.values()}) != 1 or self.kolommen["jaar"].ndim != 1:
+            raise RuntimeError("Alle kolommen moeten een even lange rij van maanden zijn")
+
+    @classmethod
+    def van_maanden(cls, alle_data: Iterable[MaandData]) -> "MaandKolommen":
+        """Zet een lijst of stroom van data per maand (zie main.stroom) om naar kolommen. Dit gaat per blok van een
+        jaar, zodat een stroom nooit als lijst van MaandData in het geheugen staat."""
+        maanden = iter(alle_data)
+        blokken = [np.empty((0, len(MaandData._fields)))]
+        while True:
+            blok = list(itertools.islice(maanden, 12))
+            if not blok:
+                break
+            blokken.append(np.array(blok, dtype=np.float64))
+        tabel = np.concatenate(blokken)
+        kolommen = {naam: tabel[:, index] for index, naam in enumerate(MaandData._fields)}
+        kolommen["jaar"] = kolommen["jaar"].astype(np.int64)
+        kolommen["maand"] = kolommen["maand"].astype(np.int64)
+        return cls(kolommen)
+
+    @classmethod
+    def aaneen(cls, delen: Sequence["MaandKolommen"]) -> "MaandKolommen":
+        """Plakt de maanden van meerdere delen achter elkaar."""
+        return cls({naam: np.concatenate([deel.kolommen[naam] for deel in delen]) for naam in MaandData._fields})
+
+    def som(self, naam: str) -> float:
+        """De som van een kolom over alle maanden."""
+        return float(np.sum(self.kolommen[naam]))
+
+    def __len__(self) -> int:
+        return len(self.kolommen["jaar"])
+
+    @overload
+    def __getitem__(self, index: int) -> MaandData:
+        ...
+
+    @overload
+    def __getitem__(self, index: str) -> np.ndarray:
+        ...
+
+    @overload
+    def __getitem__(self, index: slice) -> "MaandKolommen":
+        ...
+
+    def __getitem__(self, index: Union[int, str, slice]) -> Union[MaandData, np.ndarray, "MaandKolommen"]:
+        if isinstance(index, str):
+            return self.kolommen[index]
+        if isinstance(index, slice):
+            return MaandKolommen({naam: kolom[index] for naam, kolom in self.kolommen.items()})
+        return MaandData._make(kolom[index].item() for kolom in self.kolommen.values())
+
+    def __iter__(self) -> Iterator[MaandData]:
+        return map(MaandData._make, zip(*(kolom.tolist() for kolom in self.kolommen.values())))
+
+    def __eq__(self, ander: object) -> bool:
+        if not isinstance(ander, MaandKolommen):
+            return NotImplemented
+        return all(np.array_equal(kolom, ander.kolommen[naam]) for naam, kolom in self.kolommen.items())
+
+    def __repr__(self) -> str:
+        return f"MaandKolommen({len(self)} maanden)"
+
+
+class Toestand(NamedTuple):
+    """De toestand van de berekening aan het begin van een jaar, van waaruit de rest berekend kan worden"""
+    jaar: int
+    rest_schuld: float
+    voordeel_kopen_ipv_huren: float
+    gespaard_geld: float
+
+
 MAANDELIJKSE_WAARDEN = ("aflossing", "rente", "hypotheek_rente_aftrek", "hoogte_eigenwoningforfait",
                         "belasting_voordeel", "rente_netto", "belasting_nadeel",
                         "onderhoudskosten", "extra_spaarinleg_per_maand", "lasten", "oude_huur")
@@ -31,3 +144,5 @@ MAANDELIJKSE_PLOT1 = ("aflossing", "rente_netto", "belasting_nadeel", "onderhoud
 MAANDELIJKSE_PLOT2 = ("oude_huur",)
 TOTALE_WAARDEN = ("restschuld", "voordeel_nu_kopen_ipv_altijd_huren", "voordeel_nu_kopen_ipv_voorlopig_huren",
                   "woz_waarde", "gespaard_geld")
+# Alle velden die in de grafieken gebruikt worden (zie plot.py)
+PLOT_WAARDEN = MAANDELIJKSE_PLOT1 + MAANDELIJKSE_PLOT2 + TOTALE_WAARDEN
@@ -0,0 +1,325 @@
+"""Een lokale rekendienst: in plaats van het programma voor elke berekening opnieuw te starten (met het opstarten van
+Python, het inladen van matplotlib en het overzicht op het scherm) blijft een proces draaien dat berekeningen over HTTP
+aanneemt, via TCP of een Unix socket. Een verzoek is een POST met als inhoud een JSON object met de gegevens die
+afwijken van de standaard waarden (zoals een regel van een scenario bestand, zie scenarios.maak_scenario). Verzoeken
+die binnen een kort venster binnenkomen worden verzameld en samen in een keer berekend (zie vector.stapel_gegevens).
+De grafieken worden in een pool van processen getekend, zodat de dienst ondertussen andere verzoeken kan aannemen.
+
+  POST /samenvatting  de samenvatting (zie data.Samenvatting) als JSON object
+  POST /maanden       de data per maand als JSON object met een lijst per veld van data.MaandData
+  POST /plot          de grafiek als PNG
+  GET  /status        het aantal verzoeken en het aantal berekeningen waarin die samengenomen zijn
+
+Gebruik: python -m src.dienst --help"""
+import argparse
+import asyncio
+import concurrent.futures
+import json
+import multiprocessing
+from http import HTTPStatus
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Set, Tuple, Union
+
+import numpy as np
+
+import gegevens
+from src import data
+from src import hypotheek
+from src import main
+from src import scenarios
+from src import vector
+
+# De grootste inhoud van een verzoek in bytes, een JSON object met gegevens is veel kleiner
+MAX_INHOUD = 1 << 20
+
+# Een antwoord: de HTTP status, het type van de inhoud en de inhoud zelf
+Antwoord = Tuple[int, str, bytes]
+
+Resultaat = Tuple[data.Samenvatting, data.MaandKolommen]
+# Het resultaat van een scenario uit een batch, of de fout bij het berekenen van dat scenario
+Uitkomst = Union[Resultaat, Exception]
+
+
+class Verzoek(NamedTuple):
+    """Een scenario dat wacht op de volgende berekening, met de future waarin het resultaat komt."""
+    gegeven: gegevens.Gegevens
+    resultaat: "asyncio.Future[Resultaat]"
+
+
+def bereken_batch(alle_gegevens: Sequence[gegevens.Gegevens]) -> List[Uitkomst]:
+    """Berekent de samenvatting en de data per maand van een reeks scenario's. Scenario's met dezelfde looptijd worden
+    gestapeld en in een keer berekend, bij leningdelen per aantal leningdelen (zoals scenarios.bereken_samenvattingen).
+    Het resultaat is gelijk aan dat van main.bereken voor elk scenario, of de fout bij het berekenen van dat scenario:
+    een fout in een scenario laat de andere scenario's uit de batch niet mislukken."""
+    groepen: Dict[Tuple[int, int], List[int]] = {}
+    for index, gegeven in enumerate(alle_gegevens):
+        sleutel = (gegeven.looptijd_hypotheek_jaren, len(gegeven.leningdelen))
+        groepen.setdefault(sleutel, []).append(index)
+
+    uitkomsten: Dict[int, Uitkomst] = {}
+    for indices in groepen.values():
+        uitkomsten.update(zip(indices, _bereken_groep(alle_gegevens, indices)))
+    return [uitkomsten[index] for index in range(len(alle_gegevens))]
+
+
+def _bereken_groep(alle_gegevens: Sequence[gegevens.Gegevens], indices: List[int]) -> List[Uitkomst]:
+    """Berekent de scenario's met deze indices gestapeld. Als dat mislukt wordt elk scenario los berekend, zodat alleen
+    het scenario dat de fout geeft die fout als uitkomst krijgt."""
+    try:
+        if len(indices) == 1:
+            per_scenario = [vector.bereken_kolommen(alle_gegevens[indices[0]])]
+        else:
+            kolommen = vector.bereken_kolommen(vector.stapel_gegevens([alle_gegevens[index] for index in indices]))
+            per_scenario = [{naam: kolom[rij] for naam, kolom in kolommen.items()} for rij in range(len(indices))]
+        resultaten: List[Uitkomst] = []
+        for index, scenario_kolommen in zip(indices, per_scenario):
+            alle_data = data.MaandKolommen(scenario_kolommen)
+            aankoop = hypotheek.bereken_aankoop(alle_gegevens[index])
+            resultaten.append((main.maak_samenvatting(aankoop, alle_data), alle_data))
+        return resultaten
+    except Exception as fout:  # pylint: disable=broad-except
+        if len(indices) == 1:
+            return [fout]
+        return [uitkomst for index in indices for uitkomst in _bereken_groep(alle_gegevens, [index])]
+
+
+def _teken_png(kolommen: Dict[str, np.ndarray], plot_jaren: int) -> bytes:
+    """Tekent de grafiek in een proces van de pool (zie plot.teken_png). Matplotlib wordt alleen in die processen
+    ingeladen, niet in het proces van de dienst zelf."""
+    from src import plot  # pylint: disable=import-outside-toplevel
+    return plot.teken_png(kolommen, plot_jaren)
+
+
+class Verzamelaar:
+    """Verzamelt de scenario's van verzoeken die tegelijk binnenkomen. Het eerste scenario start een venster van een
+    paar milliseconden, daarna (of zodra er max_batch scenario's wachten) worden alle wachtende scenario's samen
+    berekend in een thread, zodat de dienst ondertussen verzoeken blijft aannemen."""
+    # pylint: disable=too-few-public-methods
+
+    def __init__(self, venster: float = 0.005, max_batch: int = 1000) -> None:
+        if venster < 0.0 or max_batch < 1:
+            raise RuntimeError("Het venster mag niet negatief zijn en een batch moet minstens een scenario bevatten")
+        self.venster = venster
+        self.max_batch = max_batch
+        self.aantal_verzoeken = 0
+        self.aantal_batches = 0
+        self._wachtend: List[Verzoek] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        # De batches die nu berekend worden: asyncio houdt alleen zwakke referenties naar taken bij, zonder deze set
+        # kan een taak opgeruimd worden voordat de futures van zijn verzoeken een resultaat hebben
+        self._taken: Set["asyncio.Task[None]"] = set()
+
+    async def bereken(self, gegeven: gegevens.Gegevens) -> Resultaat:
+        """Het resultaat van een scenario (zie bereken_batch), berekend samen met de andere wachtende scenario's."""
+        loop = asyncio.get_running_loop()
+        verzoek = Verzoek(gegeven, loop.create_future())
+        self._wachtend.append(verzoek)
+        self.aantal_verzoeken += 1
+        if len(self._wachtend) >= self.max_batch:
+            self._start_batch()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.venster, self._start_batch)
+        return await verzoek.resultaat
+
+    def _start_batch(self) -> None:
+        """Start de berekening van alle wachtende scenario's."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._wachtend = self._wachtend, []
+        self.aantal_batches += 1
+        taak = asyncio.get_running_loop().create_task(self._verwerk(batch))
+        self._taken.add(taak)
+        taak.add_done_callback(self._taken.discard)
+
+    @staticmethod
+    async def _verwerk(batch: List[Verzoek]) -> None:
+        """Berekent een batch in een thread en zet het resultaat (of de fout) van elk verzoek in zijn future."""
+        loop = asyncio.get_running_loop()
+        uitkomsten: List[Uitkomst]
+        try:
+            uitkomsten = await loop.run_in_executor(None, bereken_batch, [verzoek.gegeven for verzoek in batch])
+        except Exception as fout:  # pylint: disable=broad-except
+            uitkomsten = [fout] * len(batch)
+        for verzoek, uitkomst in zip(batch, uitkomsten):
+            if verzoek.resultaat.done():  # de verbinding kan inmiddels verbroken zijn
+                continue
+            if isinstance(uitkomst, Exception):
+                verzoek.resultaat.set_exception(uitkomst)
+            else:
+                verzoek.resultaat.set_result(uitkomst)
+
+
+def _json(status: int, inhoud: Any) -> Antwoord:
+    """Een antwoord met een JSON object."""
+    return status, "application/json", json.dumps(inhoud).encode()
+
+
+def _fout(status: HTTPStatus, melding: str) -> Antwoord:
+    """Een antwoord met een foutmelding."""
+    return _json(status, {"fout": melding})
+
+
+class Dienst:
+    """De rekendienst met de verzamelaar van scenario's en de pool van processen voor de grafieken. De processen worden
+    gestart met 'spawn' in plaats van 'fork': de dienst heeft al threads lopen (zie Verzamelaar), en een fork daarvan
+    kan blijven hangen op een lock die in een van die threads vastgehouden werd."""
+
+    def __init__(self, verzamelaar: Optional[Verzamelaar] = None, max_workers: Optional[int] = None) -> None:
+        self.verzamelaar = verzamelaar or Verzamelaar()
+        self.tekenaars = concurrent.futures.ProcessPoolExecutor(max_workers=max_workers,
+                                                                mp_context=multiprocessing.get_context("spawn"))
+
+    def sluit(self) -> None:
+        """Stopt de pool van processen."""
+        self.tekenaars.shutdown()
+
+    async def beantwoord(self, methode: str, pad: str, inhoud: bytes) -> Antwoord:
+        """Het antwoord op een verzoek, zie de beschrijving van deze module."""
+        # pylint: disable=too-many-return-statements
+        if pad == "/status":
+            if methode != "GET":
+                return _fout(HTTPStatus.METHOD_NOT_ALLOWED, "Gebruik GET voor /status")
+            return _json(HTTPStatus.OK, {"verzoeken": self.verzamelaar.aantal_verzoeken,
+                                         "batches": self.verzamelaar.aantal_batches})
+        if pad not in ("/samenvatting", "/maanden", "/plot"):
+            return _fout(HTTPStatus.NOT_FOUND, f"Onbekend pad '{pad}'")
+        if methode != "POST":
+            return _fout(HTTPStatus.METHOD_NOT_ALLOWED, f"Gebruik POST voor {pad}")
+        try:
+            velden = json.loads(inhoud or b"{}")
+            if not isinstance(velden, dict):
+                raise RuntimeError("De gegevens moeten een JSON object zijn")
+            gegeven = scenarios.maak_scenario(velden)
+        except (RuntimeError, TypeError, ValueError) as fout:
+            return _fout(HTTPStatus.BAD_REQUEST, str(fout))
+
+        try:
+            return await self._bereken(pad, gegeven)
+        except (RuntimeError, TypeError, ValueError) as fout:  # ongeldige of niet ondersteunde gegevens
+            return _fout(HTTPStatus.BAD_REQUEST, str(fout))
+        except Exception as fout:  # pylint: disable=broad-except
+            return _fout(HTTPStatus.INTERNAL_SERVER_ERROR, f"Fout bij het berekenen: {fout!r}")
+
+    async def _bereken(self, pad: str, gegeven: gegevens.Gegevens) -> Antwoord:
+        """Het antwoord op een geldig verzoek voor /samenvatting, /maanden of /plot."""
+        samenvatting, alle_data = await self.verzamelaar.bereken(gegeven)
+        if pad == "/samenvatting":
+            return _json(HTTPStatus.OK, {naam: float(waarde) for naam, waarde in samenvatting._asdict().items()})
+        if pad == "/maanden":
+            return _json(HTTPStatus.OK, {naam: kolom.tolist() for naam, kolom in alle_data.kolommen.items()})
+        kolommen = {naam: np.array(alle_data[naam]) for naam in data.PLOT_WAARDEN}
+        png = await asyncio.get_running_loop().run_in_executor(self.tekenaars, _teken_png, kolommen,
+                                                               gegeven.looptijd_hypotheek_jaren)
+        return HTTPStatus.OK, "image/png", png
+
+    async def verbinding(self, lezer: asyncio.StreamReader, schrijver: asyncio.StreamWriter) -> None:
+        """Handelt de verzoeken van een verbinding een voor een af, tot de client de verbinding sluit."""
+        try:
+            while True:
+                verzoek = await _lees_verzoek(lezer)
+                if verzoek is None:
+                    break
+                methode, pad, kopregels, inhoud = verzoek
+                status, inhoud_type, antwoord = await self.beantwoord(methode, pad, inhoud)
+                sluiten = kopregels.get("connection", "").lower() == "close"
+                schrijver.write(f"HTTP/1.1 {status} {HTTPStatus(status).phrase}\r\n"
+                                f"Content-Type: {inhoud_type}\r\nContent-Length: {len(antwoord)}\r\n"
+                                f"Connection: {'close' if sluiten else 'keep-alive'}\r\n\r\n".encode() + antwoord)
+                await schrijver.drain()
+                if sluiten:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except (RuntimeError, ValueError) as fout:  # een ongeldig HTTP verzoek, of een te lange regel
+            status, inhoud_type, antwoord = _fout(HTTPStatus.BAD_REQUEST, str(fout))
+            schrijver.write(f"HTTP/1.1 {status} {HTTPStatus(status).phrase}\r\nContent-Type: {inhoud_type}\r\n"
+                            f"Content-Length: {len(antwoord)}\r\nConnection: close\r\n\r\n".encode() + antwoord)
+        finally:
+            schrijver.close()
+
+
+async def _lees_verzoek(lezer: asyncio.StreamReader) -> Optional[Tuple[str, str, Dict[str, str], bytes]]:
+    """Leest een HTTP verzoek: de methode, het pad (zonder query), de kopregels en de inhoud. Het resultaat is None als
+    de client de verbinding gesloten heeft."""
+    startregel = (await lezer.readline()).decode("latin-1").strip()
+    if not startregel:
+        return None
+    delen = startregel.split()
+    if len(delen) != 3 or not delen[2].startswith("HTTP/"):
+        raise RuntimeError(f"Ongeldig HTTP verzoek: '{startregel}'")
+    kopregels = {}
+    while True:
+        regel = (await lezer.readline()).decode("latin-1").strip()
+        if not regel:
+            break
+        naam, _, waarde = regel.partition(":")
+        kopregels[naam.strip().lower()] = waarde.strip()
+    try:
+        lengte = int(kopregels.get("content-length", "0") or "0")
+    except ValueError as fout:
+        raise RuntimeError(f"Ongeldige Content-Length: '{kopregels['content-length']}'") from fout
+    if not 0 <= lengte <= MAX_INHOUD:
+        raise RuntimeError(f"De inhoud van een verzoek mag maximaal {MAX_INHOUD} bytes zijn")
+    inhoud = await lezer.readexactly(lengte)
+    return delen[0].upper(), delen[1].split("?")[0], kopregels, inhoud
+
+
+async def start(dienst: Dienst, host: str = "127.0.0.1", port: int = 8080,
+                socket: Optional[Path] = None) -> asyncio.Server:
+    """Start de dienst op een TCP poort van deze computer, of op een Unix socket als die opgegeven is."""
+    if socket is not None:
+        return await asyncio.start_unix_server(dienst.verbinding, path=str(socket))
+    return await asyncio.start_server(dienst.verbinding, host=host, port=port)
+
+
+async def vraag(pad: str, velden: Optional[Dict[str, Any]] = None, host: str = "127.0.0.1", port: int = 8080,
+                socket: Optional[Path] = None) -> Tuple[int, bytes]:
+    """Een eenvoudige client voor de dienst: stuurt een verzoek (een POST met de gegevens, of een GET zonder) en geeft
+    de HTTP status en de inhoud van het antwoord terug."""
+    if socket is not None:
+        lezer, schrijver = await asyncio.open_unix_connection(str(socket))
+    else:
+        lezer, schrijver = await asyncio.open_connection(host, port)
+    inhoud = b"" if velden is None else json.dumps(velden).encode()
+    schrijver.write(f"{'GET' if velden is None else 'POST'} {pad} HTTP/1.1\r\nHost: {host}\r\n"
+                    f"Content-Type: application/json\r\nContent-Length: {len(inhoud)}\r\n"
+                    f"Connection: close\r\n\r\n".encode() + inhoud)
+    await schrijver.drain()
+    antwoord = await lezer.read()
+    schrijver.close()
+    kop, _, inhoud = antwoord.partition(b"\r\n\r\n")
+    return int(kop.split()[1]), inhoud
+
+
+async def draai(dienst: Dienst, host: str, port: int, socket: Optional[Path]) -> None:
+    """Draait de dienst tot het proces gestopt wordt."""
+    server = await start(dienst, host, port, socket)
+    print(f"HKP dienst luistert op {socket if socket is not None else f'http://{host}:{port}'}")
+    async with server:
+        await server.serve_forever()
+
+
+def main_dienst(argumenten: Optional[Sequence[str]] = None) -> None:
+    """Start de dienst met de opties van de commandoregel."""
+    parser = argparse.ArgumentParser(description="Lokale rekendienst van HuisKoopPlot")
+    parser.add_argument("--host", default="127.0.0.1", help="adres waarop de dienst luistert")
+    parser.add_argument("--port", type=int, default=8080, help="TCP poort waarop de dienst luistert")
+    parser.add_argument("--socket", type=Path, help="luister op deze Unix socket in plaats van een TCP poort")
+    parser.add_argument("--venster", type=float, default=5.0,
+                        help="milliseconden dat verzoeken verzameld worden voordat ze samen berekend worden")
+    parser.add_argument("--max-batch", type=int, default=1000, help="maximaal aantal scenario's per berekening")
+    parser.add_argument("--max-workers", type=int, help="aantal processen voor het tekenen van de grafieken")
+    opties = parser.parse_args(argumenten)
+
+    dienst = Dienst(Verzamelaar(opties.venster / 1000.0, opties.max_batch), opties.max_workers)
+    try:
+        asyncio.run(draai(dienst, opties.host, opties.port, opties.socket))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        dienst.sluit()
+
+
+if __name__ == "__main__":
+    main_dienst()
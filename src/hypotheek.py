@@ -1,8 +1,44 @@
 """Functies met betrekking tot de hypotheek"""
 import math
-from typing import Tuple
+from typing import List, NamedTuple, Sequence, Tuple, Union
+
+import numpy as np
 
 import gegevens
+from src import data
+
+# Een enkel getal of een array van getallen, bijvoorbeeld voor meerdere maanden tegelijk
+Waarde = Union[float, np.ndarray]
+
+
+def bereken_aankoop(gegeven: gegevens.Gegevens, controleer: bool = True) -> data.AankoopKosten:
+    """Berekent de eenmalige kosten bij aanschaf (kosten koper plus meer) en de daaruit volgende hypotheekschuld. Geeft
+    een foutmelding als de eigen inleg niet genoeg is om de kosten koper te dekken, tenzij 'controleer' uit staat."""
+    kosten_belasting = (gegeven.kk_belasting_percentage / 100.0) * gegeven.kosten_huis
+    kosten_niet_aftrekbaar = gegeven.kosten_notaris + gegeven.kosten_makelaar + kosten_belasting + gegeven.kosten_overig
+    kosten_aftrekbaar = (gegeven.kosten_hypotheek + gegeven.kosten_taxatie + gegeven.kosten_bouwkundig_rapport +
+                         gegeven.kosten_overig_aftrekbaar)
+    bel_voordeel_koop = (gegeven.hoogste_belasting_percentage_inkomen / 100.0) * kosten_aftrekbaar
+    kosten_bruto = gegeven.kosten_huis + kosten_niet_aftrekbaar + kosten_aftrekbaar
+    kosten_netto = kosten_bruto - bel_voordeel_koop
+
+    # Check voor valide input, dit werkt ook als de gegevens arrays zijn (zie vector.stapel_gegevens)
+    te_weinig_inleg = np.ravel(gegeven.eigen_inleg < kosten_niet_aftrekbaar)
+    if controleer and te_weinig_inleg.any():
+        index = int(np.argmax(te_weinig_inleg))
+        kosten_koper = float(np.ravel(kosten_niet_aftrekbaar)[index])
+        scenario = f" (scenario {index})" if te_weinig_inleg.size > 1 else ""
+        raise RuntimeError(f"De eigen inleg moet minstens de kosten koper a {kosten_koper:0.2f} euro zijn{scenario}")
+
+    return data.AankoopKosten(
+        kosten_belasting=kosten_belasting,
+        kosten_niet_aftrekbaar=kosten_niet_aftrekbaar,
+        kosten_aftrekbaar=kosten_aftrekbaar,
+        bel_voordeel_koop=bel_voordeel_koop,
+        kosten_bruto=kosten_bruto,
+        kosten_netto=kosten_netto,
+        hypotheek_schuld=kosten_netto - gegeven.eigen_inleg,
+    )
 
 
 def bereken_aflossing_en_rente(gegeven: gegevens.Gegevens, rest_schuld: float, originele_schuld: float,
@@ -44,3 +80,108 @@ def bereken_aflossing_en_rente(gegeven: gegevens.Gegevens, rest_schuld: float, o
         return aflossing, 0, niet_aftrekbare_rente
 
     raise NotImplementedError(f"De hypotheek vorm '{gegeven.hypotheek_vorm}' wordt niet ondersteund")
+
+
+class Stand(NamedTuple):
+    """De stand van de hypotheek na een aantal maanden: de restschuld en de tot dan toe betaalde rente en aflossing."""
+    restschuld: Waarde
+    rente: Waarde
+    aftrekbare_rente: Waarde
+    aflossing: Waarde
+
+
+def _maand_rente(rente_percentage: float) -> float:
+    """Rekent een jaarlijks rentepercentage om naar een rente per maand (als fractie)."""
+    return math.pow(1 + (rente_percentage / 100.0), 1/12.0) - 1
+
+
+def _na_maanden(factor: float, betaling: float, schuld: Waarde, maanden: Waarde) -> Tuple[Waarde, Waarde]:
+    """Lost de recurrente betrekking schuld[k + 1] = factor * schuld[k] - betaling in gesloten vorm op. Het resultaat
+    is een 2-tuple met de schuld na het gegeven aantal maanden en de som van de schuld aan het begin van elke maand
+    (waar de rente over betaald wordt)."""
+    if factor == 1.0:
+        return schuld - betaling * maanden, schuld * maanden - betaling * maanden * (maanden - 1) / 2
+    groei = np.power(factor, maanden)
+    som_groei = (groei - 1) / (factor - 1)  # som van factor^k voor k van 0 tot het aantal maanden
+    return groei * schuld - betaling * som_groei, schuld * som_groei - betaling * (som_groei - maanden) / (factor - 1)
+
+
+def bereken_stand(gegeven: gegevens.Gegevens, originele_schuld: float, maanden: Waarde) -> Stand:
+    """Berekent in gesloten vorm (zonder alle voorgaande maanden door te rekenen) de stand van de hypotheek na het
+    gegeven aantal maanden, met dezelfde uitkomst als het herhaald aanroepen van bereken_aflossing_en_rente. Het aantal
+    maanden mag een getal of een array zijn."""
+    # pylint: disable=too-many-locals
+    aflossingsvrij_deel = gegeven.aflossingsvrij_deel / 100.0 if gegeven.aflossingsvrij_deel > 0.0 else 0.0
+    aflossend_origineel = (1.0 - aflossingsvrij_deel) * originele_schuld
+    looptijd_hypotheek_maanden = gegeven.looptijd_hypotheek_jaren * 12
+
+    # Per periode (tot en na de rentevaste periode) een vaste rente, en daarmee een vaste factor en betaling
+    perioden = []
+    for rente_percentage in (gegeven.hypotheek_rente_percentage, gegeven.rente_percentage_nadien):
+        maand_rente = _maand_rente(rente_percentage)
+        if gegeven.hypotheek_vorm == gegevens.HypotheekVorm.Lineair:
+            factor, betaling = 1.0, (aflossend_origineel / gegeven.looptijd_hypotheek_jaren) / 12.0
+        elif gegeven.hypotheek_vorm == gegevens.HypotheekVorm.Annuiteiten:
+            factor = 1 + (1.0 - aflossingsvrij_deel) * maand_rente
+            betaling = aflossend_origineel * maand_rente / (1 - math.pow(1 + maand_rente, -looptijd_hypotheek_maanden))
+        elif gegeven.hypotheek_vorm == gegevens.HypotheekVorm.Aflossingsvrij:
+            factor, betaling = 1.0, 0.0
+        else:
+            raise NotImplementedError(f"De hypotheek vorm '{gegeven.hypotheek_vorm}' wordt niet ondersteund")
+        perioden.append((maand_rente, factor, betaling))
+
+    # Eerst de maanden in de rentevaste periode, daarna de rest vanaf de schuld aan het eind van die periode
+    maanden = np.asarray(maanden)
+    rente_vast_maanden = gegeven.rente_vast_jaren * 12
+    maanden_per_periode = (np.minimum(maanden, rente_vast_maanden), np.maximum(maanden - rente_vast_maanden, 0))
+    rest_schuld: Waarde = originele_schuld
+    rente: Waarde = 0.0
+    for (maand_rente, factor, betaling), aantal_maanden in zip(perioden, maanden_per_periode):
+        rest_schuld, som_schuld = _na_maanden(factor, betaling, rest_schuld, aantal_maanden)
+        rente = rente + som_schuld * maand_rente
+
+    # Verdeling van de rente over aftrekbaar en niet aftrekbaar, zie bereken_aflossing_en_rente
+    aftrekbare_rente = (1.0 - aflossingsvrij_deel) * rente
+    if gegeven.hypotheek_vorm == gegevens.HypotheekVorm.Aflossingsvrij:
+        rente, aftrekbare_rente = aftrekbare_rente, 0.0 * rente
+
+    stand = Stand(restschuld=rest_schuld, rente=rente, aftrekbare_rente=aftrekbare_rente,
+                  aflossing=originele_schuld - rest_schuld)
+    if maanden.ndim == 0:
+        return Stand(*(float(waarde) for waarde in stand))
+    return stand
+
+
+def restschuld_einde_rentevaste_periode(gegeven: gegevens.Gegevens, originele_schuld: float) -> float:
+    """De restschuld aan het einde van de rentevaste periode, in gesloten vorm berekend."""
+    return float(bereken_stand(gegeven, originele_schuld, gegeven.rente_vast_jaren * 12).restschuld)
+
+
+def leningdeel_bedragen(leningdelen: Sequence[gegevens.Leningdeel], hypotheek_schuld: float) -> List[float]:
+    """De bedragen van alle leningdelen, waarbij een deel zonder bedrag de rest van de hypotheekschuld krijgt. Geeft een
+    foutmelding als de leningdelen samen niet (op een euro na) gelijk zijn aan de hypotheekschuld."""
+    zonder_bedrag = [index for index, deel in enumerate(leningdelen) if deel.bedrag is None]
+    if len(zonder_bedrag) > 1:
+        raise RuntimeError("Er mag maar een leningdeel zonder bedrag zijn")
+    bedragen = [0.0 if deel.bedrag is None else float(deel.bedrag) for deel in leningdelen]
+    if zonder_bedrag:
+        bedragen[zonder_bedrag[0]] = hypotheek_schuld - sum(bedragen)
+    if abs(sum(bedragen) - hypotheek_schuld) > 1.0 or min(bedragen, default=0.0) < 0.0:
+        raise RuntimeError(f"De leningdelen ({sum(bedragen):0.2f} euro) moeten samen gelijk zijn aan de "
+                           f"hypotheekschuld a {hypotheek_schuld:0.2f} euro")
+    return bedragen
+
+
+def leningdeel_bedragen_gestapeld(bedragen: np.ndarray, hypotheek_schuld: np.ndarray) -> np.ndarray:
+    """Als leningdeel_bedragen, maar voor gestapelde gegevens: de bedragen hebben een rij per leningdeel (met NaN voor
+    een deel zonder bedrag) en daarbinnen een waarde per scenario, net als de hypotheekschuld."""
+    zonder_bedrag = np.isnan(bedragen)
+    if np.any(zonder_bedrag.sum(axis=0) > 1):
+        raise RuntimeError("Er mag maar een leningdeel zonder bedrag zijn")
+    vaste_bedragen = np.where(zonder_bedrag, 0.0, bedragen)
+    bedragen = np.where(zonder_bedrag, hypotheek_schuld - vaste_bedragen.sum(axis=0), vaste_bedragen)
+    verschil = np.abs(bedragen.sum(axis=0) - hypotheek_schuld)
+    if np.any(verschil > 1.0) or np.any(bedragen < 0.0):
+        raise RuntimeError(f"De leningdelen moeten voor elk scenario samen gelijk zijn aan de hypotheekschuld, het "
+                           f"grootste verschil is {np.max(verschil):0.2f} euro")
+    return bedragen
@@ -0,0 +1,65 @@
+"""Incrementeel herberekenen: als maar een paar gegevens veranderen (bijvoorbeeld met een schuifje voor de rente na de
+rentevaste periode) blijven de maanden voor het eerste jaar waarop die gegevens effect hebben hetzelfde. De berekening
+houdt daarom aan het begin van elk jaar de toestand bij, en rekent vanaf de laatste nog geldige toestand verder."""
+from typing import Dict, List, Optional, Tuple
+
+import gegevens
+from src import data
+from src import hypotheek
+from src import main
+
+# Het eerste jaar waarin een verandering van deze gegevens effect heeft. Alle stijgingen gaan pas in na het eerste jaar.
+# Voor alle gegevens die hier niet in staan moet vanaf het begin opnieuw gerekend worden.
+EERSTE_JAAR_MET_EFFECT: Dict[str, int] = {
+    "woz_stijging_jaarlijks_percentage": 1,
+    "huurstijging_jaarlijks_percentage": 1,
+    "inflatie_jaarlijks_percentage": 1,
+}
+
+
+def eerste_veranderde_jaar(oud: gegevens.Gegevens, nieuw: gegevens.Gegevens) -> int:
+    """Het eerste jaar waarin de resultaten van de nieuwe gegevens kunnen verschillen van die van de oude gegevens. Als
+    er niets veranderd is, is dit de looptijd van de hypotheek."""
+    eerste_jaar = nieuw.looptijd_hypotheek_jaren
+    for naam, oude_waarde, nieuwe_waarde in zip(gegevens.Gegevens._fields, oud, nieuw):
+        if oude_waarde == nieuwe_waarde:
+            continue
+        if naam == "rente_percentage_nadien":  # pas na de rentevaste periode
+            eerste_jaar = min(eerste_jaar, oud.rente_vast_jaren, nieuw.rente_vast_jaren)
+        else:
+            eerste_jaar = min(eerste_jaar, EERSTE_JAAR_MET_EFFECT.get(naam, 0))
+    return eerste_jaar
+
+
+class IncrementeleBerekening:
+    """Berekent de resultaten zoals main.bereken, maar onthoudt de vorige berekening. Bij een volgende berekening worden
+    de maanden voor het eerste jaar waarop de veranderde gegevens effect hebben hergebruikt, en wordt vanaf de
+    toestand aan het begin van dat jaar verder gerekend."""
+    # pylint: disable=too-few-public-methods
+
+    def __init__(self) -> None:
+        self._gegeven: Optional[gegevens.Gegevens] = None
+        self._alle_data = data.MaandKolommen.van_maanden([])
+        self._toestanden: List[data.Toestand] = []
+        self.laatste_beginjaar = 0  # vanaf welk jaar er de laatste keer gerekend is
+
+    def bereken(self, gegeven: gegevens.Gegevens) -> Tuple[data.Samenvatting, data.MaandKolommen]:
+        """Het resultaat van main.bereken, waar mogelijk vanaf een eerdere toestand berekend. Leningdelen worden altijd
+        in een keer berekend (zie main.bereken)."""
+        if gegeven.leningdelen:
+            self._gegeven = None
+            self.laatste_beginjaar = 0
+            return main.bereken(gegeven)
+        aankoop = hypotheek.bereken_aankoop(gegeven)
+        beginjaar = 0 if self._gegeven is None else eerste_veranderde_jaar(self._gegeven, gegeven)
+
+        if beginjaar < gegeven.looptijd_hypotheek_jaren:
+            toestanden = self._toestanden[:beginjaar]
+            toestand = self._toestanden[beginjaar] if beginjaar > 0 else main.begin_toestand(aankoop)
+            self._alle_data = data.MaandKolommen.aaneen([
+                self._alle_data[:beginjaar * 12], main.bereken_maanden(gegeven, aankoop, toestand, toestanden)
+            ])
+            self._toestanden = toestanden
+        self._gegeven = gegeven
+        self.laatste_beginjaar = beginjaar
+        return main.maak_samenvatting(aankoop, self._alle_data), self._alle_data
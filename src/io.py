@@ -1,21 +1,121 @@
 """In deze module bevinden zich functies die data inlezen of wegschrijven."""
+import json
+import operator
 from pathlib import Path
-from typing import List
+from typing import Dict, Iterable, Mapping, Optional, Sequence
+
+import numpy as np
 
 from src import data
 
+# De velden die naar bestanden geschreven worden, in deze volgorde
+CSV_WAARDEN = data.MAANDELIJKSE_WAARDEN + data.TOTALE_WAARDEN
+
+# Grootte van de schrijfbuffer voor CSV bestanden, zodat er niet per regel naar de schijf geschreven wordt
+CSV_BUFFER = 1 << 20
+
+# Het bestand in een kolommen-map waarin staat welke kolommen er zijn en hoe groot ze zijn
+KOLOMMEN_INDEX = "kolommen.json"
+
+
+def csv_header() -> str:
+    """De eerste regel van een CSV bestand met de namen van de kolommen."""
+    header = ["Jaar", "Maand"]
+    for naam in CSV_WAARDEN:
+        header.append(naam.capitalize().replace("_", ""))
+    return ",".join(header) + "\n"
+
+
+def schrijf_naar_csv(alle_data: Iterable[data.MaandData], file_name: Path) -> None:
+    """Schrijft alle data weg naar een CSV bestand met een komma als separator. De regels worden met een vooraf gemaakt
+    format in een keer door een grote buffer geschreven. De data mag ook een stroom zijn (zie main.stroom), die wordt
+    dan maand voor maand weggeschreven zonder eerst alles in een lijst te zetten."""
+    if isinstance(alle_data, data.MaandKolommen):
+        schrijf_kolommen_naar_csv(alle_data.kolommen, file_name)
+        return
+    regel = "{},{}," + ",".join("{:.0f}" for _ in CSV_WAARDEN) + "\n"
+    waarden = operator.attrgetter("jaar", "maand", *CSV_WAARDEN)
+    with file_name.open("w", buffering=CSV_BUFFER) as file:
+        file.write(csv_header())
+        file.writelines(regel.format(*waarden(maand_data)) for maand_data in alle_data)
+
+
+def schrijf_kolommen_naar_csv(kolommen: Mapping[str, np.ndarray], file_name: Path) -> None:
+    """Schrijft het resultaat van de gevectoriseerde berekening (zie vector.bereken_kolommen) weg als CSV bestand, in
+    hetzelfde formaat als schrijf_naar_csv. Bij meerdere scenario's komen de maanden van alle scenario's onder
+    elkaar."""
+    tabel = np.column_stack([np.ravel(kolommen[naam]) for naam in ("jaar", "maand") + CSV_WAARDEN])
+    with file_name.open("w", buffering=CSV_BUFFER) as file:
+        file.write(csv_header())
+        np.savetxt(file, tabel, fmt=["%d", "%d"] + ["%.0f"] * len(CSV_WAARDEN), delimiter=",")
+
+
+def laad_rente_paden(file_name: Path) -> np.ndarray:
+    """Leest rentepaden in uit een CSV bestand met een komma als separator, bijvoorbeeld historische hypotheekrentes. De
+    eerste regel bevat de namen van de kolommen. De eerste kolom is de periode (een maand of jaar, alleen ter
+    informatie), elke volgende kolom is een pad met een rentepercentage per periode. Het resultaat heeft een rij per
+    pad, zie vector.bereken_rente_paden."""
+    with file_name.open() as file:
+        aantal_kolommen = len(file.readline().split(","))
+        if aantal_kolommen < 2:
+            raise RuntimeError(f"Het bestand '{file_name}' moet naast de periode minstens een kolom met rentes hebben")
+        paden = np.loadtxt(file, delimiter=",", usecols=range(1, aantal_kolommen), ndmin=2)
+    return np.ascontiguousarray(paden.T)
+
+
+def schrijf_kolommen(kolommen: Mapping[str, np.ndarray], map_naam: Path) -> None:
+    """Schrijft elke kolom weg als binair NumPy bestand (.npy) in de gegeven map, met een index van alle kolommen. De
+    kolommen kunnen daarna zonder te parsen ingelezen worden met lees_kolommen."""
+    map_naam.mkdir(parents=True, exist_ok=True)
+    for naam, kolom in kolommen.items():
+        np.save(map_naam / f"{naam}.npy", np.ascontiguousarray(kolom))
+    _schrijf_index(map_naam, {naam: kolom.shape for naam, kolom in kolommen.items()})
+
+
+def lees_kolommen(map_naam: Path, namen: Optional[Iterable[str]] = None,
+                  geheugen_map: bool = True) -> Dict[str, np.ndarray]:
+    """Leest de kolommen (standaard allemaal) uit een map geschreven door schrijf_kolommen of KolomSchrijver. Met
+    'geheugen_map' worden de bestanden met numpy.memmap geopend: er wordt dan pas iets van de schijf gelezen als een
+    deel van een kolom gebruikt wordt."""
+    if namen is None:
+        with (map_naam / KOLOMMEN_INDEX).open() as file:
+            namen = json.load(file)["kolommen"]
+    if geheugen_map:
+        return {naam: np.load(map_naam / f"{naam}.npy", mmap_mode="r") for naam in namen}
+    return {naam: np.load(map_naam / f"{naam}.npy") for naam in namen}
+
+
+class KolomSchrijver:
+    """Schrijft de resultaten van veel scenario's blok voor blok weg als binaire kolommen, zonder alles tegelijk in het
+    geheugen te hebben. Elke kolom is een .npy bestand met een rij per scenario en een kolom per maand, dat vooraf op de
+    volledige grootte aangemaakt wordt en daarna via een memory-map gevuld wordt."""
+
+    def __init__(self, map_naam: Path, aantal_scenarios: int, aantal_maanden: int,
+                 namen: Sequence[str] = data.MaandData._fields) -> None:
+        map_naam.mkdir(parents=True, exist_ok=True)
+        self.map_naam = map_naam
+        vorm = (aantal_scenarios, aantal_maanden)
+        self.kolommen = {
+            naam: np.lib.format.open_memmap(map_naam / f"{naam}.npy", mode="w+", shape=vorm,
+                                            dtype=np.int16 if naam in ("jaar", "maand") else np.float64)
+            for naam in namen
+        }
+        _schrijf_index(map_naam, {naam: kolom.shape for naam, kolom in self.kolommen.items()})
+
+    def schrijf(self, eerste_scenario: int, kolommen: Mapping[str, np.ndarray]) -> None:
+        """Schrijft een blok van scenario's (zie vector.bereken_scenarios) weg, beginnend bij het gegeven scenario."""
+        for naam, kolom in self.kolommen.items():
+            blok = np.atleast_2d(kolommen[naam])
+            kolom[eerste_scenario:eerste_scenario + blok.shape[0]] = blok
 
-def schrijf_naar_csv(alle_data: List[data.MaandData], file_name: Path) -> None:
-    """Schrijft alle data weg naar een CSV bestand met een komma als separator."""
-    with file_name.open("w") as file:
+    def sluit(self) -> None:
+        """Schrijft alle data naar de schijf."""
+        for kolom in self.kolommen.values():
+            kolom.flush()
+        self.kolommen = {}
 
-        header = ["Jaar", "Maand"]
-        for naam in data.MAANDELIJKSE_WAARDEN + data.TOTALE_WAARDEN:
-            header.append(naam.capitalize().replace("_", ""))
-        file.write(",".join(header) + "\n")
 
-        for maand_data in alle_data:
-            data_lijst = [str(maand_data.jaar), str(maand_data.maand)]
-            for naam in data.MAANDELIJKSE_WAARDEN + data.TOTALE_WAARDEN:
-                data_lijst.append(f"{getattr(maand_data, naam):.0f}")
-            file.write(",".join(data_lijst) + "\n")
+def _schrijf_index(map_naam: Path, vormen: Mapping[str, Sequence[int]]) -> None:
+    """Schrijft de index van een kolommen-map: de namen en vorm van alle kolommen."""
+    with (map_naam / KOLOMMEN_INDEX).open("w") as file:
+        json.dump({"kolommen": list(vormen), "vormen": {naam: list(vorm) for naam, vorm in vormen.items()}}, file)
@@ -1,14 +1,19 @@
 """In deze module zitten de hoofd-functies van het programma"""
+import argparse
 import math
 from pathlib import Path
-from typing import List
+from typing import TYPE_CHECKING, Iterator, List, Optional, Sequence, Tuple
 
 import gegevens
 from src import belasting
 from src import data
 from src import hypotheek
 from src import io
-from src import plot
+from src import meting
+from src import vector
+
+if TYPE_CHECKING:
+    from src.cache import ResultaatCache
 
 
 def exp_stijging(basis: float, stijging_jaarlijks: float, jaar: int) -> float:
@@ -16,65 +21,54 @@ def exp_stijging(basis: float, stijging_jaarlijks: float, jaar: int) -> float:
     return basis * math.pow(1.0 + stijging_jaarlijks / 100.0, jaar)
 
 
-def bereken_gegevens(gegeven: gegevens.Gegevens) -> List[data.MaandData]:
-    """Alle gegevens worden in deze functie berekend. Het resultaat is een lijst van data per maand voor de duur van de
-    hypotheek."""
-    # pylint: disable=too-many-locals, too-many-statements
-
-    # Kosten bij aanschaf (kosten koper plus meer)
-    kosten_belasting = (gegeven.kk_belasting_percentage / 100.0) * gegeven.kosten_huis
-    kosten_niet_aftrekbaar = gegeven.kosten_notaris + gegeven.kosten_makelaar + kosten_belasting + gegeven.kosten_overig
-    kosten_aftrekbaar = (gegeven.kosten_hypotheek + gegeven.kosten_taxatie + gegeven.kosten_bouwkundig_rapport +
-                         gegeven.kosten_overig_aftrekbaar)
-    bel_voordeel_koop = (gegeven.hoogste_belasting_percentage_inkomen / 100.0) * kosten_aftrekbaar
-    kosten_bruto = gegeven.kosten_huis + kosten_niet_aftrekbaar + kosten_aftrekbaar
-    kosten_netto = kosten_bruto - bel_voordeel_koop
-
-    # Hypotheek gegevens
-    hypotheek_schuld = kosten_netto - gegeven.eigen_inleg
-    hypotheek_schuld_percentage = hypotheek_schuld / gegeven.kosten_huis
-
-    # Check voor valide input
-    if gegeven.eigen_inleg < kosten_niet_aftrekbaar:
-        raise RuntimeError(f"De eigen inleg moet minstens de kosten koper a {kosten_niet_aftrekbaar:0.2f} euro zijn")
-
-    # Overzichtje van de gegevens en daaruit afgeleidde data
-    print("*----------------- AANKOOP --------------*")
-    print(f"*         Huisprijs: {gegeven.kosten_huis:7.0f} euro        *")
-    print(f"*         Belasting: {kosten_belasting:7.0f} euro ({gegeven.kk_belasting_percentage:.1f}%) *")
-    print(f"*           Notaris: {gegeven.kosten_notaris:7.0f} euro        *")
-    print(f"*          Makelaar: {gegeven.kosten_makelaar:7.0f} euro        *")
-    print(f"*         Hypotheek: {gegeven.kosten_hypotheek:7.0f} euro        *")
-    print(f"*           Taxatie: {gegeven.kosten_taxatie:7.0f} euro        *")
-    print(f"*     Bouwk.rapport: {gegeven.kosten_bouwkundig_rapport:7.0f} euro        *")
-    print(f"*           Overige: {gegeven.kosten_overig + gegeven.kosten_overig_aftrekbaar:7.0f} euro        *")
-    print("*                    ------- +           *")
-    print(f"*             Bruto: {kosten_bruto:7.0f} euro (+{((kosten_bruto / gegeven.kosten_huis) - 1) * 100:3.1f}%)*")
-    print(f"* Belastingvoordeel: {bel_voordeel_koop:7.0f} euro        *")
-    print("*                    ------- +           *")
-    print(f"*             Netto: {kosten_netto:7.0f} euro (+{((kosten_netto / gegeven.kosten_huis) - 1) * 100:3.1f}%)*")
-    print("*----------------------------------------*")
-    print("") # 400 * (1 + x) = 410 =----> x = 410 / 400 - 1
-    print("*----------------- HYPOTHEEK ------------*")
-    print(f"*              Vorm: {gegeven.hypotheek_vorm.value:20s}*")
-    print(f"*          Looptijd: {gegeven.looptijd_hypotheek_jaren:2.0f} jaar             *")
-    print(f"*          Rente #1: {gegeven.hypotheek_rente_percentage:4.2f}% (tot {gegeven.rente_vast_jaren} jaar) *")
-    print(f"*          Rente #2: {gegeven.rente_percentage_nadien:4.2f}% (na {gegeven.rente_vast_jaren} jaar)  *")
-    if gegeven.aflossingsvrij_deel != 0.0:
-        print(f"*    Aflossingsvrij: {gegeven.aflossingsvrij_deel:3.1f}% a {gegeven.rente_percentage_aflossingsvrij:4.2f}% rente *")  # pylint: disable=line-too-long
-    print("*                                        *")
-    print(f"*      Bruto kosten: {kosten_bruto:7.0f} euro        *")
-    print(f"*       Eigen inleg: {gegeven.eigen_inleg:7.0f} euro        *")
-    print("*                    ------- -           *")
-    print(f"*         Hypotheek: {hypotheek_schuld:7.0f} euro ({hypotheek_schuld_percentage * 100:3.0f}%) *")
-    print("*----------------------------------------*")
+def begin_toestand(aankoop: data.AankoopKosten) -> data.Toestand:
+    """De toestand op het moment van aankoop, voor de eerste maand."""
+    return data.Toestand(jaar=0, rest_schuld=aankoop.hypotheek_schuld, voordeel_kopen_ipv_huren=0.0, gespaard_geld=0.0)
+
+
+def bereken_maanden(gegeven: gegevens.Gegevens, aankoop: data.AankoopKosten, toestand: Optional[data.Toestand] = None,
+                    toestanden: Optional[List[data.Toestand]] = None) -> data.MaandKolommen:
+    """Berekent maand voor maand alle gegevens voor de duur van de hypotheek, uitgaande van de kosten bij aankoop en de
+    daaruit volgende hypotheekschuld. Het resultaat is de data per maand, opgeslagen per kolom. Als er een toestand
+    gegeven is wordt pas vanaf het jaar van die toestand gerekend, en als er een lijst van toestanden gegeven is wordt
+    daar de toestand aan het begin van elk berekend jaar aan toegevoegd (zie incrementeel.IncrementeleBerekening)."""
+    return data.MaandKolommen.van_maanden(genereer_maanden(gegeven, aankoop, toestand, toestanden))
+
+
+def genereer_maanden(gegeven: gegevens.Gegevens, aankoop: data.AankoopKosten, toestand: Optional[data.Toestand] = None,
+                     toestanden: Optional[List[data.Toestand]] = None) -> Iterator[data.MaandData]:
+    """Als bereken_maanden, maar de data wordt maand voor maand opgeleverd in plaats van als kolommen. Er wordt pas
+    verder gerekend als de volgende maand opgevraagd wordt, zodat er gestopt kan worden zodra het antwoord bekend is."""
+    # pylint: disable=too-many-locals
+    if gegeven.leningdelen:
+        raise NotImplementedError("Leningdelen worden alleen in de gevectoriseerde berekening ondersteund")
+    hypotheek_schuld = aankoop.hypotheek_schuld
+    eenmalige_kosten_kopen = aankoop.kosten_niet_aftrekbaar + aankoop.kosten_aftrekbaar - aankoop.bel_voordeel_koop
+
+    # De belastingregels zijn vooraf voor elk jaar van de looptijd uitgerekend (zie belasting.BelastingRegime)
+    regime = belasting.regime_voor(gegeven)
+    hra_percentages = regime.hra_percentage.tolist()
+    hillen_factoren = regime.hillen_factor.tolist()
 
     # Loop over alle maanden tot de aflossing nul is
-    alle_data = []
-    rest_schuld = hypotheek_schuld
-    voordeel_kopen_ipv_huren = 0.0
-    gespaard_geld = 0.0
-    for jaar in range(gegeven.looptijd_hypotheek_jaren):
+    if toestand is None:
+        toestand = begin_toestand(aankoop)
+    rest_schuld = toestand.rest_schuld
+    voordeel_kopen_ipv_huren = toestand.voordeel_kopen_ipv_huren
+    gespaard_geld = toestand.gespaard_geld
+    for jaar in range(toestand.jaar, gegeven.looptijd_hypotheek_jaren):
+        if toestanden is not None:
+            toestanden.append(data.Toestand(jaar=jaar, rest_schuld=rest_schuld,
+                                            voordeel_kopen_ipv_huren=voordeel_kopen_ipv_huren,
+                                            gespaard_geld=gespaard_geld))
+
+        # De WOZ-waarde, EWF, onderhoudskosten en huur veranderen alleen per jaar
+        woz_waarde = exp_stijging(gegeven.woz_waarde, gegeven.woz_stijging_jaarlijks_percentage, jaar)
+        hoogte_eigenwoningforfait = float(regime.ewf(woz_waarde, jaar))
+        hra_percentage = hra_percentages[jaar]
+        hillen_factor = hillen_factoren[jaar]
+        onderhoud = exp_stijging(gegeven.onderhoud_per_maand, gegeven.inflatie_jaarlijks_percentage, jaar)
+        oude_huur = exp_stijging(gegeven.huur_per_maand, gegeven.huurstijging_jaarlijks_percentage, jaar)
         for maand in range(12):
 
             # Bereken de nieuwe data voor deze maand
@@ -82,26 +76,25 @@ def bereken_gegevens(gegeven: gegevens.Gegevens) -> List[data.MaandData]:
                 gegeven, rest_schuld, hypotheek_schuld, jaar
             )
             rest_schuld = rest_schuld - aflossing
-            hypotheek_rente_aftrek = belasting.bereken_hra(gegeven, aftrekbare_rente, jaar)
-            woz_waarde = exp_stijging(gegeven.woz_waarde, gegeven.woz_stijging_jaarlijks_percentage, jaar)
-            hoogte_eigenwoningforfait = belasting.bereken_ewf(gegeven, woz_waarde, jaar)
-            belasting_voordeel, belasting_nadeel = belasting.bereken(gegeven, hypotheek_rente_aftrek,
-                                                                     hoogte_eigenwoningforfait, jaar)
-            onderhoud = exp_stijging(gegeven.onderhoud_per_maand, gegeven.inflatie_jaarlijks_percentage, jaar)
+            hypotheek_rente_aftrek = aftrekbare_rente * hra_percentage
+            if hypotheek_rente_aftrek >= hoogte_eigenwoningforfait:  # zie belasting.bereken
+                belasting_voordeel = hypotheek_rente_aftrek - hoogte_eigenwoningforfait
+                belasting_nadeel = 0.0
+            else:
+                belasting_voordeel = 0.0
+                belasting_nadeel = (hoogte_eigenwoningforfait - hypotheek_rente_aftrek) * hillen_factor
             rente_netto = aftrekbare_rente + niet_aftrekbare_rente - belasting_voordeel
             kosten_zonder_aflossing = rente_netto + belasting_nadeel + onderhoud
 
             # Verschil ten opzichte van huren
-            oude_huur = exp_stijging(gegeven.huur_per_maand, gegeven.huurstijging_jaarlijks_percentage, jaar)
             voordeel_kopen_ipv_huren += oude_huur - kosten_zonder_aflossing
-            eenmalige_kosten_kopen = kosten_niet_aftrekbaar + kosten_aftrekbaar - bel_voordeel_koop
 
             # Extra sparen (los van de hypotheek, om eventueel te gebruiken om extra af te lossen)
             gespaard_geld += gespaard_geld * (gegeven.rendement_jaarlijks_percentage / (12 * 100.0))
             gespaard_geld += gegeven.extra_spaarinleg_per_maand
 
-            # Sla de data op
-            alle_data.append(data.MaandData(
+            # Lever de data van deze maand op
+            yield data.MaandData(
                 jaar=jaar,
                 maand=maand,
                 aflossing=aflossing,
@@ -120,25 +113,107 @@ def bereken_gegevens(gegeven: gegevens.Gegevens) -> List[data.MaandData]:
                 voordeel_nu_kopen_ipv_voorlopig_huren=voordeel_kopen_ipv_huren,
                 voordeel_nu_kopen_ipv_altijd_huren=voordeel_kopen_ipv_huren - eenmalige_kosten_kopen,
                 gespaard_geld=gespaard_geld,
-            ))
-
-    # Overzichtje van gegevens achteraf
-    print("")
-    print(f"*----------------- NA {gegeven.looptijd_hypotheek_jaren} JAAR -----------*")
-    print(f"*            Restschuld: {math.ceil(alle_data[-1].restschuld):7.0f} euro    *")
-    print("*                                        *")
-    print(f"*  Betaalde rente bruto: {sum(d.rente for d in alle_data):7.0f} euro    *")
-    print(f"*  Totaal bel. voordeel: {sum(d.belasting_voordeel for d in alle_data):7.0f} euro    *")
-    print("*                        ------- -       *")
-    print(f"*  Betaalde rente netto: {sum(d.rente_netto for d in alle_data):7.0f} euro    *")
-    print("*                                        *")
-    print(f"*Betaalde EWF belasting: {sum(d.belasting_nadeel for d in alle_data):7.0f} euro    *")
-    print("*----------------------------------------*")
+            )
+
+
+def maak_samenvatting(aankoop: data.AankoopKosten, alle_data: data.MaandKolommen) -> data.Samenvatting:
+    """Vat de kosten bij aankoop en de totalen na de looptijd van de hypotheek samen."""
+    return data.Samenvatting(
+        *aankoop,
+        restschuld=float(alle_data["restschuld"][-1]),
+        betaalde_rente_bruto=alle_data.som("rente"),
+        totaal_belasting_voordeel=alle_data.som("belasting_voordeel"),
+        betaalde_rente_netto=alle_data.som("rente_netto"),
+        betaalde_ewf_belasting=alle_data.som("belasting_nadeel"),
+    )
+
+
+def bereken(gegeven: gegevens.Gegevens) -> Tuple[data.Samenvatting, data.MaandKolommen]:
+    """Alle gegevens worden in deze functie berekend, zonder output op het scherm. Het resultaat is een samenvatting en
+    de data per maand voor de duur van de hypotheek."""
+    with meting.fase("invoer_controle"):
+        aankoop = hypotheek.bereken_aankoop(gegeven)
+    with meting.fase("maand_loop"):
+        if gegeven.leningdelen:  # alle leningdelen worden in een keer als kolommen berekend
+            alle_data = data.MaandKolommen(vector.bereken_kolommen(gegeven))
+        else:
+            alle_data = bereken_maanden(gegeven, aankoop)
+    return maak_samenvatting(aankoop, alle_data), alle_data
+
+
+def stroom(gegeven: gegevens.Gegevens) -> Iterator[data.MaandData]:
+    """Alle gegevens maand voor maand, zonder ze eerst allemaal te berekenen (zie genereer_maanden). Leningdelen worden
+    alleen in een keer berekend, dan wordt het volledige resultaat maand voor maand opgeleverd."""
+    if gegeven.leningdelen:
+        return iter(bereken(gegeven)[1])
+    return genereer_maanden(gegeven, hypotheek.bereken_aankoop(gegeven))
+
+
+def bereken_gegevens(gegeven: gegevens.Gegevens, cache: Optional["ResultaatCache"] = None) -> data.MaandKolommen:
+    """Alle gegevens worden in deze functie berekend, met een overzicht op het scherm. Het resultaat is de data per
+    maand voor de duur van de hypotheek. Met een cache (zie cache.ResultaatCache) worden eerder berekende
+    resultaten hergebruikt."""
+    from src import rapport  # pylint: disable=import-outside-toplevel
+
+    samenvatting, alle_data = bereken(gegeven) if cache is None else cache.bereken(gegeven)
+    rapport.print_aankoop(gegeven, samenvatting)
+    rapport.print_totalen(gegeven, samenvatting)
     return alle_data
 
 
-def main() -> None:
-    """De hoofdfunctie met de logica van het programma op hoog niveau."""
+def vergelijk_hypotheekvormen(gegeven: gegevens.Gegevens, aflossingsvrije_delen: Sequence[float] = ()) -> None:
+    """Vergelijkt alle hypotheekvormen (zie vergelijking.vergelijk), met een overzicht op het scherm, een CSV bestand
+    met alle varianten en een grafiek met alle varianten over elkaar."""
+    # pylint: disable=import-outside-toplevel
+    from src import plot, rapport, vergelijking
+    with meting.fase("maand_loop"):
+        resultaten = vergelijking.vergelijk(gegeven, vergelijking.maak_varianten(aflossingsvrije_delen))
+    rapport.print_vergelijking(gegeven, vergelijking.samenvattingen(gegeven, resultaten))
+
+    csv_bestand = Path("hkp_vergelijking.csv")
+    with meting.fase("csv_schrijven"):
+        vergelijking.schrijf_naar_csv(resultaten, csv_bestand)
+    plot_bestand = Path("hkp_vergelijking.png")
+    plot.plot_vergelijking(resultaten, plot_bestand, plot_jaren=gegeven.looptijd_hypotheek_jaren)
+    rapport.print_output(csv_bestand, plot_bestand)
+
+
+def lees_argumenten(argumenten: Optional[Sequence[str]] = None) -> argparse.Namespace:
+    """Leest de argumenten van de commandoregel, standaard die waarmee het programma gestart is."""
+    parser = argparse.ArgumentParser(description="Plot informatie over het financieren van een woning. Zonder "
+                                                 "argumenten worden de gegevens uit gegevens.py gebruikt.")
+    parser.add_argument("--scenarios", type=Path, help="bestand met een scenario per regel (.csv, .jsonl of .toml)")
+    parser.add_argument("--uitvoer", type=Path, default=Path("hkp_scenarios.csv"),
+                        help="CSV bestand voor de samenvattingen van de scenario's")
+    parser.add_argument("--blok-grootte", type=int, default=1000, help="aantal scenario's dat tegelijk berekend wordt")
+    parser.add_argument("--vergelijk", action="store_true",
+                        help="vergelijk alle hypotheekvormen in een CSV bestand en een grafiek")
+    parser.add_argument("--aflossingsvrij-deel", type=float, action="append", default=[],
+                        help="vergelijk ook hypotheken met dit percentage aflossingsvrij (mag vaker opgegeven worden)")
+    parser.add_argument("--meting", type=Path, nargs="?", const=meting.STANDAARD_BESTAND,
+                        help=f"meet de tijd per fase en schrijf het rapport als JSON (standaard "
+                             f"{meting.STANDAARD_BESTAND}, of zet {meting.OMGEVINGSVARIABELE})")
+    return parser.parse_args(argumenten)
+
+
+def main(argumenten: Optional[Sequence[str]] = None) -> None:
+    """De hoofdfunctie: leest de argumenten en voert het programma uit, eventueel met metingen (zie meting.py)."""
+    opties = lees_argumenten(argumenten)
+    with meting.meet(opties.meting or meting.bestand_uit_omgeving()):
+        voer_uit(opties)
+
+
+def voer_uit(opties: argparse.Namespace) -> None:
+    """De logica van het programma op hoog niveau."""
+    if opties.scenarios is not None:
+        from src import rapport, scenarios  # pylint: disable=import-outside-toplevel
+        aantal = scenarios.evalueer(opties.scenarios, opties.uitvoer, opties.blok_grootte)
+        rapport.print_scenarios(aantal, opties.uitvoer)
+        return
+    if opties.vergelijk:
+        vergelijk_hypotheekvormen(gegevens.Gegevens(), opties.aflossingsvrij_deel)
+        return
+
     gegeven = gegevens.Gegevens()
 
     # Bereken alle data
@@ -146,15 +221,14 @@ def main() -> None:
 
     # Sla alle data op als CSV
     csv_bestand = Path("hkp.csv")
-    io.schrijf_naar_csv(alle_data, csv_bestand)
+    with meting.fase("csv_schrijven"):
+        io.schrijf_naar_csv(alle_data, csv_bestand)
 
-    # En plot de gegevens
+    # En plot de gegevens, matplotlib wordt alleen hier pas ingeladen
+    from src import plot  # pylint: disable=import-outside-toplevel
     plot_bestand = Path("hkp.png")
     plot.plot(alle_data, plot_bestand, plot_jaren=gegeven.looptijd_hypotheek_jaren)
 
     # Einde van het programma
-    print("")
-    print("*------------------- OUTPUT -------------*")
-    print(f"*     Alle data als CSV: {str(csv_bestand):15s} *")
-    print(f"*      Data als grafiek: {str(plot_bestand):15s} *")
-    print("*----------------------------------------*")
+    from src import rapport  # pylint: disable=import-outside-toplevel
+    rapport.print_output(csv_bestand, plot_bestand)
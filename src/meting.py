@@ -0,0 +1,175 @@
+"""Optionele metingen van waar de tijd blijft tijdens het draaien van het programma: de wand- en CPU-tijd per fase
+(controle van de invoer, de maand-voor-maand loop, het wegschrijven als CSV, het opbouwen van de figuur en het coderen
+als PNG), het aantal aanroepen en de tijd van de functies die elke maand aangeroepen worden, en het hoogste
+geheugengebruik van het proces. Het resultaat is een rapport als JSON bestand. De metingen staan aan met de
+omgevingsvariabele HKP_METING (met als waarde het bestand voor het rapport, of 1 voor hkp_meting.json) of met de optie
+--meting. Als de metingen uit staan wordt er niets aangepast: een fase is dan een lege context, en de functies worden
+alleen tijdens een meting vervangen door versies die tellen. Het geheugen (piek_rss_proces) is het hoogste
+geheugengebruik (RSS) van het proces sinds het gestart is, niet alleen tijdens de meting: in een proces dat al langer
+draait of al eerder gemeten heeft kan het dus niet per run gelezen worden. Het wordt pas na afloop opgevraagd, zodat
+het de gemeten tijden niet beïnvloedt."""
+import contextlib
+import functools
+import json
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, ContextManager, Dict, Iterator, List, Optional, Tuple
+
+from src import belasting
+from src import hypotheek
+
+OMGEVINGSVARIABELE = "HKP_METING"
+STANDAARD_BESTAND = Path("hkp_meting.json")
+
+# De functies die per maand of per jaar aangeroepen worden, en daarom geteld worden. De belastingregels worden vooraf
+# per jaar uitgerekend (zie belasting.BelastingRegime), de belastingfuncties worden in het rapport ook samen als een
+# fase getoond.
+GETELDE_FUNCTIES: Tuple[Tuple[Any, str], ...] = (
+    (belasting, "regime_voor"),
+    (belasting.BelastingRegime, "hra"),
+    (belasting.BelastingRegime, "ewf"),
+    (belasting.BelastingRegime, "bereken"),
+    (hypotheek, "bereken_aflossing_en_rente"),
+)
+BELASTING_FUNCTIES = ("belasting.regime_voor", "BelastingRegime.hra", "BelastingRegime.ewf", "BelastingRegime.bereken")
+
+
+class Meting:
+    """De tellers en tijden van een meting. Een fase mag vaker voorkomen, de tijden worden dan opgeteld."""
+
+    def __init__(self) -> None:
+        self.fasen: Dict[str, List[float]] = {}  # per fase: aantal, wandtijd, CPU-tijd
+        self.aanroepen: Dict[str, List[float]] = {}  # per functie: aantal, wandtijd
+        self.piek_rss_proces: Optional[int] = None
+        self._originelen: List[Tuple[Any, str, Callable[..., Any]]] = []
+        self._wandtijd = time.perf_counter()
+        self._cpu_tijd = time.process_time()
+
+    @contextlib.contextmanager
+    def fase(self, naam: str) -> Iterator[None]:
+        """Meet de wand- en CPU-tijd van alles binnen deze context."""
+        wandtijd, cpu_tijd = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            totalen = self.fasen.setdefault(naam, [0, 0.0, 0.0])
+            totalen[0] += 1
+            totalen[1] += time.perf_counter() - wandtijd
+            totalen[2] += time.process_time() - cpu_tijd
+
+    def tel(self, module: Any, naam: str) -> None:
+        """Vervangt een functie in een module (of een methode van een klasse) door een versie die de aanroepen en de
+        tijd telt."""
+        origineel = getattr(module, naam)
+        totalen = self.aanroepen.setdefault(f"{module.__name__.split('.')[-1]}.{naam}", [0, 0.0])
+
+        @functools.wraps(origineel)
+        def geteld(*args: Any, **kwargs: Any) -> Any:
+            begin = time.perf_counter()
+            try:
+                return origineel(*args, **kwargs)
+            finally:
+                totalen[0] += 1
+                totalen[1] += time.perf_counter() - begin
+
+        self._originelen.append((module, naam, origineel))
+        setattr(module, naam, geteld)
+
+    def herstel(self) -> None:
+        """Zet alle getelde functies terug."""
+        for module, naam, origineel in reversed(self._originelen):
+            setattr(module, naam, origineel)
+        self._originelen = []
+
+    def rapport(self) -> Dict[str, Any]:
+        """Het rapport met alle tijden (in seconden), aantallen en het hoogste geheugengebruik van het proces (in bytes,
+        of None als dat niet bekend is)."""
+        fasen = {naam: {"aantal": int(aantal), "wandtijd": wandtijd, "cpu_tijd": cpu_tijd}
+                 for naam, (aantal, wandtijd, cpu_tijd) in self.fasen.items()}
+        aanroepen = {naam: {"aantal": int(aantal), "wandtijd": wandtijd}
+                     for naam, (aantal, wandtijd) in self.aanroepen.items()}
+        belasting_aanroepen = [aanroepen[naam] for naam in BELASTING_FUNCTIES if naam in aanroepen]
+        if belasting_aanroepen:
+            fasen["belastingfuncties"] = {"aantal": sum(totaal["aantal"] for totaal in belasting_aanroepen),
+                                          "wandtijd": sum(totaal["wandtijd"] for totaal in belasting_aanroepen)}
+        return {
+            "totaal": {"wandtijd": time.perf_counter() - self._wandtijd,
+                       "cpu_tijd": time.process_time() - self._cpu_tijd},
+            "fasen": fasen,
+            "aanroepen": aanroepen,
+            "piek_rss_proces": self.piek_rss_proces,
+        }
+
+    def schrijf(self, file_name: Path) -> None:
+        """Schrijft het rapport als JSON bestand."""
+        with file_name.open("w") as file:
+            json.dump(self.rapport(), file, indent=2)
+
+
+# De meting die nu loopt, of None als er niet gemeten wordt
+_ACTIEF: Optional[Meting] = None
+_NIETS = contextlib.nullcontext()
+
+
+def fase(naam: str) -> ContextManager[None]:
+    """Meet een fase als er een meting loopt (zie Meting.fase), anders is dit een lege context."""
+    if _ACTIEF is None:
+        return _NIETS
+    return _ACTIEF.fase(naam)
+
+
+def piek_rss_proces() -> Optional[int]:
+    """Het hoogste geheugengebruik (maximum resident set size) van het proces sinds het gestart is in bytes, of None
+    zonder de resource module (zoals op Windows). Dit getal kan alleen stijgen."""
+    try:
+        import resource  # pylint: disable=import-outside-toplevel
+    except ImportError:
+        return None
+    maximum = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return int(maximum) if sys.platform == "darwin" else int(maximum) * 1024  # buiten macOS in kilobytes
+
+
+def start() -> Meting:
+    """Start een meting: vanaf nu worden fasen gemeten en de functies uit GETELDE_FUNCTIES geteld."""
+    global _ACTIEF  # pylint: disable=global-statement
+    if _ACTIEF is not None:
+        raise RuntimeError("Er loopt al een meting")
+    _ACTIEF = Meting()
+    for module, naam in GETELDE_FUNCTIES:
+        _ACTIEF.tel(module, naam)
+    return _ACTIEF
+
+
+def stop() -> Meting:
+    """Stopt de meting die loopt, vraagt het hoogste geheugengebruik van het proces op en zet alle getelde functies
+    terug. Het resultaat is de afgeronde meting."""
+    global _ACTIEF  # pylint: disable=global-statement
+    if _ACTIEF is None:
+        raise RuntimeError("Er loopt geen meting")
+    meting, _ACTIEF = _ACTIEF, None
+    meting.piek_rss_proces = piek_rss_proces()
+    meting.herstel()
+    return meting
+
+
+def bestand_uit_omgeving() -> Optional[Path]:
+    """Het bestand voor het rapport volgens de omgevingsvariabele HKP_METING, of None als die niet gezet is."""
+    waarde = os.environ.get(OMGEVINGSVARIABELE, "")
+    if waarde in ("", "0"):
+        return None
+    return STANDAARD_BESTAND if waarde == "1" else Path(waarde)
+
+
+@contextlib.contextmanager
+def meet(file_name: Optional[Path]) -> Iterator[None]:
+    """Meet alles binnen deze context en schrijft het rapport naar het bestand, of doet niets zonder bestand."""
+    if file_name is None:
+        yield
+        return
+    start()
+    try:
+        yield
+    finally:
+        stop().schrijf(file_name)
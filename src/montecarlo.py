@@ -0,0 +1,173 @@
+"""Monte Carlo simulatie: een aantal gegevens die in werkelijkheid onzeker zijn (zoals de rente na de rentevaste periode
+en de WOZ-stijging) worden getrokken uit een kansverdeling. Alle paden worden in blokken met de gevectoriseerde
+berekening doorgerekend, verdeeld over meerdere processen. De resultaten worden per maand in histogrammen met een vast
+aantal bakjes opgeteld, zodat het geheugengebruik niet groeit met het aantal paden. Het bereik van de histogrammen volgt
+uit het eerste blok; waarden daarbuiten worden apart geteld, zodat ze de percentielen niet vertekenen. De percentielen
+zijn per maand nauwkeurig tot op de breedte van een bakje (twee keer het bereik van het eerste blok gedeeld door het
+aantal bakjes). Valt een percentiel zelf buiten het bereik, dan volgt een fout in plaats van een verkeerde band."""
+import concurrent.futures
+import math
+import os
+from typing import Any, Dict, Mapping, NamedTuple, Optional, Set, Tuple
+
+import numpy as np
+
+import gegevens
+from src import vector
+
+
+class Verdeling(NamedTuple):
+    """Een normale verdeling voor een gegeven, eventueel begrensd tussen een minimum en een maximum."""
+    gemiddelde: float
+    standaardafwijking: float
+    minimum: float = -math.inf
+    maximum: float = math.inf
+
+
+class Band(NamedTuple):
+    """De 5%, 50% (mediaan) en 95% percentielen per maand."""
+    p5: np.ndarray
+    p50: np.ndarray
+    p95: np.ndarray
+
+
+# De standaard onzekere gegevens, rond de standaard waarden uit gegevens.py
+STANDAARD_VERDELINGEN = {
+    "rente_percentage_nadien": Verdeling(3.0, 1.5, minimum=0.1),
+    "woz_stijging_jaarlijks_percentage": Verdeling(3.0, 2.0),
+    "inflatie_jaarlijks_percentage": Verdeling(2.0, 1.0),
+    "huurstijging_jaarlijks_percentage": Verdeling(3.0, 1.0),
+}
+
+# De velden van data.MaandData waarvan de percentielen bijgehouden worden
+SIMULATIE_WAARDEN = ("lasten", "restschuld", "voordeel_nu_kopen_ipv_altijd_huren")
+
+# Per veld de ondergrens en breedte van de bakjes van het histogram, per maand
+Grenzen = Dict[str, Tuple[np.ndarray, np.ndarray]]
+
+# De gegevens die bij leningdelen per leningdeel vastliggen en dus niet getrokken kunnen worden. De rente nadien kan
+# wel: die geldt dan voor elk leningdeel na zijn eigen rentevaste periode.
+LENINGDEEL_GEGEVENS = ("hypotheek_vorm", "hypotheek_rente_percentage", "rente_vast_jaren", "aflossingsvrij_deel")
+
+
+def trek_gegevens(gegeven: gegevens.Gegevens, verdelingen: Mapping[str, Verdeling], aantal_paden: int,
+                  generator: np.random.Generator) -> gegevens.Gegevens:
+    """Trekt voor elk pad een waarde voor de onzekere gegevens. Het resultaat is een gegevens-object met voor de
+    getrokken velden een kolom-array met een rij per pad (zie vector.stapel_gegevens), de overige velden blijven
+    gelijk. Bij leningdelen krijgt elk leningdeel de getrokken rente nadien, de gegevens uit LENINGDEEL_GEGEVENS kunnen
+    dan niet getrokken worden."""
+    if gegeven.leningdelen:
+        vast = sorted(set(verdelingen) & set(LENINGDEEL_GEGEVENS))
+        if vast:
+            raise RuntimeError(f"Bij leningdelen liggen deze gegevens per leningdeel vast en kunnen ze niet getrokken "
+                               f"worden: {', '.join(vast)}")
+    getrokken: Dict[str, Any] = {}
+    for naam, verdeling in verdelingen.items():
+        waarden = generator.normal(verdeling.gemiddelde, verdeling.standaardafwijking, size=(aantal_paden, 1))
+        getrokken[naam] = np.clip(waarden, verdeling.minimum, verdeling.maximum)
+    if gegeven.leningdelen and "rente_percentage_nadien" in getrokken:
+        getrokken["leningdelen"] = tuple(deel._replace(rente_percentage_nadien=getrokken["rente_percentage_nadien"])
+                                         for deel in gegeven.leningdelen)
+    return gegeven._replace(**getrokken)
+
+
+def generator_voor(seed: int, blok: int) -> np.random.Generator:
+    """De generator van willekeurige getallen voor een blok, onafhankelijk van de andere blokken en van het proces."""
+    return np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(blok,)))
+
+
+def _bereken_blok(gegeven: gegevens.Gegevens, verdelingen: Mapping[str, Verdeling], aantal_paden: int,
+                  seed: int, blok: int) -> Dict[str, np.ndarray]:
+    """Berekent een blok van paden. Het resultaat is per veld een 2-D array met een rij per pad."""
+    generator = generator_voor(seed, blok)
+    kolommen = vector.bereken_kolommen(trek_gegevens(gegeven, verdelingen, aantal_paden, generator))
+    aantal_maanden = gegeven.looptijd_hypotheek_jaren * 12
+    return {naam: np.broadcast_to(kolommen[naam], (aantal_paden, aantal_maanden)) for naam in SIMULATIE_WAARDEN}
+
+
+def _histogram(waarden: np.ndarray, ondergrens: np.ndarray, breedte: np.ndarray, aantal_bakjes: int) -> np.ndarray:
+    """Telt per maand (kolom) hoeveel waarden in elk bakje vallen. Het resultaat is een array met een rij per maand en
+    een kolom per bakje, met daarvoor een kolom voor de waarden onder de grenzen en daarna een voor de waarden erboven.
+    Zo tellen waarden buiten de grenzen niet mee in het eerste of laatste bakje."""
+    aantal_maanden = waarden.shape[-1]
+    kolommen = aantal_bakjes + 2
+    bakje = np.clip(np.floor((waarden - ondergrens) / breedte), -1, aantal_bakjes).astype(np.int64) + 1
+    bakje += np.arange(aantal_maanden) * kolommen
+    tellingen = np.bincount(bakje.ravel(), minlength=aantal_maanden * kolommen)
+    return tellingen.reshape(aantal_maanden, kolommen)
+
+
+def _tel_blok(gegeven: gegevens.Gegevens, verdelingen: Mapping[str, Verdeling], aantal_paden: int, seed: int,
+              blok: int, grenzen: Grenzen, aantal_bakjes: int) -> Dict[str, np.ndarray]:
+    """Berekent een blok van paden en geeft alleen de histogrammen terug, dit wordt in de losse processen uitgevoerd."""
+    # pylint: disable=too-many-arguments
+    blok_data = _bereken_blok(gegeven, verdelingen, aantal_paden, seed, blok)
+    return {naam: _histogram(waarden, *grenzen[naam], aantal_bakjes) for naam, waarden in blok_data.items()}
+
+
+def _bepaal_grenzen(blok_data: Mapping[str, np.ndarray], aantal_bakjes: int) -> Grenzen:
+    """Bepaalt de grenzen van de histogrammen op basis van een eerste blok, met aan beide kanten de helft van het bereik
+    extra ruimte voor de paden die nog komen."""
+    grenzen = {}
+    for naam, waarden in blok_data.items():
+        minimum = waarden.min(axis=0)
+        bereik = np.maximum(waarden.max(axis=0) - minimum, 1.0)
+        grenzen[naam] = (minimum - bereik / 2, 2 * bereik / aantal_bakjes)
+    return grenzen
+
+
+def _percentiel(tellingen: np.ndarray, ondergrens: np.ndarray, breedte: np.ndarray, percentiel: float) -> np.ndarray:
+    """Schat per maand het gegeven percentiel uit een histogram (zie _histogram), met lineaire interpolatie binnen een
+    bakje. Als het percentiel onder of boven de grenzen valt is het niet te schatten, dan volgt een fout."""
+    cumulatief = np.cumsum(tellingen, axis=1)
+    doel = cumulatief[:, -1] * percentiel / 100.0
+    bakje = np.argmax(cumulatief >= doel[:, np.newaxis], axis=1)
+    buiten = np.count_nonzero((bakje == 0) | (bakje == tellingen.shape[1] - 1))
+    if buiten:
+        raise RuntimeError(f"Het {percentiel}e percentiel valt voor {buiten} maanden buiten het bereik van de "
+                           f"histogrammen, gebruik meer paden per blok zodat het eerste blok het bereik beter bepaalt")
+    maanden = np.arange(tellingen.shape[0])
+    voor_bakje = cumulatief[maanden, bakje] - tellingen[maanden, bakje]
+    binnen_bakje = (doel - voor_bakje) / np.maximum(tellingen[maanden, bakje], 1)
+    return ondergrens + (bakje - 1 + binnen_bakje) * breedte
+
+
+def simuleer(gegeven: gegevens.Gegevens, aantal_paden: int, verdelingen: Optional[Mapping[str, Verdeling]] = None,
+             paden_per_blok: int = 1000, max_workers: Optional[int] = None, seed: int = 0,
+             aantal_bakjes: int = 2000) -> Dict[str, Band]:
+    """Simuleert het gegeven aantal paden met getrokken waarden voor de onzekere gegevens (standaard die uit
+    STANDAARD_VERDELINGEN). De blokken van paden worden verdeeld over een pool van processen (standaard een per core) en
+    samengevoegd zodra ze klaar zijn. Het resultaat is per veld uit SIMULATIE_WAARDEN een band met percentielen per
+    maand. De nauwkeurigheid van de percentielen wordt bepaald door het aantal bakjes van de histogrammen en het bereik
+    van het eerste blok (zie de beschrijving van deze module)."""
+    # pylint: disable=too-many-arguments, too-many-locals
+    if verdelingen is None:
+        verdelingen = STANDAARD_VERDELINGEN
+    aantal_blokken = math.ceil(aantal_paden / paden_per_blok)
+
+    def blok_grootte(blok: int) -> int:
+        return min(paden_per_blok, aantal_paden - blok * paden_per_blok)
+
+    # Het eerste blok wordt hier berekend om de grenzen van de histogrammen te bepalen
+    eerste_blok = _bereken_blok(gegeven, verdelingen, blok_grootte(0), seed, 0)
+    grenzen = _bepaal_grenzen(eerste_blok, aantal_bakjes)
+    totaal = {naam: _histogram(waarden, *grenzen[naam], aantal_bakjes) for naam, waarden in eerste_blok.items()}
+    del eerste_blok
+
+    # De rest van de blokken gaat naar de pool, met steeds een beperkt aantal blokken tegelijk in de wachtrij
+    max_workers = max_workers or os.cpu_count() or 1
+    with concurrent.futures.ProcessPoolExecutor(max_workers=max_workers) as pool:
+        volgende_blok = 1
+        bezig: Set[concurrent.futures.Future] = set()
+        while volgende_blok < aantal_blokken or bezig:
+            while volgende_blok < aantal_blokken and len(bezig) < 2 * max_workers:
+                bezig.add(pool.submit(_tel_blok, gegeven, verdelingen, blok_grootte(volgende_blok), seed,
+                                      volgende_blok, grenzen, aantal_bakjes))
+                volgende_blok += 1
+            klaar, bezig = concurrent.futures.wait(bezig, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in klaar:
+                for naam, tellingen in future.result().items():
+                    totaal[naam] += tellingen
+
+    return {naam: Band(*(_percentiel(tellingen, *grenzen[naam], percentiel) for percentiel in (5, 50, 95)))
+            for naam, tellingen in totaal.items()}
@@ -0,0 +1,87 @@
+"""Functies om terug te rekenen: uitgaande van een maximaal maandbedrag de maximale koopprijs (of minimale eigen inleg)
+bepalen. In plaats van de hele berekening steeds opnieuw te doen wordt gebruik gemaakt van het feit dat de aflossing en
+rente evenredig zijn met de hoogte van de hypotheek, en dat de maandlasten daardoor per maand een stuksgewijs lineaire
+functie zijn van de hypotheekschuld (met een knik waar de HRA gelijk is aan het EWF)."""
+from enum import Enum
+
+import numpy as np
+
+import gegevens
+from src import belasting
+from src import hypotheek
+from src import vector
+
+
+class Criterium(Enum):
+    """Over welke maanden de maandlasten onder het maximum moeten blijven."""
+    Piek = "Hoogste maandlasten over de hele looptijd"
+    EersteJaar = "Hoogste maandlasten in het eerste jaar"
+
+
+def maximale_hypotheek(gegeven: gegevens.Gegevens, maximale_lasten: float,
+                       criterium: Criterium = Criterium.Piek) -> float:
+    """Berekent de maximale hypotheekschuld waarbij de maandlasten (data.MaandData.lasten) volgens het criterium niet
+    hoger worden dan het gegeven maximum. De overige gegevens, zoals de WOZ-waarde, blijven zoals ze gegeven zijn."""
+    # pylint: disable=too-many-locals
+    if gegeven.leningdelen:
+        raise NotImplementedError("Terugrekenen wordt niet ondersteund voor leningdelen met vaste bedragen")
+    aantal_jaren = 1 if criterium == Criterium.EersteJaar else gegeven.looptijd_hypotheek_jaren
+    alle_jaren = np.arange(aantal_jaren)
+    jaren = np.repeat(alle_jaren, 12)
+
+    # Aflossing en rente voor een hypotheek van 1 euro, de echte waarden zijn daar evenredig mee
+    aflossing, aftrekbare_rente, niet_aftrekbare_rente, _ = vector.hypotheek_kolommen(gegeven, 1.0, jaren)
+    regime = belasting.regime_voor(gegeven)
+    per_euro = aflossing + aftrekbare_rente + niet_aftrekbare_rente
+    hra_per_euro = regime.hra(aftrekbare_rente, jaren)
+    hillen = regime.hillen_factor[jaren]
+
+    # De delen van de maandlasten die niet van de hypotheek afhangen
+    woz_waarde = vector.exp_stijging(gegeven.woz_waarde, gegeven.woz_stijging_jaarlijks_percentage, alle_jaren)
+    ewf = regime.ewf(woz_waarde[jaren], jaren)
+    onderhoud = vector.exp_stijging(gegeven.onderhoud_per_maand, gegeven.inflatie_jaarlijks_percentage, alle_jaren)
+    ruimte = maximale_lasten - onderhoud[jaren] - gegeven.extra_spaarinleg_per_maand
+
+    # Bij meer HRA dan EWF: lasten = schuld * (per_euro - hra_per_euro) + ewf, en anders (zie belasting.bereken):
+    # lasten = schuld * per_euro + (ewf - schuld * hra_per_euro) * hillen. Op de knik zijn de lasten schuld * per_euro,
+    # dus als die bij de knik nog binnen het maximum vallen ligt de oplossing op het eerste stuk.
+    with np.errstate(divide="ignore", invalid="ignore"):
+        meer_hra_dan_ewf = hra_per_euro * ruimte >= ewf * per_euro
+        schuld = np.where(meer_hra_dan_ewf, (ruimte - ewf) / (per_euro - hra_per_euro),
+                          (ruimte - ewf * hillen) / (per_euro - hra_per_euro * hillen))
+    maximale_schuld = float(np.min(schuld))
+    if maximale_schuld < 0:
+        raise RuntimeError(f"Maandlasten van {maximale_lasten:.0f} euro zijn ook zonder hypotheek niet haalbaar")
+    return maximale_schuld
+
+
+def maximale_koopprijs(gegeven: gegevens.Gegevens, maximale_lasten: float,
+                       criterium: Criterium = Criterium.Piek) -> float:
+    """Berekent de maximale koopprijs (gegevens.Gegevens.kosten_huis) bij de gegeven eigen inleg, waarbij de maandlasten
+    volgens het criterium niet hoger worden dan het gegeven maximum. Ook moet de eigen inleg de kosten koper dekken."""
+    maximale_schuld = maximale_hypotheek(gegeven, maximale_lasten, criterium)
+
+    # De hypotheekschuld is lineair in de koopprijs: bepaal de helling aan de hand van twee koopprijzen
+    zonder_huis = hypotheek.bereken_aankoop(gegeven._replace(kosten_huis=0.0), controleer=False)
+    met_huis = hypotheek.bereken_aankoop(gegeven._replace(kosten_huis=1.0), controleer=False)
+    koopprijs = ((maximale_schuld - zonder_huis.hypotheek_schuld) /
+                 (met_huis.hypotheek_schuld - zonder_huis.hypotheek_schuld))
+
+    # Bij een hogere koopprijs zijn er meer kosten koper, de eigen inleg moet die nog wel dekken
+    inleg_ruimte = gegeven.eigen_inleg - zonder_huis.kosten_niet_aftrekbaar
+    if inleg_ruimte < 0:
+        raise RuntimeError(f"De eigen inleg moet minstens de kosten koper a {zonder_huis.kosten_niet_aftrekbaar:0.2f}"
+                           f" euro zijn")
+    kosten_per_euro = met_huis.kosten_niet_aftrekbaar - zonder_huis.kosten_niet_aftrekbaar
+    if kosten_per_euro > 0:
+        koopprijs = min(koopprijs, inleg_ruimte / kosten_per_euro)
+    return koopprijs
+
+
+def minimale_eigen_inleg(gegeven: gegevens.Gegevens, maximale_lasten: float,
+                         criterium: Criterium = Criterium.Piek) -> float:
+    """Berekent de minimale eigen inleg bij de gegeven koopprijs, waarbij de maandlasten volgens het criterium niet
+    hoger worden dan het gegeven maximum. De eigen inleg is altijd minstens de kosten koper."""
+    maximale_schuld = maximale_hypotheek(gegeven, maximale_lasten, criterium)
+    aankoop = hypotheek.bereken_aankoop(gegeven, controleer=False)
+    return max(aankoop.kosten_netto - maximale_schuld, aankoop.kosten_niet_aftrekbaar)
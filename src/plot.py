@@ -1,84 +1,237 @@
-"""Deze module bevat functies om grafieken te plotten"""
+"""Deze module bevat functies om grafieken te plotten. Er wordt geen gebruik gemaakt van de globale toestand van pyplot,
+maar van een eigen figuur op de Agg backend die voor elk scenario hergebruikt wordt: alleen de data van de lijnen en
+vlakken wordt aangepast. Zo kunnen ook veel grafieken achter elkaar (of in meerdere processen) gemaakt worden zonder dat
+het geheugengebruik groeit."""
+import concurrent.futures
+import itertools
+import os
+from io import BytesIO
 from pathlib import Path
-from typing import List
+from typing import BinaryIO, Iterable, List, Mapping, Optional, Sequence, Set, Union
 
 import numpy as np
-from matplotlib import pyplot as plt
+from matplotlib.axes import Axes
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
 
 from src import data
+from src import meting
 
+ALLE_KLEUREN = ["moccasin", "skyblue", "lightcoral", "palegreen", "orange", "purple"]
 
-def plot_maandelijks(plot_data: List[data.MaandData], x_waarden: np.ndarray, x_labels: List[str]) -> None:
-    """De plot met de maandelijkse waarden (in de honderden tot duizenden euro)"""
-    plt.subplot(211)
-    axis = plt.gca()
 
-    alle_kleuren = ["moccasin", "skyblue", "lightcoral", "palegreen", "orange", "purple"]
+def _label(naam: str) -> str:
+    """De naam van een veld zoals die in de legenda staat."""
+    return naam.capitalize().replace("_", " ")
 
-    plt.title("[HKP] HuisKoopPlot, gemaakt met 'https://github.com/CNugteren/huiskoopplot'")
-    plt.figtext(0.35, 0.93, "Veel gegevens zijn schattingen, zie gegevens.py voor meer informatie")
 
-    y_waarden = [[getattr(maand_data, naam) for maand_data in plot_data] for naam in data.MAANDELIJKSE_PLOT1]
-
-    labels = [naam.capitalize().replace("_", " ") for naam in data.MAANDELIJKSE_PLOT1]
-    plt.stackplot(x_waarden, *y_waarden, labels=labels,
-                  colors=alle_kleuren[:len(data.MAANDELIJKSE_PLOT1)])
-
-    y_max = max([max(y) for y in y_waarden])
-    for index, naam in enumerate(data.MAANDELIJKSE_PLOT2):
-        y_waarden = [getattr(maand_data, naam) for maand_data in plot_data]
-        plt.plot(x_waarden, y_waarden, label=naam.capitalize().replace("_", " "),
-                 color=alle_kleuren[len(data.MAANDELIJKSE_PLOT1) + index])
-        y_max = max(y_max, max(y_waarden))
-
-    plt.ylabel("Maandelijks bedrag in euro")
-    plt.xticks(x_waarden[::12], labels=x_labels)
-    plt.yticks(list(range(0, int(y_max), 250)), labels=[str(v) for v in range(0, int(y_max), 250)])
-    axis.set_xlim(xmin=0, xmax=len(x_waarden))
-    plt.grid(True, axis="y")
-    plt.legend(loc="upper left")
-
-
-def plot_totaal(plot_data: List[data.MaandData], x_waarden: np.ndarray, x_labels: List[str]) -> None:
-    """De plot met de totale bedragen (in de honderdduizenden euro)"""
-    plt.subplot(212)
-    axis = plt.gca()
-
-    y_max = 0
-    for naam in data.TOTALE_WAARDEN:
-        y_waarden = [getattr(maand_data, naam) for maand_data in plot_data]
-        plt.plot(x_waarden, y_waarden, label=naam.capitalize().replace("_", " "))
-        y_max = max(y_max, max(y_waarden))
-
-    plt.xlabel("Jaar na aankoop")
-
-    plt.ylabel("Totaal bedrag in euro (x1000)")
-    plt.xticks(x_waarden[::12], labels=x_labels)
-    plt.yticks(list(range(0, int(y_max), 100_000)), labels=[str(v) for v in range(0, int(y_max / 1000), 100)])
+def _zet_assen(axis: Axes, x_waarden: np.ndarray, x_labels: List[str], y_bereik: List[float], y_ticks: List[int],
+               y_deler: int) -> None:
+    """Past de assen aan op de nieuwe data, met net als bij matplotlib standaard 5% marge boven en onder (behalve onder
+    de nullijn van de gestapelde vlakken)."""
+    # pylint: disable=too-many-arguments
+    axis.set_xticks(x_waarden[::12])
+    axis.set_xticklabels(x_labels)
+    axis.set_yticks(y_ticks)
+    axis.set_yticklabels([str(v // y_deler) for v in y_ticks])
     axis.set_xlim(xmin=0, xmax=len(x_waarden))
-    plt.grid(True, axis="y")
-    plt.legend(loc="upper left")
-
-
-def plot(alle_data: List[data.MaandData], file_name: Path, plot_jaren: int) -> None:
-    """De hoofdplot functie om de twee grafieken te plotten."""
-    plot_data = alle_data[:(plot_jaren * 12)]
-
-    # De dimensies van de plot
-    plot_grootte_y = 800
-    plot_grootte_x = plot_grootte_y * 16 / 9
-    plt.figure(figsize=(plot_grootte_x / 100, plot_grootte_y / 100))
-
-    # De waarden voor de x-as
-    x_waarden = np.arange(0, len(plot_data))
-    x_labels = [f"{jaar}" for jaar in range(0, len(plot_data) // 12)]
-
-    # De twee plots
-    plot_maandelijks(plot_data, x_waarden, x_labels)
-    plot_totaal(plot_data, x_waarden, x_labels)
-
-    # Stel de margins in
-    plt.subplots_adjust(left=0.05, right=0.98, top=0.95, bottom=0.10, hspace=0.1)
-
-    # Sla het resultaat op als bestand
-    plt.savefig(file_name, dpi=100)
+    marge = 0.05 * max(max(y_bereik) - min(y_bereik), 1.0)
+    y_onder = min(y_bereik)
+    axis.set_ylim(y_onder - marge if y_onder < 0 else y_onder, max(y_bereik) + marge)
+
+
+class Tekenaar:
+    """Een figuur met de twee grafieken die eenmalig opgebouwd wordt. Met 'teken' wordt alleen de data van de bestaande
+    lijnen en vlakken vervangen en het resultaat opgeslagen, zodat de figuur niet elke keer opnieuw gemaakt wordt."""
+
+    def __init__(self) -> None:
+        # De dimensies van de plot
+        plot_grootte_y = 800
+        plot_grootte_x = plot_grootte_y * 16 / 9
+        self.figuur = Figure(figsize=(plot_grootte_x / 100, plot_grootte_y / 100))
+        FigureCanvasAgg(self.figuur)
+        self.maandelijks = self.figuur.add_subplot(211)
+        self.totaal = self.figuur.add_subplot(212)
+
+        # De plot met de maandelijkse waarden (in de honderden tot duizenden euro)
+        self.maandelijks.set_title("[HKP] HuisKoopPlot, gemaakt met 'https://github.com/CNugteren/huiskoopplot'")
+        self.figuur.text(0.35, 0.93, "Veel gegevens zijn schattingen, zie gegevens.py voor meer informatie")
+        leeg = np.zeros(2)
+        self.vlakken = [self.maandelijks.fill_between(leeg, leeg, leeg, label=_label(naam), facecolor=kleur)
+                        for naam, kleur in zip(data.MAANDELIJKSE_PLOT1, ALLE_KLEUREN)]
+        kleuren = ALLE_KLEUREN[len(data.MAANDELIJKSE_PLOT1):]
+        self.lijnen_maandelijks = [self.maandelijks.plot(leeg, leeg, label=_label(naam), color=kleur)[0]
+                                   for naam, kleur in zip(data.MAANDELIJKSE_PLOT2, kleuren)]
+        self.maandelijks.set_ylabel("Maandelijks bedrag in euro")
+        self.maandelijks.grid(True, axis="y")
+        self.maandelijks.legend(loc="upper left")
+
+        # De plot met de totale bedragen (in de honderdduizenden euro)
+        self.lijnen_totaal = [self.totaal.plot(leeg, leeg, label=_label(naam))[0] for naam in data.TOTALE_WAARDEN]
+        self.totaal.set_xlabel("Jaar na aankoop")
+        self.totaal.set_ylabel("Totaal bedrag in euro (x1000)")
+        self.totaal.grid(True, axis="y")
+        self.totaal.legend(loc="upper left")
+
+        # Stel de margins in
+        self.figuur.subplots_adjust(left=0.05, right=0.98, top=0.95, bottom=0.10, hspace=0.1)
+
+    def teken(self, kolommen: Mapping[str, np.ndarray], file_name: Union[Path, BinaryIO],
+              plot_jaren: Optional[int] = None) -> None:
+        """Vervangt de data in de grafieken door die uit de kolommen (een array per veld, zie data.MaandKolommen of
+        vector.bereken_kolommen) en slaat het resultaat op als bestand, of als PNG in een open binair bestand."""
+        with meting.fase("figuur_opbouwen"):
+            self._zet_data(kolommen, plot_jaren)
+
+        # Sla het resultaat op als bestand, pas hier wordt de figuur getekend en als PNG gecodeerd
+        with meting.fase("png_coderen"):
+            self.figuur.savefig(file_name, dpi=100)
+
+    def _zet_data(self, kolommen: Mapping[str, np.ndarray], plot_jaren: Optional[int]) -> None:
+        """Vervangt de data van de lijnen en vlakken en past de assen daarop aan."""
+        aantal_maanden = len(kolommen[data.MAANDELIJKSE_PLOT1[0]])
+        if plot_jaren is not None:
+            aantal_maanden = min(aantal_maanden, plot_jaren * 12)
+
+        # De waarden voor de x-as
+        x_waarden = np.arange(0, aantal_maanden)
+        x_labels = [f"{jaar}" for jaar in range(0, aantal_maanden // 12)]
+
+        # De maandelijkse waarden: gestapelde vlakken en losse lijnen
+        onder = np.zeros(aantal_maanden)
+        y_max = 0.0
+        y_bereik = [0.0]
+        for vlak, naam in zip(self.vlakken, data.MAANDELIJKSE_PLOT1):
+            y_waarden = kolommen[naam][:aantal_maanden]
+            boven = onder + y_waarden
+            vlak.set_verts([np.column_stack((np.concatenate((x_waarden, x_waarden[::-1])),
+                                             np.concatenate((boven, onder[::-1]))))])
+            onder = boven
+            y_max = max(y_max, float(np.max(y_waarden)))
+            y_bereik += [float(np.min(boven)), float(np.max(boven))]
+        for lijn, naam in zip(self.lijnen_maandelijks, data.MAANDELIJKSE_PLOT2):
+            y_waarden = kolommen[naam][:aantal_maanden]
+            lijn.set_data(x_waarden, y_waarden)
+            y_max = max(y_max, float(np.max(y_waarden)))
+            y_bereik += [float(np.min(y_waarden)), float(np.max(y_waarden))]
+        _zet_assen(self.maandelijks, x_waarden, x_labels, y_bereik, list(range(0, int(y_max), 250)), 1)
+
+        # De totale waarden
+        y_max = 0.0
+        y_bereik = []
+        for lijn, naam in zip(self.lijnen_totaal, data.TOTALE_WAARDEN):
+            y_waarden = kolommen[naam][:aantal_maanden]
+            lijn.set_data(x_waarden, y_waarden)
+            y_max = max(y_max, float(np.max(y_waarden)))
+            y_bereik += [float(np.min(y_waarden)), float(np.max(y_waarden))]
+        _zet_assen(self.totaal, x_waarden, x_labels, y_bereik, list(range(0, int(y_max), 100_000)), 1000)
+
+    def sluit(self) -> None:
+        """Ruimt de figuur op."""
+        self.figuur.clear()
+
+
+_TEKENAAR: Optional[Tekenaar] = None
+
+
+def _tekenaar() -> Tekenaar:
+    """De figuur die binnen dit proces hergebruikt wordt."""
+    global _TEKENAAR  # pylint: disable=global-statement
+    if _TEKENAAR is None:
+        with meting.fase("figuur_opbouwen"):
+            _TEKENAAR = Tekenaar()
+    return _TEKENAAR
+
+
+def plot(alle_data: Iterable[data.MaandData], file_name: Path, plot_jaren: int) -> None:
+    """De hoofdplot functie om de twee grafieken te plotten, de data mag ook een stroom zijn (zie main.stroom)."""
+    if not isinstance(alle_data, data.MaandKolommen):
+        alle_data = data.MaandKolommen.van_maanden(itertools.islice(alle_data, plot_jaren * 12))
+    _tekenaar().teken(alle_data.kolommen, file_name, plot_jaren)
+
+
+def _teken_scenario(kolommen: Mapping[str, np.ndarray], file_name: Path, plot_jaren: Optional[int]) -> None:
+    """Tekent een enkel scenario met de figuur van dit proces, dit wordt in de losse processen uitgevoerd."""
+    _tekenaar().teken(kolommen, file_name, plot_jaren)
+
+
+def teken_png(kolommen: Mapping[str, np.ndarray], plot_jaren: Optional[int] = None) -> bytes:
+    """Tekent een enkel scenario met de figuur van dit proces en geeft de PNG terug in plaats van een bestand te
+    schrijven, zodat de dienst (zie dienst.py) dit in een pool van processen kan laten doen."""
+    png = BytesIO()
+    _tekenaar().teken(kolommen, png, plot_jaren)
+    return png.getvalue()
+
+
+def plot_scenarios(kolommen: Mapping[str, np.ndarray], file_names: Sequence[Path], plot_jaren: Optional[int] = None,
+                   max_workers: Optional[int] = None) -> None:
+    """Tekent voor elk scenario uit een batch-berekening (zie vector.bereken_scenarios, een rij per scenario) een
+    grafiek. De scenario's worden verdeeld over een pool van processen, die elk hun eigen figuur hergebruiken. Er staan
+    steeds maar een beperkt aantal scenario's tegelijk in de wachtrij, zodat het geheugengebruik niet groeit."""
+    if len(file_names) != len(kolommen[data.PLOT_WAARDEN[0]]):
+        raise RuntimeError("Er moet precies een bestandsnaam per scenario opgegeven worden")
+    max_workers = max_workers or os.cpu_count() or 1
+    with concurrent.futures.ProcessPoolExecutor(max_workers=max_workers) as pool:
+        bezig: Set[concurrent.futures.Future] = set()
+        for index, file_name in enumerate(file_names):
+            if len(bezig) >= 2 * max_workers:
+                klaar, bezig = concurrent.futures.wait(bezig, return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in klaar:
+                    future.result()
+            scenario = {naam: np.array(kolommen[naam][index]) for naam in data.PLOT_WAARDEN}
+            bezig.add(pool.submit(_teken_scenario, scenario, file_name, plot_jaren))
+        for future in concurrent.futures.as_completed(bezig):
+            future.result()
+
+
+def plot_vergelijking(varianten: Mapping[str, data.MaandKolommen], file_name: Path,
+                      plot_jaren: Optional[int] = None) -> None:
+    """Tekent alle varianten van een vergelijking (zie vergelijking.vergelijk) over elkaar in een figuur, met een kleur
+    per variant: boven de lasten per maand, onder de restschuld (doorgetrokken) en het voordeel van nu kopen ten
+    opzichte van altijd huren (gestreept). Het aantal lijnen hangt af van het aantal varianten, dus hier wordt steeds
+    een nieuwe figuur gemaakt in plaats van de figuur van het proces te hergebruiken."""
+    with meting.fase("figuur_opbouwen"):
+        figuur = _maak_vergelijking(varianten, plot_jaren)
+    with meting.fase("png_coderen"):
+        figuur.savefig(file_name, dpi=100)
+
+
+def _maak_vergelijking(varianten: Mapping[str, data.MaandKolommen], plot_jaren: Optional[int]) -> Figure:
+    """Bouwt de figuur van plot_vergelijking op, zonder die op te slaan."""
+    # pylint: disable=too-many-locals
+    figuur = Figure(figsize=(8 * 16 / 9, 8))
+    FigureCanvasAgg(figuur)
+    maandelijks = figuur.add_subplot(211)
+    totaal = figuur.add_subplot(212)
+    maandelijks.set_title("[HKP] HuisKoopPlot: vergelijking van hypotheekvormen")
+
+    aantal_maanden = min(len(alle_data) for alle_data in varianten.values())
+    if plot_jaren is not None:
+        aantal_maanden = min(aantal_maanden, plot_jaren * 12)
+    x_waarden = np.arange(0, aantal_maanden)
+    x_labels = [f"{jaar}" for jaar in range(0, aantal_maanden // 12)]
+
+    y_bereik_maandelijks: List[float] = [0.0]
+    y_bereik_totaal: List[float] = []
+    for (naam, alle_data), kleur in zip(varianten.items(), itertools.cycle(ALLE_KLEUREN[1:])):
+        lasten = alle_data["lasten"][:aantal_maanden]
+        maandelijks.plot(x_waarden, lasten, label=naam, color=kleur)
+        y_bereik_maandelijks += [float(np.min(lasten)), float(np.max(lasten))]
+        for veld, stijl in (("restschuld", "-"), ("voordeel_nu_kopen_ipv_altijd_huren", "--")):
+            y_waarden = alle_data[veld][:aantal_maanden]
+            totaal.plot(x_waarden, y_waarden, stijl, label=f"{naam}: {_label(veld).lower()}", color=kleur)
+            y_bereik_totaal += [float(np.min(y_waarden)), float(np.max(y_waarden))]
+
+    maandelijks.set_ylabel("Lasten per maand in euro")
+    totaal.set_xlabel("Jaar na aankoop")
+    totaal.set_ylabel("Totaal bedrag in euro (x1000)")
+    y_ticks_totaal = list(range(int(np.floor(min(y_bereik_totaal) / 100_000)) * 100_000, int(max(y_bereik_totaal)),
+                                100_000))
+    _zet_assen(maandelijks, x_waarden, x_labels, y_bereik_maandelijks,
+               list(range(0, int(max(y_bereik_maandelijks)), 250)), 1)
+    _zet_assen(totaal, x_waarden, x_labels, y_bereik_totaal, y_ticks_totaal, 1000)
+    for axis in (maandelijks, totaal):
+        axis.grid(True, axis="y")
+        axis.legend(loc="upper left", fontsize="small")
+    figuur.subplots_adjust(left=0.05, right=0.98, top=0.95, bottom=0.10, hspace=0.1)
+    return figuur
@@ -0,0 +1,111 @@
+"""In deze module zit het tekstuele overzicht van de berekening op het scherm. Deze module wordt alleen geladen als het
+programma vanaf de command-line gebruikt wordt, de berekening zelf geeft geen output op het scherm."""
+import math
+from pathlib import Path
+from typing import Mapping
+
+import gegevens
+from src import data
+from src import hypotheek
+
+
+def print_aankoop(gegeven: gegevens.Gegevens, samenvatting: data.Samenvatting) -> None:
+    """Overzichtje van de gegevens bij aankoop en de daaruit afgeleidde hypotheek."""
+    kosten_bruto = samenvatting.kosten_bruto
+    kosten_netto = samenvatting.kosten_netto
+    hypotheek_schuld_percentage = samenvatting.hypotheek_schuld / gegeven.kosten_huis
+    print("*----------------- AANKOOP --------------*")
+    print(f"*         Huisprijs: {gegeven.kosten_huis:7.0f} euro        *")
+    print(f"*         Belasting: {samenvatting.kosten_belasting:7.0f} euro ({gegeven.kk_belasting_percentage:.1f}%) *")
+    print(f"*           Notaris: {gegeven.kosten_notaris:7.0f} euro        *")
+    print(f"*          Makelaar: {gegeven.kosten_makelaar:7.0f} euro        *")
+    print(f"*         Hypotheek: {gegeven.kosten_hypotheek:7.0f} euro        *")
+    print(f"*           Taxatie: {gegeven.kosten_taxatie:7.0f} euro        *")
+    print(f"*     Bouwk.rapport: {gegeven.kosten_bouwkundig_rapport:7.0f} euro        *")
+    print(f"*           Overige: {gegeven.kosten_overig + gegeven.kosten_overig_aftrekbaar:7.0f} euro        *")
+    print("*                    ------- +           *")
+    print(f"*             Bruto: {kosten_bruto:7.0f} euro (+{((kosten_bruto / gegeven.kosten_huis) - 1) * 100:3.1f}%)*")
+    print(f"* Belastingvoordeel: {samenvatting.bel_voordeel_koop:7.0f} euro        *")
+    print("*                    ------- +           *")
+    print(f"*             Netto: {kosten_netto:7.0f} euro (+{((kosten_netto / gegeven.kosten_huis) - 1) * 100:3.1f}%)*")
+    print("*----------------------------------------*")
+    print("") # 400 * (1 + x) = 410 =----> x = 410 / 400 - 1
+    print("*----------------- HYPOTHEEK ------------*")
+    if gegeven.leningdelen:
+        print(f"*          Looptijd: {gegeven.looptijd_hypotheek_jaren:2.0f} jaar             *")
+        print_leningdelen(gegeven, samenvatting)
+    else:
+        rente_vast_jaren = gegeven.rente_vast_jaren
+        print(f"*              Vorm: {gegeven.hypotheek_vorm.value:20s}*")
+        print(f"*          Looptijd: {gegeven.looptijd_hypotheek_jaren:2.0f} jaar             *")
+        print(f"*          Rente #1: {gegeven.hypotheek_rente_percentage:4.2f}% (tot {rente_vast_jaren} jaar) *")
+        print(f"*          Rente #2: {gegeven.rente_percentage_nadien:4.2f}% (na {rente_vast_jaren} jaar)  *")
+    if gegeven.aflossingsvrij_deel != 0.0 and not gegeven.leningdelen:
+        print(f"*    Aflossingsvrij: {gegeven.aflossingsvrij_deel:3.1f}% a {gegeven.rente_percentage_aflossingsvrij:4.2f}% rente *")  # pylint: disable=line-too-long
+    print("*                                        *")
+    print(f"*      Bruto kosten: {kosten_bruto:7.0f} euro        *")
+    print(f"*       Eigen inleg: {gegeven.eigen_inleg:7.0f} euro        *")
+    print("*                    ------- -           *")
+    hypotheek_schuld = samenvatting.hypotheek_schuld
+    print(f"*         Hypotheek: {hypotheek_schuld:7.0f} euro ({hypotheek_schuld_percentage * 100:3.0f}%) *")
+    print("*----------------------------------------*")
+
+
+def print_leningdelen(gegeven: gegevens.Gegevens, samenvatting: data.Samenvatting) -> None:
+    """Overzichtje van alle leningdelen van de hypotheek."""
+    bedragen = hypotheek.leningdeel_bedragen(gegeven.leningdelen, samenvatting.hypotheek_schuld)
+    for nummer, (deel, bedrag) in enumerate(zip(gegeven.leningdelen, bedragen), 1):
+        rente_nadien = (deel.hypotheek_rente_percentage if deel.rente_percentage_nadien is None
+                        else deel.rente_percentage_nadien)
+        print("*                                        *")
+        print(f"*      Leningdeel {nummer}: {bedrag:7.0f} euro        *")
+        print(f"*              Vorm: {deel.hypotheek_vorm.value:20s}*")
+        print(f"*          Rente #1: {deel.hypotheek_rente_percentage:4.2f}% (tot {deel.rente_vast_jaren} jaar) *")
+        print(f"*          Rente #2: {rente_nadien:4.2f}% (na {deel.rente_vast_jaren} jaar)  *")
+
+
+def print_totalen(gegeven: gegevens.Gegevens, samenvatting: data.Samenvatting) -> None:
+    """Overzichtje van gegevens achteraf, na de looptijd van de hypotheek."""
+    print("")
+    print(f"*----------------- NA {gegeven.looptijd_hypotheek_jaren} JAAR -----------*")
+    print(f"*            Restschuld: {math.ceil(samenvatting.restschuld):7.0f} euro    *")
+    print("*                                        *")
+    print(f"*  Betaalde rente bruto: {samenvatting.betaalde_rente_bruto:7.0f} euro    *")
+    print(f"*  Totaal bel. voordeel: {samenvatting.totaal_belasting_voordeel:7.0f} euro    *")
+    print("*                        ------- -       *")
+    print(f"*  Betaalde rente netto: {samenvatting.betaalde_rente_netto:7.0f} euro    *")
+    print("*                                        *")
+    print(f"*Betaalde EWF belasting: {samenvatting.betaalde_ewf_belasting:7.0f} euro    *")
+    print("*----------------------------------------*")
+
+
+def print_vergelijking(gegeven: gegevens.Gegevens, samenvattingen: Mapping[str, data.Samenvatting]) -> None:
+    """Overzichtje van de totalen na de looptijd van de hypotheek voor elke variant van een vergelijking."""
+    print("")
+    print(f"*------------- VERGELIJKING {gegeven.looptijd_hypotheek_jaren} JAAR -------*")
+    for nummer, (naam, samenvatting) in enumerate(samenvattingen.items()):
+        if nummer > 0:
+            print("*                                        *")
+        print(f"* {naam:38s} *")
+        print(f"*            Restschuld: {math.ceil(samenvatting.restschuld):7.0f} euro    *")
+        print(f"*  Betaalde rente netto: {samenvatting.betaalde_rente_netto:7.0f} euro    *")
+        print(f"*Betaalde EWF belasting: {samenvatting.betaalde_ewf_belasting:7.0f} euro    *")
+    print("*----------------------------------------*")
+
+
+def print_output(csv_bestand: Path, plot_bestand: Path) -> None:
+    """Overzichtje van de bestanden die gemaakt zijn."""
+    print("")
+    print("*------------------- OUTPUT -------------*")
+    print(f"*     Alle data als CSV: {str(csv_bestand):15s} *")
+    print(f"*      Data als grafiek: {str(plot_bestand):15s} *")
+    print("*----------------------------------------*")
+
+
+def print_scenarios(aantal: int, csv_bestand: Path) -> None:
+    """Overzichtje van de doorgerekende scenario's uit een bestand."""
+    print("")
+    print("*------------------- OUTPUT -------------*")
+    print(f"*     Aantal scenario's: {aantal:<15d} *")
+    print(f"*        Samenvattingen: {str(csv_bestand):15s} *")
+    print("*----------------------------------------*")
@@ -0,0 +1,188 @@
+"""Scenario's uit een bestand: in plaats van de standaard waarden in gegevens.py aan te passen kan elke regel van een
+bestand een scenario zijn, met alleen de gegevens die afwijken van de standaard waarden. Ondersteund zijn CSV (een
+kolom per gegeven, een lege cel is de standaard waarde), JSON-lines (een object per regel) en TOML (een tabel
+[[scenario]] per scenario). Het hele bestand wordt eerst gecontroleerd, daarna worden de scenario's in blokken van een
+vaste grootte doorgerekend en wordt per scenario een regel met de samenvatting weggeschreven. Zo blijft het geheugen
+begrensd, ook voor bestanden met miljoenen scenario's."""
+import csv
+import itertools
+import json
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Mapping, Sequence, Tuple
+
+import numpy as np
+
+import gegevens
+from src import data
+from src import hypotheek
+from src import meting
+from src import vector
+
+# Het type van elk gegeven, om de waarden uit een bestand naar om te zetten
+VELD_TYPES: Dict[str, Any] = dict(gegevens.Gegevens.__annotations__)
+LENINGDEEL_TYPES: Dict[str, Any] = dict(gegevens.Leningdeel.__annotations__)
+
+# De kolommen van het bestand met samenvattingen, na het nummer van het scenario
+SAMENVATTING_WAARDEN = data.Samenvatting._fields
+
+# Een scenario met het nummer van de regel (of bij TOML van de tabel) in het bestand, voor de foutmeldingen
+Rij = Tuple[int, Dict[str, Any]]
+
+
+def lees_rijen(file_name: Path) -> Iterator[Rij]:
+    """Leest de regels van een scenario bestand een voor een in, met de ruwe waarden per gegeven. Het formaat volgt uit
+    de extensie: .csv, .jsonl (of .ndjson) of .toml. Een TOML bestand wordt in een keer ingelezen, de andere formaten
+    regel voor regel."""
+    extensie = file_name.suffix.lower()
+    if extensie == ".csv":
+        with file_name.open(newline="") as file:
+            lezer = csv.DictReader(file)
+            for rij in lezer:
+                if None in rij:
+                    raise RuntimeError(f"{file_name}, regel {lezer.line_num}: meer waarden dan kolommen")
+                yield lezer.line_num, {naam: waarde for naam, waarde in rij.items() if waarde not in ("", None)}
+    elif extensie in (".jsonl", ".ndjson"):
+        with file_name.open() as file:
+            for regel, tekst in enumerate(file, start=1):
+                if not tekst.strip():
+                    continue
+                try:
+                    rij = json.loads(tekst)
+                except ValueError as fout:
+                    raise RuntimeError(f"{file_name}, regel {regel}: ongeldige JSON ({fout})") from fout
+                if not isinstance(rij, dict):
+                    raise RuntimeError(f"{file_name}, regel {regel}: een scenario moet een JSON object zijn")
+                yield regel, rij
+    elif extensie == ".toml":
+        import toml  # pylint: disable=import-outside-toplevel
+        with file_name.open() as file:
+            inhoud = toml.load(file)
+        yield from enumerate(inhoud.get("scenario", []), start=1)
+    else:
+        raise RuntimeError(f"Het formaat van '{file_name}' wordt niet ondersteund, gebruik .csv, .jsonl of .toml")
+
+
+def maak_scenario(velden: Mapping[str, Any]) -> gegevens.Gegevens:
+    """Zet de ruwe waarden van een regel om naar gegevens, met de standaard waarden voor alles wat ontbreekt. Geeft een
+    foutmelding bij onbekende gegevens, ongeldige waarden of een eigen inleg die de kosten koper niet dekt."""
+    onbekend = sorted(set(velden) - set(VELD_TYPES))
+    if onbekend:
+        raise RuntimeError(f"Onbekende gegevens: {', '.join(onbekend)}")
+    gegeven = gegevens.Gegevens(**{naam: _zet_om(naam, VELD_TYPES[naam], waarde) for naam, waarde in velden.items()})
+    if gegeven.looptijd_hypotheek_jaren < 1:
+        raise RuntimeError("De looptijd van de hypotheek moet minstens een jaar zijn")
+    if not 0.0 <= gegeven.aflossingsvrij_deel <= 100.0:
+        raise RuntimeError("Het aflossingsvrije deel moet tussen 0 en 100 procent liggen")
+    aankoop = hypotheek.bereken_aankoop(gegeven)
+    if gegeven.leningdelen:
+        hypotheek.leningdeel_bedragen(gegeven.leningdelen, aankoop.hypotheek_schuld)
+    return gegeven
+
+
+def _zet_om(naam: str, veld_type: Any, waarde: Any) -> Any:
+    """Zet een ruwe waarde (tekst uit een CSV bestand of een JSON/TOML waarde) om naar het type van het gegeven."""
+    # pylint: disable=too-many-return-statements
+    if naam == "leningdelen":
+        if isinstance(waarde, str):  # in een CSV bestand staan de leningdelen als JSON in een cel
+            waarde = json.loads(waarde)
+        if not isinstance(waarde, list):
+            raise RuntimeError("De leningdelen moeten een lijst zijn")
+        return tuple(_leningdeel(deel) for deel in waarde)
+    opties: Tuple[Any, ...] = getattr(veld_type, "__args__", ())
+    if type(None) in opties:  # een Optional veld mag leeg blijven, anders gaat het om het type zonder None
+        if waarde is None:
+            return None
+        veld_type = opties[0]
+    if veld_type is gegevens.HypotheekVorm:
+        return _hypotheek_vorm(waarde)
+    if veld_type is bool:
+        if not isinstance(waarde, bool):
+            raise RuntimeError(f"De waarde voor {naam} moet true of false zijn: '{waarde}'")
+        return waarde
+    if isinstance(waarde, bool):
+        raise RuntimeError(f"Ongeldige waarde voor {naam}: {waarde}")
+    try:
+        getal = float(waarde)
+    except (TypeError, ValueError) as fout:
+        raise RuntimeError(f"Ongeldige waarde voor {naam}: '{waarde}'") from fout
+    if veld_type is int:
+        if not getal.is_integer():
+            raise RuntimeError(f"De waarde voor {naam} moet een geheel getal zijn: '{waarde}'")
+        return int(getal)
+    return getal
+
+
+def _hypotheek_vorm(waarde: Any) -> gegevens.HypotheekVorm:
+    """De hypotheekvorm bij een naam (zoals 'Lineair') of een waarde (zoals 'Lineairehypotheek')."""
+    for vorm in gegevens.HypotheekVorm:
+        if waarde in (vorm.name, vorm.value):
+            return vorm
+    raise RuntimeError(f"Onbekende hypotheekvorm '{waarde}', kies uit: {', '.join(gegevens.HypotheekVorm.__members__)}")
+
+
+def _leningdeel(velden: Any) -> gegevens.Leningdeel:
+    """Een leningdeel uit een JSON object (of TOML tabel) met de velden van gegevens.Leningdeel, elk omgezet naar het
+    type van dat veld (zie _zet_om)."""
+    if not isinstance(velden, dict) or "hypotheek_vorm" not in velden:
+        raise RuntimeError("Een leningdeel moet een object met minstens een hypotheek_vorm zijn")
+    onbekend = sorted(set(velden) - set(gegevens.Leningdeel._fields))
+    if onbekend:
+        raise RuntimeError(f"Onbekende velden van een leningdeel: {', '.join(onbekend)}")
+    return gegevens.Leningdeel(**{naam: _zet_om(f"{naam} van een leningdeel", LENINGDEEL_TYPES[naam], waarde)
+                                  for naam, waarde in velden.items()})
+
+
+def lees_scenarios(file_name: Path) -> Iterator[gegevens.Gegevens]:
+    """Leest de scenario's een voor een in (zie lees_rijen en maak_scenario). Een fout vermeldt de regel in het
+    bestand."""
+    for regel, velden in lees_rijen(file_name):
+        try:
+            yield maak_scenario(velden)
+        except (RuntimeError, TypeError, ValueError) as fout:
+            raise RuntimeError(f"{file_name}, regel {regel}: {fout}") from fout
+
+
+def controleer(file_name: Path) -> int:
+    """Controleert alle scenario's in een bestand, zonder ze door te rekenen of te bewaren. Het resultaat is het aantal
+    scenario's, bij de eerste fout volgt een foutmelding met de regel in het bestand."""
+    return sum(1 for _ in lees_scenarios(file_name))
+
+
+def bereken_samenvattingen(scenarios: Sequence[gegevens.Gegevens]) -> np.ndarray:
+    """Berekent de samenvatting van een blok van scenario's. Scenario's met dezelfde looptijd worden gestapeld en in
+    een keer berekend (zie vector.stapel_gegevens), voor scenario's met leningdelen moet ook het aantal leningdelen
+    gelijk zijn. Het resultaat heeft een rij per scenario en een kolom per veld van data.Samenvatting."""
+    samenvattingen = np.empty((len(scenarios), len(SAMENVATTING_WAARDEN)))
+    groepen: Dict[Tuple[int, int], List[int]] = {}
+    for index, scenario in enumerate(scenarios):
+        sleutel = (scenario.looptijd_hypotheek_jaren, len(scenario.leningdelen))
+        groepen.setdefault(sleutel, []).append(index)
+    for indices in groepen.values():
+        groep = [scenarios[index] for index in indices]
+        gegeven = groep[0] if len(groep) == 1 else vector.stapel_gegevens(groep)
+        samenvatting = vector.bereken_samenvatting(gegeven)
+        samenvattingen[indices] = np.column_stack([np.broadcast_to(np.ravel(waarde), len(indices))
+                                                   for waarde in samenvatting])
+    return samenvattingen
+
+
+def evalueer(file_name: Path, uitvoer: Path, scenarios_per_blok: int = 1000) -> int:
+    """Controleert eerst alle scenario's in het bestand (zie controleer), en rekent ze daarna per blok door. Na elk blok
+    worden de samenvattingen als CSV regels weggeschreven, met het nummer van het scenario in de eerste kolom. Het
+    resultaat is het aantal scenario's."""
+    if scenarios_per_blok < 1:
+        raise RuntimeError("Een blok moet minstens een scenario bevatten")
+    with meting.fase("invoer_controle"):
+        aantal = controleer(file_name)
+    scenarios = lees_scenarios(file_name)
+    with uitvoer.open("w", newline="") as file:
+        file.write(",".join(("scenario",) + SAMENVATTING_WAARDEN) + "\n")
+        for eerste in range(0, aantal, scenarios_per_blok):
+            blok = list(itertools.islice(scenarios, scenarios_per_blok))
+            nummers = np.arange(eerste, eerste + len(blok))
+            with meting.fase("maand_loop"):
+                samenvattingen = bereken_samenvattingen(blok)
+            with meting.fase("csv_schrijven"):
+                np.savetxt(file, np.column_stack((nummers, samenvattingen)),
+                           fmt=["%d"] + ["%.2f"] * len(SAMENVATTING_WAARDEN), delimiter=",")
+    return aantal
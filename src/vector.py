@@ -0,0 +1,373 @@
+"""Gevectoriseerde versie van de berekening in main.bereken_gegevens: in plaats van maand voor maand in een Python loop
+worden hier hele kolommen (alle maanden tegelijk) als NumPy arrays berekend. De loop in main.py blijft de referentie,
+deze module moet dezelfde getallen opleveren."""
+import itertools
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+import gegevens
+from src import belasting
+from src import data
+from src import hypotheek
+
+# Per veld van data.MaandData een array met de waarden voor alle maanden
+Kolommen = Dict[str, np.ndarray]
+
+
+def exp_stijging(basis: float, stijging_jaarlijks: Union[float, np.ndarray], jaren: np.ndarray) -> np.ndarray:
+    """Exponentiele stijging van een basis waarde per jaar, waarbij de stijging in procenten is uitgedrukt. De stijging
+    mag ook een array zijn, bijvoorbeeld een kolom met een stijging per scenario."""
+    return basis * np.power(1.0 + stijging_jaarlijks / 100.0, jaren)
+
+
+def lineaire_recurrentie(start: hypotheek.Waarde, factor: np.ndarray, term: np.ndarray) -> np.ndarray:
+    """Lost de recurrente betrekking x[k + 1] = factor[k] * x[k] + term[k] voor alle k tegelijk op met cumulatieve
+    producten en sommen, beginnend bij x = start. Het resultaat bevat de waarde van x na elke stap."""
+    groei = np.cumprod(factor, axis=-1)
+    return groei * (start + np.cumsum(term / groei, axis=-1))
+
+
+def hypotheek_kolommen(gegeven: gegevens.Gegevens, originele_schuld: hypotheek.Waarde,
+                       jaren: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Berekent voor alle maanden tegelijk hetzelfde als hypotheek.bereken_aflossing_en_rente maand voor maand doet. Het
+    resultaat is een 4-tuple met de aflossing, aftrekbare rente, niet aftrekbare rente en restschuld per maand. Dit
+    werkt ook voor gestapelde gegevens (zie stapel_gegevens), het resultaat heeft dan een rij per scenario."""
+    # pylint: disable=too-many-locals
+    lineair = np.asarray(gegeven.hypotheek_vorm == gegevens.HypotheekVorm.Lineair)
+    annuiteiten = np.asarray(gegeven.hypotheek_vorm == gegevens.HypotheekVorm.Annuiteiten)
+    aflossingsvrij = np.asarray(gegeven.hypotheek_vorm == gegevens.HypotheekVorm.Aflossingsvrij)
+    if not np.all(lineair | annuiteiten | aflossingsvrij):
+        raise NotImplementedError(f"De hypotheek vorm '{gegeven.hypotheek_vorm}' wordt niet ondersteund")
+
+    # De rente verandert hooguit eens per jaar, dus de machtsverheffingen worden per jaar gedaan
+    alle_jaren = np.arange(gegeven.looptijd_hypotheek_jaren)
+    rente_percentage = np.where(alle_jaren >= gegeven.rente_vast_jaren, gegeven.rente_percentage_nadien,
+                                gegeven.hypotheek_rente_percentage)
+    rente_per_jaar = np.power(1 + (rente_percentage / 100.0), 1/12.0) - 1
+    maand_rente = rente_per_jaar[..., jaren]
+
+    # Indien een deel aflossingsvrij is wordt alleen over de rest afgelost, zie bereken_aflossing_en_rente
+    aflossingsvrij_deel = gegeven.aflossingsvrij_deel / 100.0
+    aflossend_deel = 1.0 - aflossingsvrij_deel
+    aflossend_origineel = aflossend_deel * originele_schuld
+
+    # De restschuld volgt steeds uit: restschuld[k + 1] = factor[k] * restschuld[k] + term[k]
+    aflossing_lineair = (aflossend_origineel / gegeven.looptijd_hypotheek_jaren) / 12.0
+    looptijd_hypotheek_maanden = gegeven.looptijd_hypotheek_jaren * 12
+    with np.errstate(divide="ignore", invalid="ignore"):  # een rente van 0% kan alleen niet voor annuiteiten
+        maand_lasten = (aflossend_origineel * rente_per_jaar /
+                        (1 - np.power(1 + rente_per_jaar, -looptijd_hypotheek_maanden)))[..., jaren]
+    factor = np.where(annuiteiten, 1 + aflossend_deel * maand_rente, 1.0)
+    term = np.where(lineair, -aflossing_lineair, np.where(annuiteiten, -maand_lasten, 0.0))
+
+    rest_schuld = lineaire_recurrentie(originele_schuld, factor, term)
+    schuld_begin_maand = np.concatenate((np.broadcast_to(originele_schuld, rest_schuld.shape[:-1] + (1,)),
+                                         rest_schuld[..., :-1]), axis=-1)
+    rente = schuld_begin_maand * maand_rente
+
+    aflossing = np.where(lineair, aflossing_lineair, np.where(annuiteiten, maand_lasten - aflossend_deel * rente, 0.0))
+    aftrekbare_rente = np.where(aflossingsvrij, 0.0, aflossend_deel * rente)
+    niet_aftrekbare_rente = np.where(aflossingsvrij, aflossend_deel * rente, aflossingsvrij_deel * rente)
+    return aflossing, aftrekbare_rente, niet_aftrekbare_rente, rest_schuld
+
+
+def _kolom(waarden: Sequence[Any], dtype: Any = None) -> np.ndarray:
+    """Een kolom-array met een rij per waarde, zoals de velden van gestapelde gegevens."""
+    return np.array(waarden, dtype=dtype)[:, np.newaxis]
+
+
+def leningdeel_kolommen(gegeven: gegevens.Gegevens, hypotheek_schuld: hypotheek.Waarde,
+                        jaren: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Als hypotheek_kolommen, maar dan voor elk leningdeel (zie gegevens.Leningdeel): het resultaat is een 4-tuple met
+    de aflossing, aftrekbare rente, niet aftrekbare rente en restschuld met een rij per leningdeel en een kolom per
+    maand. Alle leningdelen worden in een keer berekend door ze als gestapelde gegevens door hypotheek_kolommen te
+    halen. Voor gestapelde gegevens (zie stapel_gegevens) is de hypotheekschuld een kolom met een rij per scenario, en
+    hebben ook de velden van de leningdelen een rij per scenario of een enkele waarde voor alle scenario's (ook als
+    alleen de velden van de leningdelen een rij per scenario hebben, zoals bij montecarlo.trek_gegevens). Het resultaat
+    heeft dan de vorm leningdeel x scenario x maand."""
+    leningdelen = gegeven.leningdelen
+    vorm = (1,) * max([np.ndim(hypotheek_schuld), 1] + [getattr(waarde, "ndim", 0) for deel in leningdelen
+                                                        for waarde in deel])
+
+    def delen_kolom(waarden: Sequence[Any], dtype: Any = None) -> np.ndarray:
+        """Een array met een rij per leningdeel, met daarbinnen de vorm van de hypotheekschuld."""
+        kolom = np.array(waarden, dtype=dtype)
+        return kolom.reshape(kolom.shape + vorm) if kolom.ndim == 1 else kolom
+
+    if np.ndim(hypotheek_schuld) == 0:
+        bedragen = delen_kolom(hypotheek.leningdeel_bedragen(leningdelen, float(hypotheek_schuld)))
+    else:
+        bedragen = hypotheek.leningdeel_bedragen_gestapeld(
+            delen_kolom([np.nan if deel.bedrag is None else deel.bedrag for deel in leningdelen], dtype=np.float64),
+            np.asarray(hypotheek_schuld))
+
+    velden: Dict[str, Any] = {
+        "hypotheek_vorm": delen_kolom([deel.hypotheek_vorm for deel in leningdelen], dtype=object),
+        "hypotheek_rente_percentage": delen_kolom([deel.hypotheek_rente_percentage for deel in leningdelen]),
+        "rente_vast_jaren": delen_kolom([deel.rente_vast_jaren for deel in leningdelen]),
+        "rente_percentage_nadien": delen_kolom([rente_nadien(deel) for deel in leningdelen]),
+        "looptijd_hypotheek_jaren": gegeven.looptijd_hypotheek_jaren,
+        "aflossingsvrij_deel": 0.0,
+    }
+    delen = gegevens.Gegevens(**velden)
+    aflossing, aftrekbare_rente, niet_aftrekbare_rente, rest_schuld = hypotheek_kolommen(delen, bedragen, jaren)
+
+    # Welke delen aftrekbaar zijn, standaard alles behalve aflossingsvrije delen
+    aftrekbaar = delen_kolom([is_aftrekbaar(deel) for deel in leningdelen])
+    rente = aftrekbare_rente + niet_aftrekbare_rente
+    return aflossing, np.where(aftrekbaar, rente, 0.0), np.where(aftrekbaar, 0.0, rente), rest_schuld
+
+
+def rente_nadien(deel: gegevens.Leningdeel) -> Any:
+    """De rente van een leningdeel na de rentevaste periode, zonder rente nadien blijft de rente gelijk."""
+    return deel.hypotheek_rente_percentage if deel.rente_percentage_nadien is None else deel.rente_percentage_nadien
+
+
+def is_aftrekbaar(deel: gegevens.Leningdeel) -> Any:
+    """Of de rente van een leningdeel aftrekbaar is, standaard alles behalve aflossingsvrije delen."""
+    if deel.aftrekbaar is None:
+        return np.asarray(deel.hypotheek_vorm != gegevens.HypotheekVorm.Aflossingsvrij)
+    return deel.aftrekbaar
+
+
+def rente_paden_per_maand(rente_paden: np.ndarray, looptijd_hypotheek_jaren: int, per_jaar: bool = False) -> np.ndarray:
+    """Zet een of meer rentepaden (een rij per pad met een rentepercentage per maand, of per jaar als 'per_jaar' aan
+    staat) om naar een 2-D array met een rij per pad en een rentepercentage voor elke maand van de looptijd. Een pad dat
+    korter is dan de looptijd wordt aangevuld met het laatste percentage."""
+    paden = np.atleast_2d(np.asarray(rente_paden, dtype=np.float64))
+    if per_jaar:
+        paden = np.repeat(paden, 12, axis=-1)
+    looptijd_hypotheek_maanden = looptijd_hypotheek_jaren * 12
+    if paden.shape[-1] < looptijd_hypotheek_maanden:
+        paden = np.pad(paden, ((0, 0), (0, looptijd_hypotheek_maanden - paden.shape[-1])), mode="edge")
+    return paden[:, :looptijd_hypotheek_maanden]
+
+
+def standaard_rente_pad(gegeven: gegevens.Gegevens) -> np.ndarray:
+    """Het rentepad dat hoort bij de gegevens: de rente tot het einde van de rentevaste periode en de rente nadien."""
+    jaren = np.repeat(np.arange(gegeven.looptijd_hypotheek_jaren), 12)
+    return np.where(jaren >= gegeven.rente_vast_jaren, gegeven.rente_percentage_nadien,
+                    gegeven.hypotheek_rente_percentage)
+
+
+def rollende_paden(reeks: np.ndarray, lengte: int, stap: int = 1) -> np.ndarray:
+    """Maakt van een lange reeks (bijvoorbeeld historische rentes per maand) alle paden van de gegeven lengte, elk
+    'stap' maanden later beginnend, zonder de reeks te kopieren. Het resultaat heeft een rij per pad."""
+    reeks = np.ascontiguousarray(reeks, dtype=np.float64)
+    if len(reeks) < lengte:
+        raise RuntimeError(f"De reeks van {len(reeks)} waarden is korter dan de lengte van een pad ({lengte})")
+    aantal_paden = (len(reeks) - lengte) // stap + 1
+    return np.lib.stride_tricks.as_strided(reeks, shape=(aantal_paden, lengte),
+                                           strides=(reeks.strides[0] * stap, reeks.strides[0]), writeable=False)
+
+
+def rente_pad_kolommen(gegeven: gegevens.Gegevens, originele_schuld: float,
+                       rente_paden: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Als hypotheek_kolommen, maar met een eigen rentepercentage voor elke maand in plaats van alleen een rente tot en
+    na de rentevaste periode. De rentepaden hebben een rij per pad en een kolom per maand (zie rente_paden_per_maand),
+    het resultaat ook. Bij een annuiteitenhypotheek wordt de maandbetaling bij elke renteverandering opnieuw berekend
+    over de restschuld en de resterende looptijd. De rente per maand en de annuiteitsfactoren worden vooraf voor alle
+    paden in een keer berekend, daarna wordt voor alle paden tegelijk maand voor maand de restschuld bijgehouden."""
+    # pylint: disable=too-many-locals
+    if gegeven.hypotheek_vorm not in (gegevens.HypotheekVorm.Lineair, gegevens.HypotheekVorm.Annuiteiten,
+                                      gegevens.HypotheekVorm.Aflossingsvrij):
+        raise NotImplementedError(f"De hypotheek vorm '{gegeven.hypotheek_vorm}' wordt niet ondersteund")
+    maand_rente = np.power(1 + (rente_paden / 100.0), 1/12.0) - 1
+    aantal_paden, aantal_maanden = maand_rente.shape
+    aflossingsvrij_deel = gegeven.aflossingsvrij_deel / 100.0
+    aflossend_deel = 1.0 - aflossingsvrij_deel
+
+    if gegeven.hypotheek_vorm == gegevens.HypotheekVorm.Annuiteiten:
+        resterende_maanden = gegeven.looptijd_hypotheek_jaren * 12 - np.arange(aantal_maanden)
+        with np.errstate(divide="ignore", invalid="ignore"):  # een rente van 0% kan alleen niet voor annuiteiten
+            annuiteit_factor = maand_rente / (1 - np.power(1 + maand_rente, -resterende_maanden))
+        rente_verandert = np.ones(maand_rente.shape, dtype=bool)
+        rente_verandert[:, 1:] = rente_paden[:, 1:] != rente_paden[:, :-1]
+
+        rest_schuld = np.empty(maand_rente.shape)
+        schuld = np.full(aantal_paden, float(originele_schuld))
+        maand_lasten = np.zeros(aantal_paden)
+        for maand in range(aantal_maanden):
+            nieuw = rente_verandert[:, maand]
+            maand_lasten[nieuw] = aflossend_deel * schuld[nieuw] * annuiteit_factor[nieuw, maand]
+            schuld = schuld - (maand_lasten - aflossend_deel * schuld * maand_rente[:, maand])
+            rest_schuld[:, maand] = schuld
+    else:
+        aflossing_lineair = (aflossend_deel * originele_schuld / gegeven.looptijd_hypotheek_jaren) / 12.0
+        if gegeven.hypotheek_vorm == gegevens.HypotheekVorm.Aflossingsvrij:
+            aflossing_lineair = 0.0
+        rest_schuld = np.broadcast_to(originele_schuld - aflossing_lineair * np.arange(1, aantal_maanden + 1),
+                                      maand_rente.shape)
+
+    schuld_begin_maand = np.concatenate((np.full((aantal_paden, 1), float(originele_schuld)), rest_schuld[:, :-1]),
+                                        axis=-1)
+    rente = schuld_begin_maand * maand_rente
+    aflossing = schuld_begin_maand - rest_schuld
+    if gegeven.hypotheek_vorm == gegevens.HypotheekVorm.Aflossingsvrij:
+        return aflossing, np.zeros(rente.shape), aflossend_deel * rente, rest_schuld
+    return aflossing, aflossend_deel * rente, aflossingsvrij_deel * rente, rest_schuld
+
+
+def bereken_kolommen(gegeven: gegevens.Gegevens, rente_paden: Optional[np.ndarray] = None,
+                     tabellen: belasting.BelastingTabellen = belasting.TABELLEN) -> Kolommen:
+    """Berekent alle gegevens zoals main.bereken_gegevens, maar dan zonder output op het scherm en per kolom. Het
+    resultaat is een dictionary met voor elk veld van data.MaandData een array met de waarden voor alle maanden. Voor
+    gestapelde gegevens (zie stapel_gegevens) heeft elke array een rij per scenario en een kolom per maand. Met
+    rentepaden (zie rente_paden_per_maand) wordt de rente per maand uit de paden gebruikt in plaats van de rente uit de
+    gegevens, en heeft elke array een rij per pad. De belastingregels komen uit de opgegeven belastingtabellen (zie
+    belasting.laad_tabellen), standaard die uit belastingtabellen.json."""
+    # pylint: disable=too-many-locals
+    aankoop = hypotheek.bereken_aankoop(gegeven)
+
+    alle_jaren = np.arange(gegeven.looptijd_hypotheek_jaren)
+    jaren = np.repeat(alle_jaren, 12)
+    maanden = np.tile(np.arange(12), gegeven.looptijd_hypotheek_jaren)
+
+    # De hypotheek, bij leningdelen de som van alle delen
+    if gegeven.leningdelen:
+        if rente_paden is not None:
+            raise NotImplementedError("Rentepaden worden niet ondersteund in combinatie met leningdelen")
+        aflossing, aftrekbare_rente, niet_aftrekbare_rente, rest_schuld = (
+            kolom.sum(axis=0) for kolom in leningdeel_kolommen(gegeven, aankoop.hypotheek_schuld, jaren)
+        )
+    elif rente_paden is None:
+        aflossing, aftrekbare_rente, niet_aftrekbare_rente, rest_schuld = hypotheek_kolommen(
+            gegeven, aankoop.hypotheek_schuld, jaren
+        )
+    else:
+        aflossing, aftrekbare_rente, niet_aftrekbare_rente, rest_schuld = rente_pad_kolommen(
+            gegeven, aankoop.hypotheek_schuld, rente_paden
+        )
+
+    # Belastingvoordeel (HRA) en nadeel (EWF), met de belastingregels eenmalig per jaar opgezocht
+    regime = belasting.regime_voor(gegeven, tabellen)
+    hypotheek_rente_aftrek = regime.hra(aftrekbare_rente, jaren)
+    woz_waarde = exp_stijging(gegeven.woz_waarde, gegeven.woz_stijging_jaarlijks_percentage,
+                              alle_jaren)[..., jaren]
+    hoogte_eigenwoningforfait = regime.ewf(woz_waarde, jaren)
+    belasting_voordeel, belasting_nadeel = regime.bereken(hypotheek_rente_aftrek, hoogte_eigenwoningforfait, jaren)
+
+    onderhoud = exp_stijging(gegeven.onderhoud_per_maand, gegeven.inflatie_jaarlijks_percentage,
+                             alle_jaren)[..., jaren]
+    rente_netto = aftrekbare_rente + niet_aftrekbare_rente - belasting_voordeel
+    kosten_zonder_aflossing = rente_netto + belasting_nadeel + onderhoud
+
+    # Verschil ten opzichte van huren
+    oude_huur = exp_stijging(gegeven.huur_per_maand, gegeven.huurstijging_jaarlijks_percentage,
+                             alle_jaren)[..., jaren]
+    voordeel_kopen_ipv_huren = np.cumsum(oude_huur - kosten_zonder_aflossing, axis=-1)
+    eenmalige_kosten_kopen = aankoop.kosten_niet_aftrekbaar + aankoop.kosten_aftrekbaar - aankoop.bel_voordeel_koop
+
+    # Extra sparen (los van de hypotheek)
+    extra_spaarinleg = np.zeros(rest_schuld.shape) + gegeven.extra_spaarinleg_per_maand
+    spaar_factor = np.zeros(rest_schuld.shape) + (1 + gegeven.rendement_jaarlijks_percentage / (12 * 100.0))
+    gespaard_geld = lineaire_recurrentie(0.0, spaar_factor, extra_spaarinleg)
+
+    kolommen = {
+        "jaar": jaren,
+        "maand": maanden,
+        "aflossing": aflossing,
+        "restschuld": rest_schuld,
+        "rente": aftrekbare_rente + niet_aftrekbare_rente,
+        "hypotheek_rente_aftrek": hypotheek_rente_aftrek,
+        "belasting_voordeel": belasting_voordeel,
+        "hoogte_eigenwoningforfait": hoogte_eigenwoningforfait,
+        "rente_netto": rente_netto,
+        "woz_waarde": woz_waarde,
+        "belasting_nadeel": belasting_nadeel,
+        "onderhoudskosten": onderhoud,
+        "extra_spaarinleg_per_maand": extra_spaarinleg,
+        "lasten": kosten_zonder_aflossing + aflossing + extra_spaarinleg,
+        "oude_huur": oude_huur,
+        "voordeel_nu_kopen_ipv_voorlopig_huren": voordeel_kopen_ipv_huren,
+        "voordeel_nu_kopen_ipv_altijd_huren": voordeel_kopen_ipv_huren - eenmalige_kosten_kopen,
+        "gespaard_geld": gespaard_geld,
+    }
+    return {naam: np.broadcast_to(kolom, rest_schuld.shape) for naam, kolom in kolommen.items()}
+
+
+def bereken_samenvatting(gegeven: gegevens.Gegevens) -> data.Samenvatting:
+    """Berekent de samenvatting zoals main.bereken die geeft, zonder de data per maand te bewaren. Voor gestapelde
+    gegevens is elk veld van de samenvatting een array met een waarde per scenario."""
+    aankoop = hypotheek.bereken_aankoop(gegeven)
+    kolommen = bereken_kolommen(gegeven)
+    totalen = (
+        kolommen["restschuld"][..., -1],
+        kolommen["rente"].sum(axis=-1),
+        kolommen["belasting_voordeel"].sum(axis=-1),
+        kolommen["rente_netto"].sum(axis=-1),
+        kolommen["belasting_nadeel"].sum(axis=-1),
+    )
+    return data.Samenvatting._make([np.ravel(waarde) if np.ndim(waarde) > 0 else waarde for waarde in aankoop] +
+                                   list(totalen))
+
+
+def stapel_gegevens(alle_gegevens: Sequence[gegevens.Gegevens]) -> gegevens.Gegevens:
+    """Zet een lijst van gegevens om naar een enkel gegevens-object waarin elk veld een kolom-array is met een rij per
+    scenario. Zo kunnen alle scenario's in een keer door bereken_kolommen berekend worden. De looptijd moet voor alle
+    scenario's gelijk zijn, zodat het resultaat een 2-D array (scenario x maand) kan zijn. Hetzelfde geldt voor het
+    aantal leningdelen: elk leningdeel wordt een gegevens.Leningdeel met een kolom-array per veld (zie
+    stapel_leningdelen)."""
+    if not alle_gegevens:
+        raise RuntimeError("Er moet minstens een scenario opgegeven worden")
+    velden = dict(zip(gegevens.Gegevens._fields, zip(*alle_gegevens)))
+    leningdelen = stapel_leningdelen(velden.pop("leningdelen"))
+    looptijden = set(velden.pop("looptijd_hypotheek_jaren"))
+    if len(looptijden) != 1:
+        raise RuntimeError(f"De looptijd moet voor alle scenario's gelijk zijn, gevonden: {sorted(looptijden)}")
+
+    kolommen: Dict[str, Any] = {naam: _kolom(waarden, dtype=object if naam == "hypotheek_vorm" else None)
+                                for naam, waarden in velden.items()}
+    return gegevens.Gegevens(looptijd_hypotheek_jaren=looptijden.pop(), leningdelen=leningdelen, **kolommen)
+
+
+def stapel_leningdelen(alle_leningdelen: Sequence[Tuple[gegevens.Leningdeel, ...]]) -> Tuple[gegevens.Leningdeel, ...]:
+    """Stapelt de leningdelen van een reeks scenario's met hetzelfde aantal leningdelen: het n-de leningdeel van het
+    resultaat heeft voor elk veld een kolom-array met het n-de leningdeel van elk scenario. Een leeg bedrag wordt NaN
+    (zie hypotheek.leningdeel_bedragen_gestapeld), een lege rente nadien en aftrekbaarheid krijgen hun standaard
+    waarde."""
+    aantallen = {len(leningdelen) for leningdelen in alle_leningdelen}
+    if len(aantallen) != 1:
+        raise RuntimeError(f"Het aantal leningdelen moet voor alle scenario's gelijk zijn, "
+                           f"gevonden: {sorted(aantallen)}")
+    gestapeld = []
+    for delen in zip(*alle_leningdelen):
+        velden: Dict[str, Any] = {
+            "hypotheek_vorm": _kolom([deel.hypotheek_vorm for deel in delen], dtype=object),
+            "bedrag": _kolom([np.nan if deel.bedrag is None else deel.bedrag for deel in delen], dtype=np.float64),
+            "hypotheek_rente_percentage": _kolom([deel.hypotheek_rente_percentage for deel in delen]),
+            "rente_vast_jaren": _kolom([deel.rente_vast_jaren for deel in delen]),
+            "rente_percentage_nadien": _kolom([rente_nadien(deel) for deel in delen]),
+            "aftrekbaar": _kolom([is_aftrekbaar(deel) for deel in delen], dtype=bool),
+        }
+        gestapeld.append(gegevens.Leningdeel(**velden))
+    return tuple(gestapeld)
+
+
+def bereken_scenarios(alle_gegevens: Sequence[gegevens.Gegevens],
+                      tabellen: belasting.BelastingTabellen = belasting.TABELLEN) -> Kolommen:
+    """Berekent een hele reeks scenario's in een keer, met de opgegeven belastingtabellen. Het resultaat is een
+    dictionary met voor elk veld van data.MaandData een 2-D array met een rij per scenario en een kolom per maand."""
+    return bereken_kolommen(stapel_gegevens(alle_gegevens), tabellen=tabellen)
+
+
+def bereken_rente_paden(gegeven: gegevens.Gegevens, rente_paden: np.ndarray, per_jaar: bool = False) -> Kolommen:
+    """Berekent een scenario voor een hele reeks rentepaden in een keer, bijvoorbeeld historische rentes (zie
+    io.laad_rente_paden en rollende_paden). Het resultaat heeft voor elk veld een rij per pad en een kolom per maand."""
+    return bereken_kolommen(gegeven, rente_paden_per_maand(rente_paden, gegeven.looptijd_hypotheek_jaren, per_jaar))
+
+
+def scenario_raster(basis: gegevens.Gegevens, **assen: Iterable[Any]) -> List[gegevens.Gegevens]:
+    """Maakt een raster van scenario's door alle combinaties van de opgegeven waarden in te vullen in de basis gegevens,
+    bijvoorbeeld: scenario_raster(gegevens.Gegevens(), kosten_huis=[350_000, 400_000], eigen_inleg=[40_000, 60_000]).
+    De volgorde is die van itertools.product: de laatst opgegeven as varieert het snelst."""
+    namen = list(assen)
+    return [basis._replace(**dict(zip(namen, waarden))) for waarden in itertools.product(*assen.values())]
+
+
+def naar_maand_data(kolommen: Kolommen) -> List[data.MaandData]:
+    """Zet het resultaat van bereken_kolommen om naar een lijst van data per maand, zoals main.bereken_gegevens die
+    teruggeeft, zodat bijvoorbeeld de bestaande CSV en plot functies gebruikt kunnen worden."""
+    rijen = zip(*(kolommen[naam].tolist() for naam in data.MaandData._fields))
+    return [data.MaandData(*rij) for rij in rijen]
@@ -0,0 +1,85 @@
+"""Vergelijking van hypotheekvormen: in plaats van het programma voor elke hypotheekvorm opnieuw te draaien worden alle
+varianten (de drie hypotheekvormen, eventueel met een aflossingsvrij deel) in een keer doorgerekend. Alleen de
+hypotheekvorm en het aflossingsvrije deel zijn per variant een kolom-array (zie vector.stapel_gegevens), zodat alle
+reeksen die niet van de hypotheek afhangen (WOZ-waarde, EWF, onderhoud, huur en de belastingregels) maar een keer
+berekend worden."""
+from io import StringIO
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Sequence
+
+import numpy as np
+
+import gegevens
+from src import data
+from src import hypotheek
+from src import io
+from src import vector
+
+
+class Variant(NamedTuple):
+    """Een hypotheekvorm met eventueel een deel (in procenten) aflossingsvrij."""
+    hypotheek_vorm: gegevens.HypotheekVorm
+    aflossingsvrij_deel: float = 0.0
+
+    def naam(self) -> str:
+        """De naam van de variant in de CSV en de legenda, zoals 'Lineair' of 'Annuiteiten 30% aflossingsvrij'."""
+        if self.aflossingsvrij_deel == 0.0:
+            return self.hypotheek_vorm.name
+        return f"{self.hypotheek_vorm.name} {self.aflossingsvrij_deel:g}% aflossingsvrij"
+
+
+# De varianten die standaard vergeleken worden: elke hypotheekvorm zonder aflossingsvrij deel
+STANDAARD_VARIANTEN = tuple(Variant(vorm) for vorm in gegevens.HypotheekVorm)
+
+
+def maak_varianten(aflossingsvrije_delen: Iterable[float] = ()) -> List[Variant]:
+    """De standaard varianten, plus voor elk opgegeven aflossingsvrij deel een lineaire en een annuiteitenhypotheek
+    waarvan dat deel aflossingsvrij is."""
+    varianten = list(STANDAARD_VARIANTEN)
+    for deel in aflossingsvrije_delen:
+        if not 0.0 < deel < 100.0:
+            raise RuntimeError(f"Het aflossingsvrije deel moet tussen 0 en 100 procent liggen, niet {deel}")
+        varianten += [Variant(gegevens.HypotheekVorm.Lineair, deel), Variant(gegevens.HypotheekVorm.Annuiteiten, deel)]
+    return varianten
+
+
+def vergelijk(gegeven: gegevens.Gegevens,
+              varianten: Sequence[Variant] = STANDAARD_VARIANTEN) -> Dict[str, data.MaandKolommen]:
+    """Berekent alle varianten met verder dezelfde gegevens. Het resultaat is per variant (op naam, in de opgegeven
+    volgorde) de data per maand, gelijk aan die van main.bereken voor die variant."""
+    if gegeven.leningdelen:
+        raise NotImplementedError("Een vergelijking van hypotheekvormen wordt niet ondersteund met leningdelen")
+    if not varianten:
+        raise RuntimeError("Er moet minstens een variant opgegeven worden")
+    velden = {
+        "hypotheek_vorm": np.array([variant.hypotheek_vorm for variant in varianten], dtype=object)[:, np.newaxis],
+        "aflossingsvrij_deel": np.array([variant.aflossingsvrij_deel for variant in varianten])[:, np.newaxis],
+    }
+    kolommen = vector.bereken_kolommen(gegeven._replace(**velden))  # type: ignore
+    return {variant.naam(): data.MaandKolommen({naam: kolom[index] for naam, kolom in kolommen.items()})
+            for index, variant in enumerate(varianten)}
+
+
+def samenvattingen(gegeven: gegevens.Gegevens,
+                   resultaten: Dict[str, data.MaandKolommen]) -> Dict[str, data.Samenvatting]:
+    """De samenvatting van elke variant, zoals main.maak_samenvatting die maakt. De kosten bij aankoop zijn voor alle
+    varianten gelijk."""
+    aankoop = hypotheek.bereken_aankoop(gegeven)
+    return {naam: data.Samenvatting(*aankoop, restschuld=float(alle_data["restschuld"][-1]),
+                                    betaalde_rente_bruto=alle_data.som("rente"),
+                                    totaal_belasting_voordeel=alle_data.som("belasting_voordeel"),
+                                    betaalde_rente_netto=alle_data.som("rente_netto"),
+                                    betaalde_ewf_belasting=alle_data.som("belasting_nadeel"))
+            for naam, alle_data in resultaten.items()}
+
+
+def schrijf_naar_csv(resultaten: Dict[str, data.MaandKolommen], file_name: Path) -> None:
+    """Schrijft alle varianten naar een CSV bestand, in het formaat van io.schrijf_naar_csv met de naam van de variant
+    als eerste kolom. De maanden van alle varianten komen onder elkaar."""
+    with file_name.open("w", buffering=io.CSV_BUFFER) as file:
+        file.write("Variant," + io.csv_header())
+        for naam, alle_data in resultaten.items():
+            tabel = np.column_stack([alle_data[kolom] for kolom in ("jaar", "maand") + io.CSV_WAARDEN])
+            regels = StringIO()
+            np.savetxt(regels, tabel, fmt=["%d", "%d"] + ["%.0f"] * len(io.CSV_WAARDEN), delimiter=",")
+            file.writelines(f"{naam},{regel}" for regel in regels.getvalue().splitlines(keepends=True))
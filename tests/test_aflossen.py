@@ -0,0 +1,77 @@
+"""Test van het zoeken naar het beste beleid voor extra aflossen of sparen"""
+import numpy as np
+import pytest
+
+import gegevens
+from src import aflossen
+from src import vector
+
+VARIANTEN = [
+    gegevens.Gegevens(extra_spaarinleg_per_maand=300),
+    gegevens.Gegevens(hypotheek_vorm=gegevens.HypotheekVorm.Lineair, extra_spaarinleg_per_maand=300),
+    gegevens.Gegevens(hypotheek_vorm=gegevens.HypotheekVorm.Aflossingsvrij, extra_spaarinleg_per_maand=250,
+                      rente_percentage_nadien=3.5),
+]
+
+AFLOSSINGSVRIJ = gegevens.Gegevens(hypotheek_vorm=gegevens.HypotheekVorm.Aflossingsvrij,
+                                   rendement_jaarlijks_percentage=0.0)
+
+
+@pytest.mark.parametrize("gegeven", VARIANTEN)
+def test_zonder_extra_aflossing_gelijk_aan_vector(gegeven: gegevens.Gegevens) -> None:
+    """Als alles gespaard wordt moeten de uitkomsten gelijk zijn aan die van de gevectoriseerde berekening."""
+    kolommen = vector.bereken_kolommen(gegeven)
+    resultaat = aflossen.bereken_beleid(gegeven, [aflossen.AflosBeleid()])
+    betaald = np.sum(kolommen["aflossing"] + kolommen["rente_netto"] + kolommen["belasting_nadeel"])
+
+    assert resultaat.restschuld[0] == pytest.approx(kolommen["restschuld"][-1], abs=1e-6)
+    assert resultaat.gespaard_geld[0] == pytest.approx(kolommen["gespaard_geld"][-1], rel=1e-9)
+    assert resultaat.betaalde_rente_netto[0] == pytest.approx(np.sum(kolommen["rente_netto"]), rel=1e-9)
+    assert resultaat.netto_vermogen[0] == pytest.approx(kolommen["gespaard_geld"][-1] - kolommen["restschuld"][-1] -
+                                                        betaald, rel=1e-9)
+    assert resultaat.extra_aflossing[0] == 0.0
+
+
+def test_boetevrij_bedrag() -> None:
+    """Per jaar wordt niet meer dan het boetevrije bedrag afgelost, behalve aan het einde van de rentevaste periode."""
+    gegeven = AFLOSSINGSVRIJ._replace(extra_spaarinleg_per_maand=20_000)
+    schuld = vector.bereken_kolommen(gegeven)["restschuld"][0]
+    resultaat = aflossen.bereken_beleid(gegeven, [aflossen.AflosBeleid(1.0, vanaf_jaar=25)], boetevrij_percentage=10)
+    assert resultaat.extra_aflossing[0] == pytest.approx(0.5 * schuld)
+    assert resultaat.restschuld[0] == pytest.approx(0.5 * schuld)
+
+    # Het gespaarde geld in een keer aflossen, aan het einde van de rentevaste periode (10 jaar) zonder grens
+    gegeven = AFLOSSINGSVRIJ._replace(extra_spaarinleg_per_maand=1000)
+    kandidaten = [aflossen.AflosBeleid(spaargeld_aflossen_jaar=9), aflossen.AflosBeleid(spaargeld_aflossen_jaar=10)]
+    resultaat = aflossen.bereken_beleid(gegeven, kandidaten, boetevrij_percentage=10)
+    assert resultaat.extra_aflossing.tolist() == pytest.approx([0.1 * schuld, 120_000])
+    assert resultaat.gespaard_geld.tolist() == pytest.approx([360_000 - 0.1 * schuld, 240_000])
+
+
+def test_optimaliseer() -> None:
+    """Zonder rendement op het spaargeld is zoveel mogelijk aflossen het beste, met een hoog rendement sparen. Het
+    resultaat is hetzelfde als de blokken over meerdere processen verdeeld worden."""
+    gegeven = gegevens.Gegevens(extra_spaarinleg_per_maand=500, rendement_jaarlijks_percentage=0.0)
+    kandidaten = aflossen.beleid_raster(gegeven, aandelen=[0.0, 0.5, 1.0], vanaf_jaren=[0, 10],
+                                        spaargeld_aflossen_jaren=[None, 5])
+    optimalisatie = aflossen.optimaliseer(gegeven, kandidaten, max_workers=1)
+    assert len(optimalisatie.resultaat.netto_vermogen) == len(kandidaten) == 12
+    assert optimalisatie.beste == aflossen.AflosBeleid(1.0, 0, None)
+
+    parallel = aflossen.optimaliseer(gegeven, kandidaten, kandidaten_per_blok=5, max_workers=2)
+    for naam in aflossen.BeleidResultaat._fields:
+        assert getattr(parallel.resultaat, naam).tolist() == getattr(optimalisatie.resultaat, naam).tolist(), naam
+
+    sparen = aflossen.optimaliseer(gegeven._replace(rendement_jaarlijks_percentage=8.0), kandidaten, max_workers=1)
+    assert sparen.beste == aflossen.AflosBeleid(0.0, 0, None)
+
+
+def test_ongeldige_invoer() -> None:
+    """Een aandeel buiten 0 tot 1, geen kandidaten of leningdelen geven een foutmelding."""
+    with pytest.raises(RuntimeError, match="aandeel"):
+        aflossen.bereken_beleid(gegevens.Gegevens(), [aflossen.AflosBeleid(1.5)])
+    with pytest.raises(RuntimeError, match="kandidaat"):
+        aflossen.optimaliseer(gegevens.Gegevens(), [])
+    leningdelen = (gegevens.Leningdeel(gegevens.HypotheekVorm.Annuiteiten),)
+    with pytest.raises(NotImplementedError):
+        aflossen.bereken_beleid(gegevens.Gegevens(leningdelen=leningdelen), [aflossen.AflosBeleid()])
@@ -0,0 +1,59 @@
+"""Tests voor de analyse functies"""
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+import gegevens
+from src import analyse
+from src import io
+from src import main
+
+
+def test_omslagpunt_gelijk_aan_volledige_berekening() -> None:
+    """De vragen geven dezelfde maand als zoeken in de volledige berekening."""
+    for gegeven in (gegevens.Gegevens(), gegevens.Gegevens(huur_per_maand=1500), gegevens.Gegevens(huur_per_maand=0)):
+        _, alle_data = main.bereken(gegeven)
+        verwacht = [d for d in alle_data if d.voordeel_nu_kopen_ipv_altijd_huren > 0]
+        assert analyse.omslagpunt_kopen(gegeven) == (verwacht[0] if verwacht else None)
+        verwacht = [d for d in alle_data if d.lasten > d.oude_huur]
+        assert analyse.lasten_hoger_dan_huur(gegeven) == (verwacht[0] if verwacht else None)
+
+
+def test_stroom_naar_csv(tmp_path: Path) -> None:
+    """Een stroom van data per maand geeft hetzelfde CSV bestand als de lijst."""
+    gegeven = gegevens.Gegevens()
+    io.schrijf_naar_csv(main.bereken(gegeven)[1], tmp_path / "lijst.csv")
+    io.schrijf_naar_csv(main.stroom(gegeven), tmp_path / "stroom.csv")
+    assert (tmp_path / "lijst.csv").read_text() == (tmp_path / "stroom.csv").read_text()
+
+
+def test_omslagpunt_raster() -> None:
+    """Het raster geeft voor elke combinatie dezelfde maand als de losse berekening."""
+    gegeven = gegevens.Gegevens(huur_per_maand=900)
+    woz_stijgingen, huur_stijgingen = [-5.0, 0.0, 3.0], [-10.0, 0.0, 2.0, 6.0]
+    raster = analyse.omslagpunt_raster(gegeven, woz_stijgingen, huur_stijgingen)
+    assert raster.waarden.shape == (3, 4)
+    for rij, woz_stijging in enumerate(woz_stijgingen):
+        for kolom, huur_stijging in enumerate(huur_stijgingen):
+            omslagpunt = analyse.omslagpunt_kopen(gegeven._replace(woz_stijging_jaarlijks_percentage=woz_stijging,
+                                                                   huurstijging_jaarlijks_percentage=huur_stijging))
+            if omslagpunt is None:
+                assert np.isnan(raster.waarden[rij, kolom])
+            else:
+                assert raster.waarden[rij, kolom] == omslagpunt.jaar * 12 + omslagpunt.maand
+    assert np.isnan(raster.waarden).any()
+
+
+def test_kritieke_waardedaling() -> None:
+    """Bij de kritieke daling is de woningwaarde precies gelijk aan de restschuld."""
+    gegeven = gegevens.Gegevens()
+    raster = analyse.kritieke_waardedaling(gegeven, [-2.0, 0.0, 3.0])
+    _, alle_data = main.bereken(gegeven)
+    assert raster.waarden.shape == (3, 360)
+    for rij, stijging in enumerate(raster.rij_waarden):
+        for maand in (0, 100, 359):
+            woning_waarde = gegeven.kosten_huis * (1 + stijging / 100) ** alle_data[maand].jaar
+            na_daling = woning_waarde * (1 - raster.waarden[rij, maand] / 100)
+            assert na_daling == pytest.approx(alle_data[maand].restschuld, abs=1e-6)
+    assert raster.waarden[1, -1] == pytest.approx(100.0)
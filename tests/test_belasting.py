@@ -0,0 +1,71 @@
+"""Test voor de vooraf uitgerekende belastingregels"""
+import json
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+import gegevens
+from src import belasting
+from src import vector
+
+
+def test_regime_gelijk_aan_losse_functies() -> None:
+    """Het regime moet voor elk jaar dezelfde uitkomsten geven als de losse functies."""
+    for aankoopjaar, percentage in ((2019, 49.5), (2021, 37.1), (2030, 42.0)):
+        gegeven = gegevens.Gegevens(aankoopjaar=aankoopjaar, hoogste_belasting_percentage_inkomen=percentage)
+        regime = belasting.regime_voor(gegeven)
+        for jaar in range(gegeven.looptijd_hypotheek_jaren):
+            hra = belasting.bereken_hra(gegeven, 800.0, jaar)
+            ewf = belasting.bereken_ewf(gegeven, 350_000.0, jaar)
+            assert regime.hra(800.0, jaar) == pytest.approx(hra)
+            assert regime.ewf(350_000.0, jaar) == pytest.approx(ewf)
+            for hra_of_nul in (hra, 0.0):
+                verwacht = belasting.bereken(gegeven, hra_of_nul, ewf, jaar)
+                assert np.array(regime.bereken(hra_of_nul, ewf, jaar)).tolist() == pytest.approx(verwacht)
+
+
+def test_regime_alleen_lezen() -> None:
+    """Het bewaarde regime wordt met alle aanroepers gedeeld, dus de tabellen kunnen niet aangepast worden."""
+    regime = belasting.regime_voor(gegevens.Gegevens())
+    with pytest.raises(ValueError):
+        regime.hra_percentage[0] = 0.0
+
+
+def test_laad_tabellen(tmp_path: Path) -> None:
+    """Nieuwe belastingjaren moeten uit een bestand ingelezen kunnen worden."""
+    inhoud = json.loads(belasting.STANDAARD_TABELLEN_BESTAND.read_text())
+    inhoud["maximum_aftrek"]["2024"] = 0.3697
+    inhoud["maximum_aftrek_daarna"] = 0.35
+    bestand = tmp_path / "tabellen.json"
+    bestand.write_text(json.dumps(inhoud))
+
+    regime = belasting.maak_regime(2023, 49.5, 3, belasting.laad_tabellen(bestand))
+    assert regime.hra_percentage.tolist() == pytest.approx([0.371, 0.3697, 0.35])
+
+
+def test_regime_uit_ander_bestand(tmp_path: Path) -> None:
+    """Een regime kan gemaakt worden met tabellen uit een ander bestand, naast het regime met de standaard tabellen.
+    Beide worden bewaard, met de tabellen als deel van de sleutel, en ook een batch kan met de andere tabellen."""
+    inhoud = json.loads(belasting.STANDAARD_TABELLEN_BESTAND.read_text())
+    inhoud["ewf_percentage_daarna"] = 0.01
+    inhoud["maximum_aftrek_daarna"] = 0.30
+    bestand = tmp_path / "tabellen.json"
+    bestand.write_text(json.dumps(inhoud))
+    tabellen = belasting.laad_tabellen(bestand)
+
+    gegeven = gegevens.Gegevens(aankoopjaar=2040)
+    standaard = belasting.regime_voor(gegeven)
+    ander = belasting.regime_voor(gegeven, tabellen)
+    assert ander is belasting.regime_voor(gegeven, belasting.laad_tabellen(bestand))
+    assert standaard is belasting.regime_voor(gegeven)
+    assert ander.hra_percentage.tolist() == pytest.approx([0.30] * gegeven.looptijd_hypotheek_jaren)
+    for jaar in (0, 10):
+        assert ander.hra(800.0, jaar) == pytest.approx(belasting.bereken_hra(gegeven, 800.0, jaar, tabellen))
+        assert ander.ewf(350_000.0, jaar) == pytest.approx(belasting.bereken_ewf(gegeven, 350_000.0, jaar, tabellen))
+        assert ander.hra(800.0, jaar) != pytest.approx(standaard.hra(800.0, jaar))
+
+    scenarios = [gegeven, gegeven._replace(kosten_huis=300_000)]
+    aftrek = vector.bereken_scenarios(scenarios, tabellen)["hypotheek_rente_aftrek"]
+    rente = vector.bereken_scenarios(scenarios)["rente"]
+    assert aftrek[:, -1].tolist() == pytest.approx((rente[:, -1] * 0.30).tolist())
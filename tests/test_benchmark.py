@@ -0,0 +1,38 @@
+"""Test van de benchmarks en de vergelijking met een basislijn"""
+from pathlib import Path
+
+import pytest
+
+from src import benchmark
+
+
+def test_regressies() -> None:
+    """Alleen benchmarks die meer dan de drempel slechter zijn dan de basislijn tellen als regressie."""
+    basislijn = {"snel": 1.0, "geheugen": 1000.0, "nul": 0.0}
+    resultaten = {"snel": 1.15, "geheugen": 1300.0, "nul": 5.0, "nieuw": 2.0}
+    gevonden = benchmark.regressies(resultaten, basislijn, drempel_percentage=20.0)
+    assert [regressie.naam for regressie in gevonden] == ["geheugen"]
+    assert gevonden[0].verschil_percentage == pytest.approx(30.0)
+    assert benchmark.regressies(resultaten, basislijn, drempel_percentage=10.0)[0].naam == "snel"
+
+
+def test_basislijn_bewaren_en_lezen(tmp_path: Path) -> None:
+    """De resultaten van een run kunnen als basislijn bewaard en weer gelezen worden."""
+    benchmarks = [
+        benchmark.Benchmark("tijd", lambda: benchmark.meet_tijd(lambda: sum(range(100)), herhalingen=1), "s"),
+        benchmark.Benchmark("geheugen", lambda: benchmark.meet_piekgeheugen(lambda: bytearray(1 << 20)), "bytes"),
+    ]
+    resultaten = benchmark.draai(benchmarks)
+    assert 0.0 < resultaten["tijd"] < 0.01
+    assert resultaten["geheugen"] >= 1 << 20
+
+    bestand = tmp_path / "basislijn.json"
+    benchmark.bewaar_basislijn(resultaten, bestand)
+    assert benchmark.lees_basislijn(bestand) == resultaten
+
+
+def test_batch_scenarios() -> None:
+    """De batch is vast en afgeleid van de standaard gegevens."""
+    scenarios = benchmark.batch_scenarios()
+    assert len(scenarios) == 60
+    assert len(set(scenarios)) == 60
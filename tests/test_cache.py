@@ -0,0 +1,78 @@
+"""Tests voor de cache van resultaten"""
+import concurrent.futures
+from pathlib import Path
+
+import numpy as np
+import pytest
+from _pytest.monkeypatch import MonkeyPatch
+
+import gegevens
+from src import cache
+from src import main
+
+
+def test_cache_geheugen_en_schijf(tmp_path: Path) -> None:
+    """Resultaten komen eerst uit het geheugen, na het verdringen (LRU) van de schijf, en zijn gelijk aan een nieuwe
+    berekening."""
+    gegeven = gegevens.Gegevens()
+    ander = gegeven._replace(kosten_huis=350_000)
+    resultaten = cache.ResultaatCache(max_grootte=1, map_naam=tmp_path)
+
+    assert resultaten.bereken(gegeven) == main.bereken(gegeven)
+    assert resultaten.bereken(gegeven) == main.bereken(gegeven)
+    assert resultaten.statistiek() == cache.CacheStatistiek(treffers_geheugen=1, treffers_schijf=0, missers=1)
+
+    resultaten.bereken(ander)  # verdringt het eerste resultaat uit het geheugen
+    samenvatting, alle_data = resultaten.bereken(gegeven)
+    assert resultaten.statistiek() == cache.CacheStatistiek(treffers_geheugen=1, treffers_schijf=1, missers=2)
+    assert (samenvatting, alle_data) == main.bereken(gegeven)
+    assert isinstance(alle_data[0].jaar, int)
+
+    # Een nieuwe cache met dezelfde map haalt alles van de schijf
+    nieuw = cache.ResultaatCache(map_naam=tmp_path)
+    nieuw.bereken(ander)
+    assert nieuw.statistiek() == cache.CacheStatistiek(treffers_geheugen=0, treffers_schijf=1, missers=0)
+
+
+def test_sleutel(monkeypatch: MonkeyPatch) -> None:
+    """De sleutel hangt af van alle gegevens en van de modelversie, maar niet van het type van een getal."""
+    gegeven = gegevens.Gegevens()
+    assert cache.sleutel(gegeven) == cache.sleutel(gegevens.Gegevens())
+    assert cache.sleutel(gegeven._replace(kosten_huis=400_000)) == cache.sleutel(gegeven._replace(kosten_huis=4e5))
+    looptijd = gegeven.looptijd_hypotheek_jaren
+    numpy_looptijd = gegeven._replace(looptijd_hypotheek_jaren=np.int64(looptijd))  # type: ignore[arg-type]
+    assert cache.sleutel(numpy_looptijd) == cache.sleutel(gegeven)
+    assert cache.sleutel(gegeven) != cache.sleutel(gegeven._replace(hypotheek_vorm=gegevens.HypotheekVorm.Lineair))
+    oude_sleutel = cache.sleutel(gegeven)
+    monkeypatch.setattr(cache, "MODEL_VERSIE", cache.MODEL_VERSIE + 1)
+    assert cache.sleutel(gegeven) != oude_sleutel
+
+
+@pytest.mark.parametrize("inhoud", [b"geen npz bestand", b"PK\x03\x04afgebroken", "oude versie"])
+def test_kapot_bestand_is_misser(tmp_path: Path, inhoud: object) -> None:
+    """Een bestand op de schijf dat niet gelezen kan worden telt als misser en wordt opnieuw berekend en geschreven."""
+    gegeven = gegevens.Gegevens()
+    bestand = tmp_path / f"{cache.sleutel(gegeven)}.npz"
+    if isinstance(inhoud, bytes):
+        bestand.write_bytes(inhoud)
+    else:  # een geldig bestand waarin de data per maand ontbreekt
+        np.savez(bestand, samenvatting=np.zeros(3))
+    resultaten = cache.ResultaatCache(map_naam=tmp_path)
+    assert resultaten.bereken(gegeven) == main.bereken(gegeven)
+    assert resultaten.statistiek() == cache.CacheStatistiek(treffers_geheugen=0, treffers_schijf=0, missers=1)
+
+    nieuw = cache.ResultaatCache(map_naam=tmp_path)
+    assert nieuw.bereken(gegeven) == main.bereken(gegeven)
+    assert nieuw.statistiek() == cache.CacheStatistiek(treffers_geheugen=0, treffers_schijf=1, missers=0)
+
+
+def test_meerdere_threads(tmp_path: Path) -> None:
+    """Meerdere threads kunnen tegelijk dezelfde cache gebruiken, ook als resultaten steeds uit het geheugen verdrongen
+    worden, en alle aanroepen worden geteld."""
+    scenarios = [gegevens.Gegevens(kosten_huis=300_000 + 10_000 * index) for index in range(4)]
+    resultaten = cache.ResultaatCache(max_grootte=2, map_naam=tmp_path)
+    with concurrent.futures.ThreadPoolExecutor(max_workers=8) as threads:
+        uitkomsten = list(threads.map(resultaten.bereken, scenarios * 25))
+    for gegeven, uitkomst in zip(scenarios * 25, uitkomsten):
+        assert uitkomst[0] == main.bereken(gegeven)[0]
+    assert sum(resultaten.statistiek()) == 100
@@ -0,0 +1,31 @@
+"""Tests voor de data-structuren"""
+import numpy as np
+import pytest
+
+import gegevens
+from src import data
+from src import main
+from src import vector
+
+
+def test_maand_kolommen() -> None:
+    """De kolommen geven per maand dezelfde data als de stroom van MaandData, en per veld de hele kolom."""
+    gegeven = gegevens.Gegevens()
+    alle_data = main.bereken(gegeven)[1]
+    maanden = list(main.stroom(gegeven))
+
+    assert len(alle_data) == 360
+    assert list(alle_data) == maanden
+    assert alle_data[13] == maanden[13] and isinstance(alle_data[13].jaar, int)
+    assert alle_data["lasten"].tolist() == [maand_data.lasten for maand_data in maanden]
+    assert alle_data.som("rente") == pytest.approx(sum(maand_data.rente for maand_data in maanden))
+    assert list(alle_data[12:24]) == maanden[12:24]
+    assert data.MaandKolommen.aaneen([alle_data[:100], alle_data[100:]]) == alle_data
+
+    # Kolommen van de gevectoriseerde berekening kunnen direct gebruikt worden
+    assert data.MaandKolommen(vector.bereken_kolommen(gegeven))["restschuld"][-1] == pytest.approx(0.0, abs=1e-6)
+
+    with pytest.raises(ValueError):
+        alle_data["lasten"][0] = 0.0
+    with pytest.raises(RuntimeError):
+        data.MaandKolommen(dict(alle_data.kolommen, lasten=np.zeros(10)))
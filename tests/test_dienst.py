@@ -0,0 +1,164 @@
+"""Test van de lokale rekendienst, met de client uit dienst.py"""
+import asyncio
+import json
+import subprocess
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+import pytest
+from _pytest.monkeypatch import MonkeyPatch
+
+import gegevens
+from src import data
+from src import dienst
+from src import main
+
+LENINGDELEN = (gegevens.Leningdeel(gegevens.HypotheekVorm.Aflossingsvrij, 100_000, 1.65),
+               gegevens.Leningdeel(gegevens.HypotheekVorm.Annuiteiten))
+
+
+def test_bereken_batch_gelijk_aan_losse_berekening() -> None:
+    """Een batch met verschillende looptijden en leningdelen geeft voor elk scenario hetzelfde als main.bereken."""
+    scenarios = [gegevens.Gegevens(kosten_huis=350_000), gegevens.Gegevens(looptijd_hypotheek_jaren=20),
+                 gegevens.Gegevens(leningdelen=LENINGDELEN), gegevens.Gegevens(kosten_huis=400_000)]
+    for scenario, uitkomst in zip(scenarios, dienst.bereken_batch(scenarios)):
+        assert not isinstance(uitkomst, Exception)
+        samenvatting, alle_data = uitkomst
+        referentie_samenvatting, referentie = main.bereken(scenario)
+        assert tuple(samenvatting) == pytest.approx(tuple(referentie_samenvatting), abs=1e-6)
+        for veld in data.MaandData._fields:
+            assert alle_data[veld].tolist() == pytest.approx(referentie[veld].tolist(), rel=1e-9, abs=1e-6), veld
+
+
+def test_fout_alleen_voor_eigen_verzoek(monkeypatch: MonkeyPatch) -> None:
+    """Een scenario dat bij het berekenen een fout geeft laat de andere scenario's uit dezelfde batch niet mislukken: de
+    fout komt alleen bij het eigen verzoek, ongeldige gegevens geven een 400 en andere fouten een 500."""
+    lineair = (gegevens.Leningdeel(gegevens.HypotheekVorm.Lineair),)
+    geldig = [gegevens.Gegevens(kosten_huis=300_000 + 10_000 * index, leningdelen=lineair) for index in range(3)]
+    ongeldig = gegevens.Gegevens(leningdelen=(gegevens.Leningdeel(gegevens.HypotheekVorm.Lineair,
+                                                                  hypotheek_rente_percentage="abc"),))  # type: ignore
+
+    async def test() -> Tuple[List[Any], List[Tuple[int, bytes]]]:
+        rekendienst = dienst.Dienst(dienst.Verzamelaar(venster=0.05), max_workers=1)
+        server = await dienst.start(rekendienst, port=0)
+        port = server.sockets[0].getsockname()[1]
+        try:
+            uitkomsten = await asyncio.gather(*[rekendienst.verzamelaar.bereken(gegeven)
+                                                for gegeven in geldig + [ongeldig]], return_exceptions=True)
+            rijen = [{"kosten_huis": gegeven.kosten_huis, "leningdelen": [{"hypotheek_vorm": "Lineair"}]}
+                     for gegeven in geldig]
+            rijen.append({"leningdelen": [{"hypotheek_vorm": "Lineair", "hypotheek_rente_percentage": "abc"}]})
+            antwoorden = await asyncio.gather(*[dienst.vraag("/samenvatting", rij, port=port) for rij in rijen])
+            monkeypatch.setattr(dienst, "bereken_batch", lambda batch: [ZeroDivisionError()] * len(batch))
+            antwoorden.append(await dienst.vraag("/samenvatting", {}, port=port))
+        finally:
+            server.close()
+            await server.wait_closed()
+            rekendienst.sluit()
+        return uitkomsten, antwoorden
+
+    uitkomsten, antwoorden = asyncio.run(test())
+    for gegeven, uitkomst, (status, inhoud) in zip(geldig, uitkomsten, antwoorden):
+        referentie, _ = main.bereken(gegeven)
+        assert tuple(uitkomst[0]) == pytest.approx(tuple(referentie), abs=1e-6)
+        assert status == 200 and json.loads(inhoud) == pytest.approx(referentie._asdict(), abs=1e-6)
+    assert isinstance(uitkomsten[3], (TypeError, ValueError))
+    assert antwoorden[3][0] == 400 and "hypotheek_rente_percentage" in json.loads(antwoorden[3][1])["fout"]
+    assert antwoorden[4][0] == 500 and "ZeroDivisionError" in json.loads(antwoorden[4][1])["fout"]
+
+
+def test_dienst_over_tcp() -> None:
+    """Verzoeken die tegelijk binnenkomen worden samen berekend, met per verzoek de eigen samenvatting. Ook de data per
+    maand, de grafiek en de foutmeldingen komen terug."""
+
+    async def test() -> Tuple[List[Tuple[int, bytes]], Dict[str, Tuple[int, bytes]]]:
+        rekendienst = dienst.Dienst(dienst.Verzamelaar(venster=0.05), max_workers=1)
+        server = await dienst.start(rekendienst, port=0)
+        port = server.sockets[0].getsockname()[1]
+        try:
+            samenvattingen = await asyncio.gather(*[
+                dienst.vraag("/samenvatting", {"kosten_huis": 300_000 + 10_000 * index}, port=port)
+                for index in range(10)
+            ])
+            antwoorden = {
+                "status": await dienst.vraag("/status", port=port),
+                "maanden": await dienst.vraag("/maanden", {"looptijd_hypotheek_jaren": 10}, port=port),
+                "plot": await dienst.vraag("/plot", {}, port=port),
+                "ongeldig": await dienst.vraag("/samenvatting", {"huisprijs": 1}, port=port),
+                "onbekend": await dienst.vraag("/rente", {}, port=port),
+            }
+        finally:
+            server.close()
+            await server.wait_closed()
+            rekendienst.sluit()
+        return samenvattingen, antwoorden
+
+    samenvattingen, antwoorden = asyncio.run(test())
+    for index, (status, inhoud) in enumerate(samenvattingen):
+        assert status == 200
+        referentie, _ = main.bereken(gegevens.Gegevens(kosten_huis=300_000 + 10_000 * index))
+        assert json.loads(inhoud) == pytest.approx(referentie._asdict(), abs=1e-6)
+    aantallen = json.loads(antwoorden["status"][1])
+    assert aantallen["verzoeken"] == 10 and aantallen["batches"] < 10
+
+    status, inhoud = antwoorden["maanden"]
+    maanden: Dict[str, Any] = json.loads(inhoud)
+    assert status == 200 and set(maanden) == set(data.MaandData._fields) and len(maanden["restschuld"]) == 120
+    assert antwoorden["plot"][0] == 200 and antwoorden["plot"][1].startswith(b"\x89PNG")
+    assert antwoorden["ongeldig"][0] == 400 and "huisprijs" in json.loads(antwoorden["ongeldig"][1])["fout"]
+    assert antwoorden["onbekend"][0] == 404
+
+
+def test_dienst_over_unix_socket(tmp_path: Path) -> None:
+    """De dienst kan ook op een Unix socket luisteren."""
+    socket = tmp_path / "hkp.sock"
+
+    async def test() -> Tuple[int, bytes]:
+        rekendienst = dienst.Dienst(max_workers=1)
+        server = await dienst.start(rekendienst, socket=socket)
+        try:
+            return await dienst.vraag("/samenvatting", {"leningdelen": [{"hypotheek_vorm": "Lineair"}]}, socket=socket)
+        finally:
+            server.close()
+            await server.wait_closed()
+            rekendienst.sluit()
+
+    status, inhoud = asyncio.run(test())
+    referentie, _ = main.bereken(gegevens.Gegevens(leningdelen=(gegevens.Leningdeel(gegevens.HypotheekVorm.Lineair),)))
+    assert status == 200 and json.loads(inhoud) == pytest.approx(referentie._asdict(), abs=1e-6)
+
+
+@pytest.mark.parametrize("verzoek, melding", [
+    (b"POST /samenvatting HTTP/1.1\r\nContent-Length: abc\r\n\r\n{}", "Ongeldige Content-Length: 'abc'"),
+    (b"POST /samenvatting HTTP/1.1\r\nContent-Length: 99999999\r\n\r\n", "maximaal"),
+    (b"HALLO\r\n\r\n", "Ongeldig HTTP verzoek"),
+    (b"GET /status HTTP/1.1\r\nX-Lang: " + b"x" * 100_000 + b"\r\n\r\n", ""),
+], ids=["content_length", "te_groot", "startregel", "lange_kopregel"])
+def test_ongeldig_http_verzoek(verzoek: bytes, melding: str) -> None:
+    """Een ongeldig HTTP verzoek krijgt een 400 met de foutmelding, waarna de verbinding gesloten wordt."""
+
+    async def test() -> bytes:
+        rekendienst = dienst.Dienst(max_workers=1)
+        server = await dienst.start(rekendienst, port=0)
+        try:
+            lezer, schrijver = await asyncio.open_connection("127.0.0.1", server.sockets[0].getsockname()[1])
+            schrijver.write(verzoek)
+            await schrijver.drain()
+            antwoord = await lezer.read()
+            schrijver.close()
+            return antwoord
+        finally:
+            server.close()
+            await server.wait_closed()
+            rekendienst.sluit()
+
+    kop, _, inhoud = asyncio.run(test()).partition(b"\r\n\r\n")
+    assert kop.startswith(b"HTTP/1.1 400 ") and melding in json.loads(inhoud)["fout"]
+
+
+def test_dienst_zonder_matplotlib() -> None:
+    """Het proces van de dienst laadt matplotlib niet in, alleen de processen die de grafieken tekenen doen dat."""
+    code = "import sys; import src.dienst; sys.exit('matplotlib' in sys.modules)"
+    proces = subprocess.run([sys.executable, "-c", code], cwd=Path(__file__).parent.parent, check=False)
+    assert proces.returncode == 0
@@ -3,6 +3,7 @@ https://financieel.infonu.nl/hypotheek/102840-wat-zijn-de-voordelen-van-de-linea
 
 from typing import NamedTuple
 
+import numpy as np
 import pytest
 
 import gegevens
@@ -59,3 +60,34 @@ def test_bereken_rente_en_aflossing_annuiteiten() -> None:
             assert aflossing + rente == pytest.approx(592.90, abs=0.1)
     assert rest_schuld == pytest.approx(0.0, abs=0.1)
     assert totale_rente == pytest.approx(98464, abs=1)
+
+
+@pytest.mark.parametrize("gegeven", [
+    gegevens.Gegevens(),
+    gegevens.Gegevens(rente_percentage_nadien=4.0, rente_vast_jaren=5),
+    gegevens.Gegevens(hypotheek_vorm=gegevens.HypotheekVorm.Lineair, rente_percentage_nadien=3.0),
+    gegevens.Gegevens(hypotheek_vorm=gegevens.HypotheekVorm.Aflossingsvrij, rente_percentage_nadien=3.0),
+    gegevens.Gegevens(aflossingsvrij_deel=25.0, rente_percentage_nadien=2.0),
+])
+def test_bereken_stand_gelijk_aan_iteratief(gegeven: gegevens.Gegevens) -> None:
+    """De stand in gesloten vorm moet voor elke maand gelijk zijn aan het stap voor stap doorrekenen."""
+    originele_schuld: float = 300_000
+    aantal_maanden = gegeven.looptijd_hypotheek_jaren * 12
+    stand = hypotheek.bereken_stand(gegeven, originele_schuld, np.arange(aantal_maanden + 1))
+
+    rest_schuld = [originele_schuld]
+    totale_rente = [0.0]
+    totale_aftrekbare_rente = [0.0]
+    for maand in range(aantal_maanden):
+        aflossing, aftrekbare_rente, niet_aftrekbare_rente = hypotheek.bereken_aflossing_en_rente(
+            gegeven, rest_schuld[-1], originele_schuld, maand // 12)
+        rest_schuld.append(rest_schuld[-1] - aflossing)
+        totale_rente.append(totale_rente[-1] + aftrekbare_rente + niet_aftrekbare_rente)
+        totale_aftrekbare_rente.append(totale_aftrekbare_rente[-1] + aftrekbare_rente)
+
+    assert np.asarray(stand.restschuld).tolist() == pytest.approx(rest_schuld, abs=1e-6)
+    assert np.asarray(stand.rente).tolist() == pytest.approx(totale_rente, abs=1e-6)
+    assert np.asarray(stand.aftrekbare_rente).tolist() == pytest.approx(totale_aftrekbare_rente, abs=1e-6)
+    assert np.asarray(stand.aflossing).tolist() == pytest.approx([originele_schuld - r for r in rest_schuld], abs=1e-6)
+    assert hypotheek.restschuld_einde_rentevaste_periode(gegeven, originele_schuld) == pytest.approx(
+        rest_schuld[gegeven.rente_vast_jaren * 12])
@@ -0,0 +1,29 @@
+"""Tests voor het incrementeel herberekenen"""
+import pytest
+
+import gegevens
+from src import incrementeel
+from src import main
+
+
+@pytest.mark.parametrize("aanpassing, beginjaar", [
+    ({"rente_percentage_nadien": 4.0}, 10),
+    ({"rente_percentage_nadien": 4.0, "rente_vast_jaren": 5}, 0),
+    ({"woz_stijging_jaarlijks_percentage": 1.0}, 1),
+    ({"kosten_huis": 350_000}, 0),
+    ({}, 30),
+])
+def test_incrementeel_gelijk_aan_volledig(aanpassing: dict, beginjaar: int) -> None:
+    """Na een aanpassing wordt alleen vanaf het eerste jaar met effect gerekend, met hetzelfde resultaat als een
+    volledige berekening."""
+    gegeven = gegevens.Gegevens(extra_spaarinleg_per_maand=100)
+    berekening = incrementeel.IncrementeleBerekening()
+    assert berekening.bereken(gegeven) == main.bereken(gegeven)
+    assert berekening.laatste_beginjaar == 0
+
+    nieuw = gegeven._replace(**aanpassing)
+    assert berekening.bereken(nieuw) == main.bereken(nieuw)
+    assert berekening.laatste_beginjaar == beginjaar
+
+    # En ook weer terug, nu met de toestanden van de tweede berekening
+    assert berekening.bereken(gegeven) == main.bereken(gegeven)
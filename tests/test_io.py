@@ -0,0 +1,40 @@
+"""Test voor het wegschrijven en inlezen van data"""
+from pathlib import Path
+
+import numpy as np
+
+import gegevens
+from src import io
+from src import vector
+
+
+def test_csv_kolommen_gelijk_aan_maand_data(tmp_path: Path) -> None:
+    """Het CSV bestand uit de kolommen moet gelijk zijn aan dat uit de lijst van data per maand."""
+    kolommen = vector.bereken_kolommen(gegevens.Gegevens(extra_spaarinleg_per_maand=100))
+    io.schrijf_naar_csv(vector.naar_maand_data(kolommen), tmp_path / "maanden.csv")
+    io.schrijf_kolommen_naar_csv(kolommen, tmp_path / "kolommen.csv")
+
+    regels = (tmp_path / "maanden.csv").read_text().splitlines()
+    assert len(regels) == 361
+    assert regels[0].startswith("Jaar,Maand,Aflossing,Rente,")
+    assert regels == (tmp_path / "kolommen.csv").read_text().splitlines()
+
+
+def test_binaire_kolommen(tmp_path: Path) -> None:
+    """Kolommen moeten binair weggeschreven en met een memory-map weer ingelezen kunnen worden, ook in blokken."""
+    scenarios = vector.scenario_raster(gegevens.Gegevens(), kosten_huis=[300_000, 350_000, 400_000, 450_000])
+    kolommen = vector.bereken_scenarios(scenarios)
+
+    io.schrijf_kolommen(kolommen, tmp_path / "ineens")
+    ingelezen = io.lees_kolommen(tmp_path / "ineens")
+    assert isinstance(ingelezen["lasten"], np.memmap)
+    assert set(ingelezen) == set(kolommen)
+    assert np.array_equal(ingelezen["restschuld"], kolommen["restschuld"])
+
+    schrijver = io.KolomSchrijver(tmp_path / "blokken", len(scenarios), 360)
+    schrijver.schrijf(0, vector.bereken_scenarios(scenarios[:3]))
+    schrijver.schrijf(3, vector.bereken_kolommen(scenarios[3]))
+    schrijver.sluit()
+    ingelezen = io.lees_kolommen(tmp_path / "blokken", ["lasten", "jaar"])
+    assert np.array_equal(ingelezen["lasten"], kolommen["lasten"])
+    assert ingelezen["jaar"][2, 359] == 29
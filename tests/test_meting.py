@@ -0,0 +1,56 @@
+"""Test voor de metingen van de fasen en de functies per maand"""
+import json
+import os
+from pathlib import Path
+
+import pytest
+from _pytest.monkeypatch import MonkeyPatch
+
+import gegevens
+from src import belasting
+from src import hypotheek
+from src import main
+from src import meting
+
+
+def test_uit_zonder_meting() -> None:
+    """Zonder meting is een fase een lege context en zijn de functies niet vervangen."""
+    origineel = belasting.regime_voor
+    assert meting.fase("maand_loop") is meting.fase("csv_schrijven")
+    with meting.meet(None):
+        main.bereken(gegevens.Gegevens())
+    assert belasting.regime_voor is origineel
+    with pytest.raises(RuntimeError, match="geen meting"):
+        meting.stop()
+
+
+def test_rapport_van_programma(tmp_path: Path, monkeypatch: MonkeyPatch) -> None:
+    """Met de omgevingsvariabele komt er een rapport met alle fasen en een aanroep per maand van de functies die
+    geteld worden. Na afloop zijn de functies weer teruggezet."""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv(meting.OMGEVINGSVARIABELE, "1")
+    origineel = hypotheek.bereken_aflossing_en_rente
+    main.main([])
+    assert hypotheek.bereken_aflossing_en_rente is origineel
+
+    rapport = json.loads((tmp_path / meting.STANDAARD_BESTAND).read_text())
+    assert set(rapport["fasen"]) == {"invoer_controle", "maand_loop", "csv_schrijven", "figuur_opbouwen",
+                                     "png_coderen", "belastingfuncties"}
+    assert rapport["fasen"]["png_coderen"]["aantal"] == 1
+    jaren = gegevens.Gegevens().looptijd_hypotheek_jaren
+    assert rapport["aanroepen"]["hypotheek.bereken_aflossing_en_rente"]["aantal"] == 12 * jaren
+    assert rapport["aanroepen"]["belasting.regime_voor"]["aantal"] == 1
+    assert rapport["aanroepen"]["BelastingRegime.ewf"]["aantal"] == jaren
+    assert rapport["fasen"]["belastingfuncties"]["aantal"] == 1 + jaren
+    assert rapport["fasen"]["maand_loop"]["wandtijd"] <= rapport["totaal"]["wandtijd"]
+    assert rapport["piek_rss_proces"] is None or rapport["piek_rss_proces"] > 0
+
+
+def test_bestand_uit_omgeving(monkeypatch: MonkeyPatch) -> None:
+    """De omgevingsvariabele is het bestand voor het rapport, met 1 voor het standaard bestand en 0 voor uit."""
+    for waarde, bestand in (("0", None), ("1", meting.STANDAARD_BESTAND), ("meting.json", Path("meting.json"))):
+        monkeypatch.setenv(meting.OMGEVINGSVARIABELE, waarde)
+        assert meting.bestand_uit_omgeving() == bestand
+    monkeypatch.delitem(os.environ, meting.OMGEVINGSVARIABELE)
+    assert meting.bestand_uit_omgeving() is None
+    assert main.lees_argumenten(["--meting"]).meting == meting.STANDAARD_BESTAND
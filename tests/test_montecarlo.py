@@ -0,0 +1,78 @@
+"""Test voor de Monte Carlo simulatie"""
+import math
+
+import numpy as np
+import pytest
+
+import gegevens
+from src import montecarlo
+from src import vector
+
+
+def test_simuleer_zonder_spreiding() -> None:
+    """Zonder spreiding moeten alle percentielen gelijk zijn aan de gewone berekening."""
+    gegeven = gegevens.Gegevens()
+    verdelingen = {"rente_percentage_nadien": montecarlo.Verdeling(gegeven.rente_percentage_nadien, 0.0)}
+    banden = montecarlo.simuleer(gegeven, 500, verdelingen, paden_per_blok=100, max_workers=2)
+
+    referentie = vector.bereken_kolommen(gegeven)
+    for naam, band in banden.items():
+        for percentielen in band:
+            assert percentielen.tolist() == pytest.approx(referentie[naam].tolist(), abs=1.0), naam
+
+
+def test_simuleer_percentielen_op_volgorde() -> None:
+    """Met spreiding moet P5 <= P50 <= P95 gelden, en moet er spreiding zijn na de rentevaste periode."""
+    banden = montecarlo.simuleer(gegevens.Gegevens(), 1000, paden_per_blok=250, max_workers=2, seed=1)
+    for band in banden.values():
+        assert (band.p5 <= band.p50 + 1e-6).all()
+        assert (band.p50 <= band.p95 + 1e-6).all()
+    restschuld = banden["restschuld"]
+    assert restschuld.p95[-1] - restschuld.p5[-1] > 1000
+    assert banden["lasten"].p95[0] - banden["lasten"].p5[0] < banden["lasten"].p95[-1] - banden["lasten"].p5[-1]
+
+
+def test_simuleer_nauwkeurigheid() -> None:
+    """De percentielen liggen per maand binnen een bakje van het exacte percentiel van alle paden (het pad met rang
+    n * p / 100, naar boven afgerond), ook als latere blokken waarden buiten het bereik van het eerste blok hebben. De
+    breedte van een bakje is twee keer het bereik van het eerste blok gedeeld door het aantal bakjes."""
+    gegeven = gegevens.Gegevens()
+    aantal_bakjes = 500
+    banden = montecarlo.simuleer(gegeven, 2000, paden_per_blok=100, max_workers=2, seed=3, aantal_bakjes=aantal_bakjes)
+
+    blokken = [vector.bereken_kolommen(montecarlo.trek_gegevens(gegeven, montecarlo.STANDAARD_VERDELINGEN, 100,
+                                                                montecarlo.generator_voor(3, blok)))
+               for blok in range(20)]
+    for naam, band in banden.items():
+        alle_paden = np.concatenate([np.broadcast_to(blok[naam], (100, blok[naam].shape[-1])) for blok in blokken])
+        eerste_blok = alle_paden[:100]
+        breedte = 2 * np.maximum(eerste_blok.max(axis=0) - eerste_blok.min(axis=0), 1.0) / aantal_bakjes
+        gesorteerd = np.sort(alle_paden, axis=0)
+        for percentiel, waarden in zip((5, 50, 95), band):
+            exact = gesorteerd[math.ceil(len(gesorteerd) * percentiel / 100) - 1]
+            assert (np.abs(waarden - exact) <= breedte + 1e-6).all(), (naam, percentiel)
+
+
+def test_percentiel_buiten_bereik() -> None:
+    """Als het eerste blok te klein is om het bereik te bepalen volgt een fout in plaats van een vertekende band."""
+    with pytest.raises(RuntimeError, match="buiten het bereik"):
+        montecarlo.simuleer(gegevens.Gegevens(), 100, paden_per_blok=5, max_workers=2, seed=1)
+
+
+def test_simuleer_leningdelen() -> None:
+    """Bij leningdelen geldt de getrokken rente nadien voor elk leningdeel na zijn eigen rentevaste periode. Gegevens
+    die per leningdeel vastliggen kunnen niet getrokken worden."""
+    leningdelen = (gegevens.Leningdeel(gegevens.HypotheekVorm.Aflossingsvrij, 100_000, 1.65, rente_vast_jaren=5),
+                   gegevens.Leningdeel(gegevens.HypotheekVorm.Annuiteiten, rente_percentage_nadien=2.0))
+    gegeven = gegevens.Gegevens(leningdelen=leningdelen)
+    vast = {"rente_percentage_nadien": montecarlo.Verdeling(4.0, 0.0)}
+    banden = montecarlo.simuleer(gegeven, 200, vast, paden_per_blok=100, max_workers=2)
+    referentie = vector.bereken_kolommen(gegeven._replace(leningdelen=tuple(
+        deel._replace(rente_percentage_nadien=4.0) for deel in leningdelen)))
+    for naam, band in banden.items():
+        assert band.p50.tolist() == pytest.approx(referentie[naam].tolist(), abs=1.0), naam
+
+    lasten = montecarlo.simuleer(gegeven, 1000, paden_per_blok=250, max_workers=2, seed=1)["lasten"]
+    assert lasten.p95[12 * 6] - lasten.p5[12 * 6] > 10.0
+    with pytest.raises(RuntimeError, match="hypotheek_rente_percentage"):
+        montecarlo.simuleer(gegeven, 100, {"hypotheek_rente_percentage": montecarlo.Verdeling(2.0, 0.5)})
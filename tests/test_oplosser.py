@@ -0,0 +1,32 @@
+"""Test voor het terugrekenen van maandlasten naar koopprijs en eigen inleg"""
+
+import pytest
+
+import gegevens
+from src import oplosser
+from src import vector
+
+
+@pytest.mark.parametrize("gegeven", [
+    gegevens.Gegevens(),
+    gegevens.Gegevens(hypotheek_vorm=gegevens.HypotheekVorm.Lineair, hypotheek_rente_percentage=3.0),
+    gegevens.Gegevens(aflossingsvrij_deel=40.0, rente_percentage_nadien=4.0, woz_waarde=600_000),
+])
+def test_maximale_koopprijs(gegeven: gegevens.Gegevens) -> None:
+    """Bij de gevonden koopprijs moeten de hoogste maandlasten precies gelijk zijn aan het maximum."""
+    for criterium, maanden in ((oplosser.Criterium.Piek, 360), (oplosser.Criterium.EersteJaar, 12)):
+        koopprijs = oplosser.maximale_koopprijs(gegeven, 1600, criterium)
+        kolommen = vector.bereken_kolommen(gegeven._replace(kosten_huis=koopprijs))
+        assert kolommen["lasten"][:maanden].max() == pytest.approx(1600, abs=1e-6)
+
+
+def test_minimale_eigen_inleg() -> None:
+    """Bij de gevonden eigen inleg moeten de hoogste maandlasten gelijk zijn aan het maximum, maar de eigen inleg moet
+    altijd minstens de kosten koper dekken."""
+    gegeven = gegevens.Gegevens()
+    eigen_inleg = oplosser.minimale_eigen_inleg(gegeven, 1300)
+    kolommen = vector.bereken_kolommen(gegeven._replace(eigen_inleg=eigen_inleg))
+    assert kolommen["lasten"].max() == pytest.approx(1300, abs=1e-6)
+
+    eigen_inleg = oplosser.minimale_eigen_inleg(gegeven, 5000)
+    assert eigen_inleg == pytest.approx(gegeven.kosten_notaris + gegeven.kosten_makelaar + 8000)
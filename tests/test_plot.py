@@ -0,0 +1,25 @@
+"""Tests voor de grafieken."""
+from pathlib import Path
+
+import gegevens
+from src import main
+from src import plot
+from src import vector
+
+
+def test_plot_schrijft_bestand(tmp_path: Path) -> None:
+    """De hoofdplot functie werkt nog met een lijst van data per maand, ook meerdere keren achter elkaar."""
+    _, alle_data = main.bereken(gegevens.Gegevens())
+    for index in range(2):
+        file_name = tmp_path / f"hkp{index}.png"
+        plot.plot(alle_data, file_name, plot_jaren=30)
+        assert file_name.stat().st_size > 0
+
+
+def test_plot_scenarios(tmp_path: Path) -> None:
+    """Elk scenario uit een batch-berekening krijgt een eigen grafiek."""
+    alle_gegevens = [gegevens.Gegevens(), gegevens.Gegevens(hypotheek_vorm=gegevens.HypotheekVorm.Lineair)]
+    kolommen = vector.bereken_scenarios(alle_gegevens)
+    file_names = [tmp_path / f"scenario{index}.png" for index in range(len(alle_gegevens))]
+    plot.plot_scenarios(kolommen, file_names, max_workers=2)
+    assert all(file_name.stat().st_size > 0 for file_name in file_names)
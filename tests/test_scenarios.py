@@ -0,0 +1,92 @@
+"""Test voor het inlezen en doorrekenen van scenario's uit een bestand"""
+import json
+from pathlib import Path
+from typing import Any, Dict, List
+
+import numpy as np
+import pytest
+
+import gegevens
+from src import main
+from src import scenarios
+from src import vector
+
+LENINGDELEN = [{"hypotheek_vorm": "Aflossingsvrij", "bedrag": 100_000, "hypotheek_rente_percentage": 1.65},
+               {"hypotheek_vorm": "Annuiteiten"}]
+
+
+def test_formaten_geven_dezelfde_scenarios(tmp_path: Path) -> None:
+    """Een CSV en een JSON-lines bestand met dezelfde scenario's geven dezelfde gegevens, met de standaard waarden voor
+    alles wat ontbreekt."""
+    csv_bestand = tmp_path / "scenarios.csv"
+    csv_bestand.write_text("kosten_huis,hypotheek_vorm,looptijd_hypotheek_jaren,leningdelen\n"
+                           "350000,Lineair,,\n"
+                           ",Annuïteitenhypotheek,20,\n"
+                           f",,,\"{json.dumps(LENINGDELEN).replace(chr(34), chr(34) * 2)}\"\n")
+    jsonl_bestand = tmp_path / "scenarios.jsonl"
+    jsonl_bestand.write_text("\n".join(json.dumps(rij) for rij in (
+        {"kosten_huis": 350_000, "hypotheek_vorm": "Lineair"},
+        {"hypotheek_vorm": "Annuïteitenhypotheek", "looptijd_hypotheek_jaren": 20.0},
+        {},
+        {"leningdelen": LENINGDELEN},
+    )) + "\n")
+
+    uit_csv = list(scenarios.lees_scenarios(csv_bestand))
+    assert uit_csv[0] == gegevens.Gegevens(kosten_huis=350_000, hypotheek_vorm=gegevens.HypotheekVorm.Lineair)
+    assert uit_csv[1] == gegevens.Gegevens(looptijd_hypotheek_jaren=20)
+    assert uit_csv[2].leningdelen[0] == gegevens.Leningdeel(gegevens.HypotheekVorm.Aflossingsvrij, 100_000, 1.65)
+    assert list(scenarios.lees_scenarios(jsonl_bestand)) == uit_csv[:2] + [gegevens.Gegevens()] + uit_csv[2:]
+
+
+@pytest.mark.parametrize("inhoud, melding", [
+    ('{"kosten_huis": 400000}\n{"eigen_inleg": 0}\n', "regel 2: De eigen inleg moet minstens de kosten koper"),
+    ('{"huisprijs": 400000}\n', "regel 1: Onbekende gegevens: huisprijs"),
+    ('{"rente_vast_jaren": 7.5}\n', "geheel getal"),
+    ('{"hypotheek_vorm": "Spaar"}\n', "Onbekende hypotheekvorm"),
+    ('{"kosten_huis": 400000\n', "ongeldige JSON"),
+    ('{"leningdelen": [{"hypotheek_vorm": "Lineair", "hypotheek_rente_percentage": "abc"}]}\n',
+     "regel 1: Ongeldige waarde voor hypotheek_rente_percentage van een leningdeel: 'abc'"),
+    ('{"leningdelen": [{"hypotheek_vorm": "Lineair", "rente_vast_jaren": 7.5}]}\n', "rente_vast_jaren .* geheel getal"),
+    ('{"leningdelen": [{"hypotheek_vorm": "Aflossingsvrij", "aftrekbaar": "ja"}]}\n', "aftrekbaar .* true of false"),
+])
+def test_controleer_ongeldige_scenarios(tmp_path: Path, inhoud: str, melding: str) -> None:
+    """Fouten worden bij het controleren gevonden, met het nummer van de regel in het bestand."""
+    bestand = tmp_path / "scenarios.jsonl"
+    bestand.write_text(inhoud)
+    with pytest.raises(RuntimeError, match=melding):
+        scenarios.controleer(bestand)
+
+
+def test_evalueer_in_blokken(tmp_path: Path) -> None:
+    """De samenvattingen per blok zijn gelijk aan die van elk scenario los berekend. Een fout verderop in het bestand
+    wordt gevonden voordat er iets berekend of weggeschreven is."""
+    bestand = tmp_path / "scenarios.jsonl"
+    rijen: List[Dict[str, Any]] = [{"kosten_huis": kosten_huis, "looptijd_hypotheek_jaren": looptijd}
+                                   for kosten_huis in (300_000, 350_000, 400_000) for looptijd in (20, 30)]
+    rijen.append({"leningdelen": LENINGDELEN})
+    bestand.write_text("\n".join(json.dumps(rij) for rij in rijen))
+
+    uitvoer = tmp_path / "samenvattingen.csv"
+    main.main(["--scenarios", str(bestand), "--uitvoer", str(uitvoer), "--blok-grootte", "3"])
+    tabel = np.loadtxt(uitvoer, delimiter=",", skiprows=1)
+    assert uitvoer.read_text().startswith("scenario,kosten_belasting,")
+    assert tabel[:, 0].tolist() == list(range(len(rijen)))
+    for rij, scenario in zip(tabel, scenarios.lees_scenarios(bestand)):
+        assert rij[1:].tolist() == pytest.approx([float(waarde) for waarde in vector.bereken_samenvatting(scenario)],
+                                              abs=0.01)
+
+    bestand.write_text(bestand.read_text() + '\n{"eigen_inleg": 0}\n')
+    uitvoer.unlink()
+    with pytest.raises(RuntimeError, match="regel 8"):
+        scenarios.evalueer(bestand, uitvoer)
+    assert not uitvoer.exists()
+
+
+def test_toml(tmp_path: Path) -> None:
+    """Een TOML bestand heeft een tabel per scenario."""
+    pytest.importorskip("toml")
+    bestand = tmp_path / "scenarios.toml"
+    bestand.write_text('[[scenario]]\nkosten_huis = 350000\n\n[[scenario]]\nhypotheek_vorm = "Lineair"\n')
+    assert list(scenarios.lees_scenarios(bestand)) == [
+        gegevens.Gegevens(kosten_huis=350_000), gegevens.Gegevens(hypotheek_vorm=gegevens.HypotheekVorm.Lineair)
+    ]
@@ -0,0 +1,188 @@
+"""Test of de gevectoriseerde berekening dezelfde getallen oplevert als de referentie loop in main.py"""
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+import gegevens
+from src import belasting
+from src import data
+from src import hypotheek
+from src import io
+from src import main
+from src import vector
+
+VARIANTEN = [
+    gegevens.Gegevens(),
+    gegevens.Gegevens(hypotheek_vorm=gegevens.HypotheekVorm.Lineair, rente_percentage_nadien=3.5),
+    gegevens.Gegevens(hypotheek_vorm=gegevens.HypotheekVorm.Aflossingsvrij, extra_spaarinleg_per_maand=250),
+    gegevens.Gegevens(aflossingsvrij_deel=30.0, rente_vast_jaren=5, rente_percentage_nadien=2.5),
+    gegevens.Gegevens(aankoopjaar=2019, hoogste_belasting_percentage_inkomen=37.1, looptijd_hypotheek_jaren=20,
+                      woz_waarde=500_000, hypotheek_rente_percentage=0.5),
+]
+
+
+@pytest.mark.parametrize("gegeven", VARIANTEN)
+def test_bereken_kolommen_gelijk_aan_loop(gegeven: gegevens.Gegevens) -> None:
+    """Elke kolom van de vector-berekening moet gelijk zijn aan de waarden uit de maand-voor-maand loop."""
+    referentie = main.bereken_gegevens(gegeven)
+    kolommen = vector.bereken_kolommen(gegeven)
+
+    assert len(kolommen["lasten"]) == len(referentie)
+    for naam in data.MaandData._fields:
+        verwacht = [getattr(maand_data, naam) for maand_data in referentie]
+        assert kolommen[naam].tolist() == pytest.approx(verwacht, rel=1e-9, abs=1e-6), naam
+
+
+def test_naar_maand_data() -> None:
+    """De omzetting naar een lijst van MaandData moet dezelfde vorm hebben als de uitvoer van de loop."""
+    kolommen = vector.bereken_kolommen(gegevens.Gegevens())
+    alle_data = vector.naar_maand_data(kolommen)
+    assert len(alle_data) == 360
+    assert alle_data[-1].restschuld == pytest.approx(kolommen["restschuld"][-1])
+    assert alle_data[12].jaar == 1 and alle_data[12].maand == 0
+
+
+def test_bereken_scenarios_gelijk_aan_losse_berekening() -> None:
+    """Elke rij van de batch-berekening moet gelijk zijn aan de berekening van dat ene scenario."""
+    scenarios = VARIANTEN[:4] + vector.scenario_raster(gegevens.Gegevens(), kosten_huis=[350_000, 450_000],
+                                                       hypotheek_rente_percentage=[1.0, 4.0])
+    kolommen = vector.bereken_scenarios(scenarios)
+
+    assert kolommen["lasten"].shape == (len(scenarios), 360)
+    for index, gegeven in enumerate(scenarios):
+        los = vector.bereken_kolommen(gegeven)
+        for naam in data.MaandData._fields:
+            assert kolommen[naam][index].tolist() == pytest.approx(los[naam].tolist(), rel=1e-12), naam
+
+
+def test_bereken_scenarios_ongeldige_invoer() -> None:
+    """Een te lage eigen inleg of verschillende looptijden moeten een foutmelding geven."""
+    with pytest.raises(RuntimeError, match="scenario 1"):
+        vector.bereken_scenarios([gegevens.Gegevens(), gegevens.Gegevens(eigen_inleg=0)])
+    with pytest.raises(RuntimeError, match="looptijd"):
+        vector.bereken_scenarios([gegevens.Gegevens(), gegevens.Gegevens(looptijd_hypotheek_jaren=20)])
+
+
+def test_bereken_samenvatting() -> None:
+    """De samenvatting moet gelijk zijn aan die van de loop, ook voor meerdere scenario's tegelijk."""
+    samenvattingen = [main.bereken(gegeven)[0] for gegeven in VARIANTEN[:4]]
+    assert tuple(vector.bereken_samenvatting(VARIANTEN[0])) == pytest.approx(tuple(samenvattingen[0]), abs=1e-6)
+
+    gestapeld = vector.bereken_samenvatting(vector.stapel_gegevens(VARIANTEN[:4]))
+    for naam in data.Samenvatting._fields:
+        verwacht = [getattr(samenvatting, naam) for samenvatting in samenvattingen]
+        assert getattr(gestapeld, naam).tolist() == pytest.approx(verwacht, abs=1e-6), naam
+
+
+def test_gestapelde_leningdelen() -> None:
+    """Scenario's met hetzelfde aantal leningdelen worden in een keer berekend, met dezelfde uitkomst als elk scenario
+    los. Het deel zonder bedrag mag per scenario verschillen, een verschillend aantal leningdelen geeft een fout."""
+    vormen = gegevens.HypotheekVorm
+    scenarios = [
+        gegevens.Gegevens(leningdelen=(gegevens.Leningdeel(vormen.Aflossingsvrij, 100_000, 1.65),
+                                       gegevens.Leningdeel(vormen.Annuiteiten))),
+        gegevens.Gegevens(kosten_huis=450_000, leningdelen=(
+            gegevens.Leningdeel(vormen.Lineair, rente_vast_jaren=5, rente_percentage_nadien=3.0),
+            gegevens.Leningdeel(vormen.Aflossingsvrij, 50_000, 4.0, aftrekbaar=True))),
+        gegevens.Gegevens(hypotheek_rente_percentage=2.0, leningdelen=(gegevens.Leningdeel(vormen.Annuiteiten, 1.0),
+                                                                       gegevens.Leningdeel(vormen.Lineair, None, 2.5))),
+    ]
+    kolommen = vector.bereken_scenarios(scenarios)
+    for index, gegeven in enumerate(scenarios):
+        los = vector.bereken_kolommen(gegeven)
+        for naam in data.MaandData._fields:
+            assert kolommen[naam][index].tolist() == pytest.approx(los[naam].tolist(), rel=1e-9, abs=1e-6), naam
+
+    with pytest.raises(RuntimeError, match="aantal leningdelen"):
+        vector.stapel_gegevens([scenarios[0], gegevens.Gegevens()])
+    te_veel = gegevens.Gegevens(leningdelen=(gegevens.Leningdeel(vormen.Lineair, 500_000),
+                                             gegevens.Leningdeel(vormen.Annuiteiten)))
+    with pytest.raises(RuntimeError, match="leningdelen"):
+        vector.bereken_scenarios([scenarios[0], te_veel])
+
+
+@pytest.mark.parametrize("gegeven", VARIANTEN)
+def test_rente_pad_gelijk_aan_standaard(gegeven: gegevens.Gegevens) -> None:
+    """Met het rentepad dat bij de gegevens hoort geeft de berekening met rentepaden dezelfde kolommen, behalve bij een
+    annuiteitenhypotheek met een renteverandering: daar wordt de maandbetaling dan opnieuw berekend."""
+    if gegeven.hypotheek_vorm == gegevens.HypotheekVorm.Annuiteiten:
+        gegeven = gegeven._replace(rente_percentage_nadien=gegeven.hypotheek_rente_percentage)
+    kolommen = vector.bereken_kolommen(gegeven)
+    paden = vector.bereken_rente_paden(gegeven, vector.standaard_rente_pad(gegeven))
+    for naam in data.MaandData._fields:
+        assert paden[naam].shape == (1, len(kolommen[naam]))
+        assert paden[naam][0].tolist() == pytest.approx(kolommen[naam].tolist(), rel=1e-9, abs=1e-6), naam
+
+
+def test_rente_paden_annuiteiten() -> None:
+    """Bij elke renteverandering wordt de maandbetaling opnieuw berekend, zodat de schuld aan het eind afgelost is."""
+    gegeven = gegevens.Gegevens()
+    paden = np.array([[1.5] * 5 + [4.0] * 10 + [2.0] * 15, [3.0] * 30])
+    kolommen = vector.bereken_rente_paden(gegeven, paden, per_jaar=True)
+    assert kolommen["restschuld"].shape == (2, 360)
+    assert kolommen["restschuld"][:, -1] == pytest.approx([0.0, 0.0], abs=1e-6)
+
+    betaling = kolommen["aflossing"][0] + kolommen["rente"][0]
+    for begin, einde in ((0, 60), (60, 180), (180, 360)):
+        assert betaling[begin:einde] == pytest.approx(np.full(einde - begin, betaling[begin]))
+    assert betaling[60] > betaling[0] and betaling[180] < betaling[60]
+
+    # Elk pad in de batch is gelijk aan het pad los berekend
+    los = vector.bereken_rente_paden(gegeven, paden[1], per_jaar=True)
+    assert kolommen["lasten"][1].tolist() == pytest.approx(los["lasten"][0].tolist(), rel=1e-12)
+
+
+def test_rollende_paden_uit_bestand(tmp_path: Path) -> None:
+    """Rentepaden kunnen uit een CSV bestand gelezen worden, en uit een lange reeks gesneden worden."""
+    bestand = tmp_path / "rentes.csv"
+    bestand.write_text("jaar,pad1,pad2\n2000,5.0,4.0\n2001,4.5,4.0\n2002,4.0,3.5\n")
+    paden = io.laad_rente_paden(bestand)
+    assert paden.tolist() == [[5.0, 4.5, 4.0], [4.0, 4.0, 3.5]]
+
+    rollend = vector.rollende_paden(np.arange(10.0), 4, stap=3)
+    assert rollend.tolist() == [[0, 1, 2, 3], [3, 4, 5, 6], [6, 7, 8, 9]]
+    per_maand = vector.rente_paden_per_maand(paden, 5, per_jaar=True)
+    assert per_maand.shape == (2, 60)
+    assert per_maand[0, 11] == 5.0 and per_maand[0, 12] == 4.5 and per_maand[0, -1] == 4.0
+
+
+def test_leningdelen() -> None:
+    """Elk leningdeel wordt berekend als een losse hypotheek, alleen de rente van aftrekbare delen telt voor de HRA."""
+    # pylint: disable=too-many-locals
+    leningdelen = (
+        gegevens.Leningdeel(gegevens.HypotheekVorm.Aflossingsvrij, 100_000, 1.65),
+        gegevens.Leningdeel(gegevens.HypotheekVorm.Lineair, 50_000, 1.2, rente_vast_jaren=5,
+                            rente_percentage_nadien=3.0),
+        gegevens.Leningdeel(gegevens.HypotheekVorm.Annuiteiten),
+        gegevens.Leningdeel(gegevens.HypotheekVorm.Aflossingsvrij, 20_000, 4.0, aftrekbaar=True),
+    )
+    gegeven = gegevens.Gegevens(leningdelen=leningdelen)
+    kolommen = vector.bereken_kolommen(gegeven)
+    schuld = main.bereken(gegeven)[0].hypotheek_schuld
+    assert kolommen["restschuld"][0] + kolommen["aflossing"][0] == pytest.approx(schuld)
+
+    # Vergelijk met elk deel als losse hypotheek
+    jaren = np.repeat(np.arange(30), 12)
+    bedragen = [100_000, 50_000, schuld - 170_000, 20_000]
+    rente, aftrekbare_rente, rest_schuld = np.zeros(360), np.zeros(360), np.zeros(360)
+    for deel, bedrag in zip(leningdelen, bedragen):
+        los = gegeven._replace(hypotheek_vorm=deel.hypotheek_vorm, rente_vast_jaren=deel.rente_vast_jaren,
+                               hypotheek_rente_percentage=deel.hypotheek_rente_percentage,
+                               rente_percentage_nadien=deel.rente_percentage_nadien or deel.hypotheek_rente_percentage)
+        _, aftrekbaar, niet_aftrekbaar, schuld_deel = vector.hypotheek_kolommen(los, bedrag, jaren)
+        rente += aftrekbaar + niet_aftrekbaar
+        aftrekbare_rente += aftrekbaar + (niet_aftrekbaar if deel.aftrekbaar else 0.0)
+        rest_schuld += schuld_deel
+    assert kolommen["rente"].tolist() == pytest.approx(rente.tolist(), rel=1e-12)
+    assert kolommen["restschuld"].tolist() == pytest.approx(rest_schuld.tolist(), rel=1e-12)
+    assert kolommen["restschuld"][-1] == pytest.approx(120_000)
+    regime = belasting.regime_voor(gegeven)
+    hypotheek_rente_aftrek = np.asarray(regime.hra(aftrekbare_rente, jaren))
+    assert kolommen["hypotheek_rente_aftrek"].tolist() == pytest.approx(hypotheek_rente_aftrek.tolist())
+
+    # Foute bedragen en de loop zonder leningdelen
+    with pytest.raises(RuntimeError, match="leningdelen"):
+        vector.bereken_kolommen(gegevens.Gegevens(leningdelen=leningdelen[:2]))
+    with pytest.raises(NotImplementedError):
+        main.bereken_maanden(gegeven, hypotheek.bereken_aankoop(gegeven))
@@ -0,0 +1,51 @@
+"""Test voor de vergelijking van hypotheekvormen"""
+from pathlib import Path
+
+import pytest
+
+import gegevens
+from src import data
+from src import main
+from src import plot
+from src import vergelijking
+
+
+def test_vergelijk_gelijk_aan_losse_berekening() -> None:
+    """Elke variant van de vergelijking moet gelijk zijn aan de berekening van alleen die variant."""
+    gegeven = gegevens.Gegevens(rente_percentage_nadien=3.0, extra_spaarinleg_per_maand=100)
+    varianten = vergelijking.maak_varianten([30.0])
+    resultaten = vergelijking.vergelijk(gegeven, varianten)
+    assert list(resultaten) == ["Lineair", "Annuiteiten", "Aflossingsvrij", "Lineair 30% aflossingsvrij",
+                                "Annuiteiten 30% aflossingsvrij"]
+
+    samenvattingen = vergelijking.samenvattingen(gegeven, resultaten)
+    for variant, (naam, alle_data) in zip(varianten, resultaten.items()):
+        samenvatting, referentie = main.bereken(gegeven._replace(hypotheek_vorm=variant.hypotheek_vorm,
+                                                                 aflossingsvrij_deel=variant.aflossingsvrij_deel))
+        assert tuple(samenvattingen[naam]) == pytest.approx(tuple(samenvatting), abs=1e-6)
+        for veld in data.MaandData._fields:
+            assert alle_data[veld].tolist() == pytest.approx(referentie[veld].tolist(), rel=1e-9, abs=1e-6), veld
+
+
+def test_csv_en_plot(tmp_path: Path) -> None:
+    """Alle varianten komen onder elkaar in een CSV bestand en over elkaar in een grafiek."""
+    resultaten = vergelijking.vergelijk(gegevens.Gegevens(), vergelijking.maak_varianten([25.0]))
+    csv_bestand = tmp_path / "vergelijking.csv"
+    vergelijking.schrijf_naar_csv(resultaten, csv_bestand)
+    regels = csv_bestand.read_text().splitlines()
+    assert len(regels) == 1 + 5 * 360
+    assert regels[0].startswith("Variant,Jaar,Maand,Aflossing,")
+    assert regels[1].startswith("Lineair,0,0,") and regels[-1].startswith("Annuiteiten 25% aflossingsvrij,29,11,")
+
+    plot_bestand = tmp_path / "vergelijking.png"
+    plot.plot_vergelijking(resultaten, plot_bestand, plot_jaren=20)
+    assert plot_bestand.stat().st_size > 0
+
+
+def test_ongeldige_varianten() -> None:
+    """Een aflossingsvrij deel buiten 0 tot 100 procent of leningdelen geven een foutmelding."""
+    with pytest.raises(RuntimeError, match="aflossingsvrije deel"):
+        vergelijking.maak_varianten([100.0])
+    leningdelen = (gegevens.Leningdeel(gegevens.HypotheekVorm.Annuiteiten),)
+    with pytest.raises(NotImplementedError):
+        vergelijking.vergelijk(gegevens.Gegevens(leningdelen=leningdelen))